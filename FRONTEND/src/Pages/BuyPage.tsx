@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { AccessoryRecommendation } from '../lib/api';
+import { useAccessoryDetails } from '../hooks/use-accessory-details';
 import { useCart } from '../context/CartContext';
 import { useWishlist } from '../context/WishlistContext';
 import { useAuth } from '../context/AuthContext';
@@ -32,7 +33,8 @@ const BuyPage: React.FC = () => {
   const { user } = useAuth();
   const { addToCart } = useCart();
   const { addToWishlist, removeFromWishlist, isInWishlist } = useWishlist();
-  const accessory = location.state?.accessory as AccessoryRecommendation;
+  // Opened from a result card: load the full description
+  const accessory = useAccessoryDetails((location.state?.accessory as AccessoryRecommendation) ?? null);
 
   const [quantity, setQuantity] = useState(1);
   const isWishlisted = accessory ? isInWishlist(accessory.accessory_id) : false;
@@ -4,6 +4,7 @@ import { Button } from './ui/button';
 import { Star, Heart, Award, TrendingUp, MessageCircle, ThumbsUp, ThumbsDown, X, Package } from 'lucide-react';
 import { formatPrice, formatScore, getQualityBadgeColor, getSentimentBadgeColor, type AccessoryRecommendation } from '../lib/api';
 import { useNavigate } from 'react-router-dom';
+import { useAccessoryDetails } from '../hooks/use-accessory-details';
 
 interface AccessoryDetailModalProps {
   accessory: AccessoryRecommendation | null;
@@ -11,8 +12,10 @@ interface AccessoryDetailModalProps {
   onClose: () => void;
 }
 
-export default function AccessoryDetailModal({ accessory, isOpen, onClose }: AccessoryDetailModalProps) {
+export default function AccessoryDetailModal({ accessory: card, isOpen, onClose }: AccessoryDetailModalProps) {
   const navigate = useNavigate();
+  // Cards carry a short description; reviews, strengths and weaknesses load on open
+  const accessory = useAccessoryDetails(card);
   
   if (!accessory) return null;
 
@@ -1,4 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
+import { mergeGuestCart } from '../lib/api';
 
 interface User {
   user_id: number;
@@ -21,6 +22,11 @@ const AuthContext = createContext<AuthContextType | undefined>(undefined);
 
 const API_BASE_URL = 'http://localhost:8000';
 
+// Items added while signed out. Only written without a token (the 'cart' key
+// mirrors the account's server cart), so a merge never sends the server
+// cart back to itself
+export const GUEST_CART_KEY = 'guest_cart';
+
 export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   const [user, setUser] = useState<User | null>(null);
   const [token, setToken] = useState<string | null>(null);
@@ -38,6 +44,21 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
     setLoading(false);
   }, []);
 
+  // Carry items added while signed out over to the account's cart
+  const mergeLocalCart = async (authToken: string) => {
+    const savedCart = localStorage.getItem(GUEST_CART_KEY);
+    const items = savedCart ? JSON.parse(savedCart) : [];
+    if (items.length > 0) {
+      try {
+        await mergeGuestCart(authToken, items);
+        // Merged once; a later sign-in must not add the same items again
+        localStorage.removeItem(GUEST_CART_KEY);
+      } catch (error) {
+        console.error('Failed to merge guest cart:', error);
+      }
+    }
+  };
+
   const login = async (email: string, password: string): Promise<{ success: boolean; message?: string }> => {
     try {
       const response = await fetch(`${API_BASE_URL}/auth/login`, {
@@ -51,6 +72,8 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
       const data = await response.json();
 
       if (data.success && data.token) {
+        await mergeLocalCart(data.token);
+
         // Save token and user info
         localStorage.setItem('auth_token', data.token);
         localStorage.setItem('user', JSON.stringify({
@@ -99,6 +122,8 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
       const data = await response.json();
 
       if (data.success && data.token) {
+        await mergeLocalCart(data.token);
+
         // Save token and user info
         localStorage.setItem('auth_token', data.token);
         localStorage.setItem('user', JSON.stringify({
@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { AccessoryRecommendation } from '../lib/api';
+import { AccessoryRecommendation, getAccountSummary } from '../lib/api';
+import { GUEST_CART_KEY, useAuth } from './AuthContext';
 
 interface CartItem extends AccessoryRecommendation {
   quantity: number;
@@ -20,27 +21,43 @@ const CartContext = createContext<CartContextType | undefined>(undefined);
 
 const API_BASE_URL = 'http://localhost:8000';
 
+const loadSavedCart = (key: string): CartItem[] => {
+  const savedCart = localStorage.getItem(key);
+  return savedCart ? JSON.parse(savedCart) : [];
+};
+
 export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
-  const [cartItems, setCartItems] = useState<CartItem[]>(() => {
+  const { token: authToken } = useAuth();
+  const [cartItems, setCartItems] = useState<CartItem[]>(() =>
     // Load cart from localStorage on init
-    const savedCart = localStorage.getItem('cart');
-    return savedCart ? JSON.parse(savedCart) : [];
-  });
+    loadSavedCart(localStorage.getItem('auth_token') ? 'cart' : GUEST_CART_KEY)
+  );
 
   // Get auth token
   const getToken = () => localStorage.getItem('auth_token');
 
-  // Sync with server on mount if user is logged in
+  // Show the account's cart after sign-in (guest items are merged into it
+  // first) and the guest cart after sign-out. One /me/summary request,
+  // shared with the wishlist provider
   useEffect(() => {
     const token = getToken();
     if (token) {
-      syncWithServer();
+      getAccountSummary(token)
+        .then((data) => {
+          if (data.success && data.cart) {
+            setCartItems(data.cart.items);
+          }
+        })
+        .catch((error) => console.error('Failed to sync cart with server:', error));
+    } else {
+      setCartItems(loadSavedCart(GUEST_CART_KEY));
     }
-  }, []);
+  }, [authToken]);
 
-  // Save cart to localStorage whenever it changes (fallback for non-logged-in users)
+  // Save cart to localStorage whenever it changes: the guest cart while signed
+  // out, otherwise a copy of the server cart for the next page load
   useEffect(() => {
-    localStorage.setItem('cart', JSON.stringify(cartItems));
+    localStorage.setItem(getToken() ? 'cart' : GUEST_CART_KEY, JSON.stringify(cartItems));
   }, [cartItems]);
 
   // Sync cart with server
@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { AccessoryRecommendation } from '../lib/api';
+import { AccessoryRecommendation, getAccountSummary } from '../lib/api';
 
 interface WishlistContextType {
   wishlistItems: AccessoryRecommendation[];
@@ -25,10 +25,17 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
   const getToken = () => localStorage.getItem('auth_token');
 
   // Sync with server on mount if user is logged in
+  // (one /me/summary request, shared with the cart provider)
   useEffect(() => {
     const token = getToken();
     if (token) {
-      syncWithServer();
+      getAccountSummary(token)
+        .then((data) => {
+          if (data.success && data.wishlist) {
+            setWishlistItems(data.wishlist.items);
+          }
+        })
+        .catch((error) => console.error('Failed to sync wishlist with server:', error));
     }
   }, []);
 
@@ -0,0 +1,40 @@
+import * as React from "react"
+
+import { getAccessoryDetails, type AccessoryRecommendation } from "@/lib/api"
+
+/**
+ * A recommendation card completed with its full description, reviews,
+ * strengths and weaknesses from /accessories/{id}. Returns the card as-is
+ * until the details arrive (or if loading them fails).
+ */
+export function useAccessoryDetails(accessory: AccessoryRecommendation | null) {
+  const [detailed, setDetailed] = React.useState<AccessoryRecommendation | null>(accessory)
+
+  React.useEffect(() => {
+    setDetailed(accessory)
+    if (!accessory) return
+
+    let cancelled = false
+    getAccessoryDetails(accessory.accessory_id)
+      .then((details) => {
+        if (cancelled) return
+        setDetailed({
+          ...accessory,
+          description: details.description ?? accessory.description,
+          compatible_cars: details.compatible_cars ?? accessory.compatible_cars,
+          top_reviews: details.reviews ?? accessory.top_reviews,
+          key_strengths: details.key_strengths ?? accessory.key_strengths,
+          key_weaknesses: details.key_weaknesses ?? accessory.key_weaknesses,
+        })
+      })
+      .catch(() => {
+        // Keep showing the card fields
+      })
+
+    return () => {
+      cancelled = true
+    }
+  }, [accessory])
+
+  return detailed
+}
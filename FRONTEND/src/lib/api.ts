@@ -39,6 +39,18 @@ export interface AccessoryRecommendation {
   key_weaknesses?: string;
 }
 
+// Full catalog record from /accessories/{id} (accessories table column names)
+export interface AccessoryDetails {
+  accessory_id: string;
+  accessory_name: string;
+  description?: string | null;
+  compatible_cars?: string | null;
+  reviews?: string | null;
+  key_strengths?: string | null;
+  key_weaknesses?: string | null;
+  [column: string]: unknown;
+}
+
 export interface RecommendationResponse {
   success: boolean;
   count: number;
@@ -108,6 +120,25 @@ export interface CategoryInfo {
   avg_quality: number;
 }
 
+export interface AccountSummary {
+  success: boolean;
+  user: {
+    user_id: number;
+    email: string;
+    full_name?: string;
+    phone?: string;
+  };
+  cart: {
+    items: (AccessoryRecommendation & { quantity: number })[];
+    total: number;
+    count: number;
+  };
+  wishlist: {
+    items: AccessoryRecommendation[];
+    count: number;
+  };
+}
+
 // ==================== API FUNCTIONS ====================
 
 /**
@@ -140,7 +171,8 @@ export async function getSectionedRecommendations(
     console.log('Sending sectioned request:', transformedProfile);
 
     const response = await fetch(
-      `${API_BASE_URL}/recommend/sectioned?exact_match_count=${exactMatchCount}&compatible_count=${compatibleCount}`,
+      // Cards only: full details are loaded with getAccessoryDetails when one is opened
+      `${API_BASE_URL}/recommend/sectioned?exact_match_count=${exactMatchCount}&compatible_count=${compatibleCount}&view=card`,
       {
         method: 'POST',
         headers: {
@@ -349,6 +381,86 @@ export async function healthCheck(): Promise<{ status: string; message: string }
   }
 }
 
+let accountSummaryRequest: Promise<AccountSummary> | null = null;
+
+/**
+ * Get profile, cart and wishlist in one request (GET /me/summary).
+ * Callers that ask while a request is in flight share it, so the cart and
+ * wishlist providers mounting together cost a single round trip.
+ */
+export function getAccountSummary(token: string): Promise<AccountSummary> {
+  if (!accountSummaryRequest) {
+    accountSummaryRequest = fetch(`${API_BASE_URL}/me/summary`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    })
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      })
+      .catch((error) => {
+        console.error('Error fetching account summary:', error);
+        throw error;
+      })
+      .finally(() => {
+        accountSummaryRequest = null;
+      });
+  }
+  return accountSummaryRequest;
+}
+
+/**
+ * Merge a signed-out (guest) cart into the user's cart in one request (POST /cart/merge)
+ */
+export async function mergeGuestCart(
+  token: string,
+  items: { accessory_id: string; quantity?: number }[]
+): Promise<{ success: boolean; merged: number }> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/cart/merge`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+      },
+      body: JSON.stringify({
+        items: items.map((item) => ({ accessory_id: item.accessory_id, quantity: item.quantity || 1 })),
+      }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error('Error merging guest cart:', error);
+    throw error;
+  }
+}
+
+/**
+ * Get the full record of one accessory (GET /accessories/{id}, revalidated by ETag)
+ */
+export async function getAccessoryDetails(accessoryId: string): Promise<AccessoryDetails> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/accessories/${encodeURIComponent(accessoryId)}`);
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    return data.accessory;
+  } catch (error) {
+    console.error('Error fetching accessory details:', error);
+    throw error;
+  }
+}
+
 // ==================== HELPER FUNCTIONS ====================
 
 /**
@@ -455,6 +567,9 @@ export default {
   getBrandDetails,
   getCategoryDetails,
   healthCheck,
+  getAccountSummary,
+  mergeGuestCart,
+  getAccessoryDetails,
   formatPrice,
   getSentimentLabel,
   getQualityLabel,
@@ -3,15 +3,37 @@
 RESTful API for personalized accessory recommendations
 """
 
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+import asyncio
+import os
+import secrets
+import time
 import uvicorn
-from recommendation_engine import PersonalizedRecommendationEngine
+from recommendation_engine import PersonalizedRecommendationEngine, EngineOverloadedError
+import numpy as np
 import pandas as pd
-from auth import UserAuth, SessionManager, AuthenticationError
-from db_helpers import CartDB, WishlistDB, OrderDB, AccessoryDB
+from auth import AuthenticationError, SessionManager
+from catalog_watcher import CatalogWatcher
+from database import ensure_list_indexes, ensure_search_index, read_catalog_version
+from db_pool import DB_PATH
+from db_helpers import ORDERS_PAGE_SIZE, MAX_ORDERS_PAGE_SIZE, SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE
+from password_hasher import password_hasher, PasswordHasherBusy
+from catalog_facets import FacetBody
+from recommendation_serializer import (
+    CARD_DESCRIPTION_CHARS, RECOMMENDATION_FIELDS, accessory_record, json_bytes, json_response,
+    recommendation_records, select_fields, text_values
+)
+from session_sweeper import SessionSweeper
+from signed_tokens import RevocationRefresher
+from write_coordinator import write_coordinator
+from async_db import (
+    AsyncCartDB, AsyncWishlistDB, AsyncAccountDB, AsyncOrderDB, AsyncAccessoryDB,
+    AsyncUserAuth, AsyncSessionManager, db_executor
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,9 +51,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(EngineOverloadedError)
+async def overloaded_handler(request: Request, exc: EngineOverloadedError):
+    """A full recommendation or database executor means: back off and retry"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 # Initialize recommendation engine
 rec_engine = None
 
+# Deletes expired sessions in the background (started in startup_event)
+session_sweeper = SessionSweeper()
+
+# Reloads signed-token revocations written by other workers (signing keys set)
+revocation_refresher = RevocationRefresher()
+
+# Reloads the engine when the database catalog version changes
+catalog_watcher = CatalogWatcher()
+
+# Recommendation work is CPU-bound: it runs on the engine's bounded thread pool
+# so the event loop keeps serving /health, auth and cart requests meanwhile.
+# numpy / scipy / pandas release the GIL for most of the heavy lifting.
+REC_POOL_SIZE = int(os.environ.get("REC_POOL_SIZE", min(4, os.cpu_count() or 1)))
+# Requests that may wait for a pool thread; beyond that new ones get 503
+REC_QUEUE_SIZE = int(os.environ.get("REC_QUEUE_SIZE", 64))
+# Time limit per recommendation request; exceeded requests get 504
+REC_TIMEOUT_SECONDS = float(os.environ.get("REC_TIMEOUT_SECONDS", 30))
+# Most results one /recommend/stream request may ask for
+STREAM_MAX_RESULTS = int(os.environ.get("STREAM_MAX_RESULTS", 5000))
+
+# Shared-memory catalog published by shared_catalog.py (multi-worker mode)
+CATALOG_SHM_PREFIX = os.environ.get("CATALOG_SHM_PREFIX")
+
+# Where the engine reads the catalog: "db" (the accessories table the cart
+# and orders use) or "csv" (accessories_with_advanced_sentiment.csv)
+CATALOG_SOURCE = os.environ.get("CATALOG_SOURCE", "db").lower()
+
+# How long clients may reuse /brands, /stats etc. before revalidating (ETag -> 304)
+FACETS_MAX_AGE = int(os.environ.get("FACETS_MAX_AGE", 60))
+
+# Token required by the /admin endpoints (admin API is disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 
 # Pydantic models for API
 class UserProfile(BaseModel):
@@ -102,15 +163,69 @@ class RecommendationResponse(BaseModel):
     score_breakdown: Optional[Dict] = None
 
 
+def create_engine() -> PersonalizedRecommendationEngine:
+    """Build the engine configured from the environment"""
+    # With CATALOG_SHM_PREFIX set, attach to the catalog published by shared_catalog.py
+    return PersonalizedRecommendationEngine(
+        shared_prefix=CATALOG_SHM_PREFIX,
+        catalog_db=DB_PATH if CATALOG_SOURCE == "db" else None,
+        max_workers=REC_POOL_SIZE,
+        max_queue=REC_QUEUE_SIZE,
+        timeout=REC_TIMEOUT_SECONDS
+    )
+
+
+async def run_engine(func, *args, **kwargs):
+    """Run CPU-bound engine work on the engine's executor and await its result"""
+    try:
+        return await rec_engine.run_async(func, *args, **kwargs)
+    except EngineOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Recommendation timed out after {REC_TIMEOUT_SECONDS}s")
+
+
 # API Endpoints
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize recommendation engine on startup"""
     global rec_engine
-    print("🚀 Starting Recommendation Engine API...")
-    rec_engine = PersonalizedRecommendationEngine()
-    print("✅ Recommendation Engine loaded successfully")
+    # Session DDL runs once here instead of on every session lookup
+    SessionManager.init_schema()
+    try:
+        ensure_list_indexes()
+    except Exception as e:
+        print(f"⚠️  Could not create list indexes: {e}")
+    try:
+        ensure_search_index()
+    except Exception as e:
+        print(f"⚠️  Could not create search index: {e}")
+    session_sweeper.start()
+    if SessionManager.signer is not None:
+        revocation_refresher.start(SessionManager.signer.revocations, db_executor)
+    
+    if rec_engine is not None:
+        # Preloaded by serve.py in the parent process before forking this worker
+        print("✅ Using preloaded Recommendation Engine")
+    else:
+        print("🚀 Starting Recommendation Engine API...")
+        rec_engine = create_engine()
+        print("✅ Recommendation Engine loaded successfully")
+    catalog_watcher.start(rec_engine)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work, the recommendation/database/password pools and the DB writer"""
+    await session_sweeper.stop()
+    await revocation_refresher.stop()
+    await catalog_watcher.stop()
+    if rec_engine is not None:
+        rec_engine.executor.shutdown()
+    db_executor.shutdown()
+    write_coordinator.shutdown()
+    password_hasher.shutdown()
 
 
 @app.get("/")
@@ -137,103 +252,145 @@ async def health_check():
     return {
         "status": "healthy",
         "engine_loaded": rec_engine is not None,
-        "total_accessories": len(rec_engine.df) if rec_engine else 0
+        "total_accessories": len(rec_engine.df) if rec_engine else 0,
+        "recommendation_pool": rec_engine.executor_stats(),
+        "database_pool": db_executor.stats(),
+        "database_writer": write_coordinator.stats(),
+        "session_cache": SessionManager.cache.stats(),
+        "password_hasher_rejected": password_hasher.rejected
     }
 
 
-@app.get("/stats")
-async def get_stats():
-    """Get dataset statistics"""
+def facet_response(request: Request, body: bytes, etag: str) -> Response:
+    """Send pre-serialized facet JSON, or 304 when the client already has this ETag"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={FACETS_MAX_AGE}"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def current_facets():
     if rec_engine is None:
         raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
-    
-    df = rec_engine.df
-    
-    return {
-        "total_accessories": len(df),
-        "total_brands": df['Car Brand'].nunique(),
-        "price_range": {
-            "min": float(df['Accessory Price'].min()),
-            "max": float(df['Accessory Price'].max()),
-            "mean": float(df['Accessory Price'].mean())
-        },
-        "sentiment_distribution": df['Sentiment_Label'].value_counts().to_dict(),
-        "quality_stats": {
-            "mean": float(df['Overall_Quality_Score'].mean()),
-            "min": float(df['Overall_Quality_Score'].min()),
-            "max": float(df['Overall_Quality_Score'].max())
-        }
-    }
+    # Built with the snapshot - no DataFrame work per request
+    return rec_engine.snapshot.facets
+
+
+@app.get("/stats")
+async def get_stats(request: Request):
+    """Get dataset statistics"""
+    stats = current_facets().stats
+    return facet_response(request, stats.body, stats.etag)
 
 
 @app.get("/brands")
-async def get_brands():
+async def get_brands(request: Request):
     """Get list of all available car brands"""
-    if rec_engine is None:
-        raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
-    
-    brands = sorted(rec_engine.df['Car Brand'].unique().tolist())
-    return {
-        "brands": brands,
-        "count": len(brands)
-    }
+    brands = current_facets().brands
+    return facet_response(request, brands.body, brands.etag)
 
 
 @app.get("/brands/{brand}/models")
-async def get_models_by_brand(brand: str):
+async def get_models_by_brand(brand: str, request: Request):
     """Get list of car models available for a specific brand"""
-    if rec_engine is None:
-        raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
-    
-    # Filter accessories by brand (case-insensitive)
-    brand_accessories = rec_engine.df[
-        rec_engine.df['Car Brand'].str.lower() == brand.lower()
-    ]
-    
-    if len(brand_accessories) == 0:
+    # Case-insensitive brand lookup
+    models = current_facets().models_for(brand)
+    if models is None:
         raise HTTPException(status_code=404, detail=f"No accessories found for brand: {brand}")
     
-    # Get unique models for this brand
-    models = sorted(brand_accessories['Car Model'].unique().tolist())
-    
-    return {
-        "brand": brand,
-        "models": models,
-        "count": len(models),
-        "accessory_count": len(brand_accessories)
-    }
+    return facet_response(request, models.body(brand), models.etag)
 
 
 @app.get("/brands-with-models")
-async def get_brands_with_models():
+async def get_brands_with_models(request: Request):
     """Get all brands with their available models"""
-    if rec_engine is None:
-        raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
+    brands = current_facets().brands_with_models
+    return facet_response(request, brands.body, brands.etag)
+
+
+def _build_sectioned_recommendations(
+    user_dict: Dict,
+    exact_match_count: int,
+    compatible_count: int,
+    include_scores: bool = False,
+    fields: Tuple[str, ...] = tuple(RECOMMENDATION_FIELDS),
+    description_chars: Optional[int] = None
+) -> Response:
+    """Run the engine and encode the sections (CPU-bound - called on the recommendation pool)"""
+    # Get sectioned recommendations
+    sections = rec_engine.get_recommendations_by_sections(
+        user_dict,
+        exact_match_count=exact_match_count,
+        compatible_count=compatible_count,
+        diversity_factor=0.3,
+        include_scores=include_scores
+    )
     
-    df = rec_engine.df
-    
-    # Group by brand and get models
-    brands_data = {}
-    for brand in sorted(df['Car Brand'].unique()):
-        brand_df = df[df['Car Brand'] == brand]
-        models = sorted(brand_df['Car Model'].unique().tolist())
-        brands_data[brand] = {
-            "models": models,
-            "model_count": len(models),
-            "accessory_count": len(brand_df)
-        }
+    user_car = f"{user_dict.get('car_brand', '')} {user_dict.get('car_model', '')}"
     
-    return {
-        "brands": brands_data,
-        "total_brands": len(brands_data)
-    }
+    # Exact matches share one compatibility note
+    exact_df = sections['exact_match']['recommendations']
+    exact_match_list = recommendation_records(
+        exact_df,
+        is_cross_compatible=False,
+        compatibility_note=f"✅ Designed specifically for your {user_dict.get('car_brand')} {user_dict.get('car_model')}",
+        fields=fields,
+        description_chars=description_chars
+    )
+    
+    # Compatible: universal accessories vs. ones made for another car
+    compatible_df = sections['compatible']['recommendations']
+    compatible_notes = []
+    if len(compatible_df):
+        compatible_cars = np.char.lower(text_values(compatible_df, 'Compatible Cars'))
+        universal = (np.char.find(compatible_cars, 'universal') >= 0) | (np.char.find(compatible_cars, 'all cars') >= 0)
+        compatible_notes = [
+            f"🌐 Universal accessory - Fits multiple car models including your {user_car}" if is_universal
+            else f"🔄 Originally for {brand} {model}, but also compatible with your {user_car}"
+            for brand, model, is_universal in zip(
+                text_values(compatible_df, 'Car Brand').tolist(),
+                text_values(compatible_df, 'Car Model').tolist(),
+                universal.tolist()
+            )
+        ]
+    compatible_list = recommendation_records(
+        compatible_df, is_cross_compatible=True, compatibility_note=compatible_notes,
+        fields=fields, description_chars=description_chars
+    )
+    
+    return json_response({
+        "success": True,
+        "sections": {
+            "exact_match": {
+                "title": f"Accessories for Your {user_dict.get('car_brand')} {user_dict.get('car_model')}",
+                "description": sections['exact_match']['description'],
+                "count": sections['exact_match']['count'],
+                "recommendations": exact_match_list,
+                "score_breakdown": sections['exact_match']['scores']
+            },
+            "compatible": {
+                "title": "Compatible & Universal Accessories",
+                "description": sections['compatible']['description'],
+                "count": sections['compatible']['count'],
+                "recommendations": compatible_list,
+                "score_breakdown": sections['compatible']['scores']
+            }
+        },
+        "total_recommendations": sections['exact_match']['count'] + sections['compatible']['count']
+    })
 
 
 @app.post("/recommend/sectioned")
 async def get_sectioned_recommendations(
     user_profile: UserProfile,
     exact_match_count: int = 6,
-    compatible_count: int = 6
+    compatible_count: int = 6,
+    include_scores: bool = False,
+    view: str = "full",
+    fields: Optional[str] = None
 ):
     """
     Get sectioned accessory recommendations
@@ -249,6 +406,9 @@ async def get_sectioned_recommendations(
     - user_profile: User preferences and requirements
     - exact_match_count: Number of exact match recommendations (default: 6)
     - compatible_count: Number of compatible/universal recommendations (default: 6)
+    - include_scores: Add each section's per-factor score breakdown (default: false)
+    - view: "full" (default) or "card" - compact items with a shortened description
+    - fields: Comma-separated item fields to return instead (accessory_id is always included)
     
     Returns:
     - Sectioned recommendations with clear labeling
@@ -266,106 +426,101 @@ async def get_sectioned_recommendations(
     if user_profile.budget_min >= user_profile.budget_max:
         raise HTTPException(status_code=400, detail="budget_min must be less than budget_max")
     
+    try:
+        item_fields = select_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    description_chars = CARD_DESCRIPTION_CHARS if view == "card" else None
+    
     # Convert Pydantic model to dict
     user_dict = user_profile.dict()
     
     try:
-        # Get sectioned recommendations
-        sections = rec_engine.get_recommendations_by_sections(
-            user_dict,
-            exact_match_count=exact_match_count,
-            compatible_count=compatible_count,
-            diversity_factor=0.3
+        return await run_engine(
+            _build_sectioned_recommendations, user_dict, exact_match_count, compatible_count,
+            include_scores, item_fields, description_chars
         )
-        
-        # Format exact match recommendations
-        exact_match_list = []
-        for idx, row in sections['exact_match']['recommendations'].iterrows():
-            exact_match_list.append(AccessoryRecommendation(
-                accessory_id=str(row['Accessory_ID']),
-                accessory_name=str(row['Accessory Name']),
-                car_brand=str(row['Car Brand']),
-                car_model=str(row['Car Model']),
-                price=float(row['Accessory Price']),
-                description=str(row['Accessory Description']),
-                sentiment_score=float(row['Sentiment_Score']),
-                sentiment_label=str(row['Sentiment_Label']),
-                quality_score=float(row['Overall_Quality_Score']),
-                dominant_emotion=str(row['Dominant_Emotion']),
-                final_score=float(row['final_score']),
-                explanation=str(row['explanation']),
-                compatible_cars=str(row['Compatible Cars']),
-                is_cross_compatible=False,
-                compatibility_note=f"✅ Designed specifically for your {user_dict.get('car_brand')} {user_dict.get('car_model')}",
-                top_reviews=str(row.get('Top 5 Reviews', '')),
-                key_strengths=str(row.get('Key_Strengths', 'N/A')),
-                key_weaknesses=str(row.get('Key_Weaknesses', 'N/A'))
-            ))
-        
-        # Format compatible recommendations
-        compatible_list = []
-        user_car_model = user_dict.get('car_model', '').lower()
-        user_car_brand = user_dict.get('car_brand', '')
-        
-        for idx, row in sections['compatible']['recommendations'].iterrows():
-            accessory_model = str(row['Car Model']).lower()
-            accessory_brand = str(row['Car Brand'])
-            compatible_cars = str(row['Compatible Cars']).lower()
-            
-            # Determine compatibility type
-            if 'universal' in compatible_cars or 'all cars' in compatible_cars:
-                compatibility_note = f"🌐 Universal accessory - Fits multiple car models including your {user_car_brand} {user_dict.get('car_model', '')}"
-            else:
-                compatibility_note = f"🔄 Originally for {accessory_brand} {row['Car Model']}, but also compatible with your {user_car_brand} {user_dict.get('car_model', '')}"
-            
-            compatible_list.append(AccessoryRecommendation(
-                accessory_id=str(row['Accessory_ID']),
-                accessory_name=str(row['Accessory Name']),
-                car_brand=str(row['Car Brand']),
-                car_model=str(row['Car Model']),
-                price=float(row['Accessory Price']),
-                description=str(row['Accessory Description']),
-                sentiment_score=float(row['Sentiment_Score']),
-                sentiment_label=str(row['Sentiment_Label']),
-                quality_score=float(row['Overall_Quality_Score']),
-                dominant_emotion=str(row['Dominant_Emotion']),
-                final_score=float(row['final_score']),
-                explanation=str(row['explanation']),
-                compatible_cars=str(row['Compatible Cars']),
-                is_cross_compatible=True,
-                compatibility_note=compatibility_note,
-                top_reviews=str(row.get('Top 5 Reviews', '')),
-                key_strengths=str(row.get('Key_Strengths', 'N/A')),
-                key_weaknesses=str(row.get('Key_Weaknesses', 'N/A'))
-            ))
-        
-        return {
-            "success": True,
-            "sections": {
-                "exact_match": {
-                    "title": f"Accessories for Your {user_dict.get('car_brand')} {user_dict.get('car_model')}",
-                    "description": sections['exact_match']['description'],
-                    "count": sections['exact_match']['count'],
-                    "recommendations": exact_match_list,
-                    "score_breakdown": sections['exact_match']['scores']
-                },
-                "compatible": {
-                    "title": "Compatible & Universal Accessories",
-                    "description": sections['compatible']['description'],
-                    "count": sections['compatible']['count'],
-                    "recommendations": compatible_list,
-                    "score_breakdown": sections['compatible']['scores']
-                }
-            },
-            "total_recommendations": sections['exact_match']['count'] + sections['compatible']['count']
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating sectioned recommendations: {str(e)}")
 
 
+def _cross_compatibility(recommendations_df: pd.DataFrame, user_dict: Dict):
+    """is_cross_compatible flags and compatibility notes for the flat list"""
+    user_car_model = user_dict.get('car_model', '').lower()
+    user_car = f"{user_dict.get('car_brand', '')} {user_dict.get('car_model', '')}"
+    if not user_car_model:
+        return False, ""
+    
+    car_brand = text_values(recommendations_df, 'Car Brand')
+    car_model = text_values(recommendations_df, 'Car Model')
+    compatible_cars = np.char.lower(text_values(recommendations_df, 'Compatible Cars'))
+    
+    # From a different model, but either lists the user's model or fits all cars
+    other_model = np.char.find(np.char.lower(car_model), user_car_model) < 0
+    listed = other_model & (np.char.find(compatible_cars, user_car_model) >= 0)
+    universal = other_model & ~listed & (
+        (np.char.find(compatible_cars, 'universal') >= 0) | (np.char.find(compatible_cars, 'all cars') >= 0)
+    )
+    
+    notes = [
+        f"⚠️ NOTE: This accessory is originally designed for {brand} {model}, but it is ALSO COMPATIBLE with your {user_car}. You can safely use this accessory!" if is_listed
+        else f"✅ Universal accessory - Designed to fit multiple car models including your {user_car}" if is_universal
+        else ""
+        for brand, model, is_listed, is_universal in zip(
+            car_brand.tolist(), car_model.tolist(), listed.tolist(), universal.tolist()
+        )
+    ]
+    return (listed | universal).tolist(), notes
+
+
+def _build_recommendations(
+    user_dict: Dict,
+    top_k: int,
+    include_scores: bool = False,
+    fields: Tuple[str, ...] = tuple(RECOMMENDATION_FIELDS),
+    description_chars: Optional[int] = None
+) -> Response:
+    """Run the engine and encode the flat list (CPU-bound - called on the recommendation pool)"""
+    # Get recommendations
+    recommendations_df, scores = rec_engine.get_recommendations(
+        user_dict,
+        top_k=top_k,
+        diversity_factor=0.3,
+        include_scores=include_scores
+    )
+    
+    if len(recommendations_df) == 0:
+        return json_response({
+            "success": False,
+            "count": 0,
+            "recommendations": [],
+            "score_breakdown": None
+        })
+    
+    is_cross_compatible, compatibility_note = _cross_compatibility(recommendations_df, user_dict)
+    recs_list = recommendation_records(
+        recommendations_df, is_cross_compatible, compatibility_note,
+        fields=fields, description_chars=description_chars
+    )
+    
+    return json_response({
+        "success": True,
+        "count": len(recs_list),
+        "recommendations": recs_list,
+        "score_breakdown": scores
+    })
+
+
 @app.post("/recommend", response_model=RecommendationResponse)
-async def get_recommendations(user_profile: UserProfile, top_k: int = 6):
+async def get_recommendations(
+    user_profile: UserProfile,
+    top_k: int = 6,
+    include_scores: bool = False,
+    view: str = "full",
+    fields: Optional[str] = None
+):
     """
     Get personalized accessory recommendations (LEGACY ENDPOINT)
     
@@ -375,6 +530,9 @@ async def get_recommendations(user_profile: UserProfile, top_k: int = 6):
     Parameters:
     - user_profile: User preferences and requirements
     - top_k: Number of recommendations to return (default: 6)
+    - include_scores: Add the per-factor score breakdown (default: false)
+    - view: "full" (default) or "card" - compact items with a shortened description
+    - fields: Comma-separated item fields to return instead (accessory_id is always included)
     
     Returns:
     - List of top-K personalized recommendations with explanations
@@ -390,78 +548,123 @@ async def get_recommendations(user_profile: UserProfile, top_k: int = 6):
     if user_profile.budget_min >= user_profile.budget_max:
         raise HTTPException(status_code=400, detail="budget_min must be less than budget_max")
     
+    try:
+        item_fields = select_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    description_chars = CARD_DESCRIPTION_CHARS if view == "card" else None
+    
     # Convert Pydantic model to dict
     user_dict = user_profile.dict()
     
     try:
-        # Get recommendations
-        recommendations_df, scores = rec_engine.get_recommendations(
-            user_dict,
-            top_k=top_k,
-            diversity_factor=0.3
+        return await run_engine(
+            _build_recommendations, user_dict, top_k, include_scores, item_fields, description_chars
         )
-        
-        if len(recommendations_df) == 0:
-            return RecommendationResponse(
-                success=False,
-                count=0,
-                recommendations=[],
-                score_breakdown=None
-            )
-        
-        # Format recommendations
-        recs_list = []
-        user_car_model = user_dict.get('car_model', '').lower()
-        user_car_brand = user_dict.get('car_brand', '')
-        
-        for idx, row in recommendations_df.iterrows():
-            # Check if this is cross-compatible
-            accessory_model = str(row['Car Model']).lower()
-            accessory_brand = str(row['Car Brand'])
-            compatible_cars = str(row['Compatible Cars']).lower()
-            
-            is_cross_compatible = False
-            compatibility_note = ""
-            
-            # If accessory is from a different model but compatible with user's car
-            if user_car_model and user_car_model not in accessory_model:
-                if user_car_model in compatible_cars:
-                    is_cross_compatible = True
-                    compatibility_note = f"⚠️ NOTE: This accessory is originally designed for {accessory_brand} {row['Car Model']}, but it is ALSO COMPATIBLE with your {user_car_brand} {user_dict.get('car_model', '')}. You can safely use this accessory!"
-                elif 'universal' in compatible_cars or 'all cars' in compatible_cars:
-                    is_cross_compatible = True
-                    compatibility_note = f"✅ Universal accessory - Designed to fit multiple car models including your {user_car_brand} {user_dict.get('car_model', '')}"
-            
-            recs_list.append(AccessoryRecommendation(
-                accessory_id=str(row['Accessory_ID']),
-                accessory_name=str(row['Accessory Name']),
-                car_brand=str(row['Car Brand']),
-                car_model=str(row['Car Model']),
-                price=float(row['Accessory Price']),
-                description=str(row['Accessory Description']),  # Full description
-                sentiment_score=float(row['Sentiment_Score']),
-                sentiment_label=str(row['Sentiment_Label']),
-                quality_score=float(row['Overall_Quality_Score']),
-                dominant_emotion=str(row['Dominant_Emotion']),
-                final_score=float(row['final_score']),
-                explanation=str(row['explanation']),
-                compatible_cars=str(row['Compatible Cars']),
-                is_cross_compatible=is_cross_compatible,
-                compatibility_note=compatibility_note,
-                top_reviews=str(row.get('Top 5 Reviews', '')),
-                key_strengths=str(row.get('Key_Strengths', 'N/A')),
-                key_weaknesses=str(row.get('Key_Weaknesses', 'N/A'))
-            ))
-        
-        return RecommendationResponse(
-            success=True,
-            count=len(recs_list),
-            recommendations=recs_list,
-            score_breakdown=scores
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+
+def _stream_chunk(
+    batches: Iterator[pd.DataFrame],
+    user_dict: Dict,
+    fields: Tuple[str, ...],
+    description_chars: Optional[int],
+    first_rank: int
+) -> Tuple[bytes, int]:
+    """Next ranked batch as NDJSON lines and its size; (b"", 0) once done (called on the recommendation pool)"""
+    batch = next(batches, None)
+    if batch is None:
+        return b"", 0
+    
+    is_cross_compatible, compatibility_note = _cross_compatibility(batch, user_dict)
+    records = recommendation_records(
+        batch, is_cross_compatible, compatibility_note,
+        fields=fields, description_chars=description_chars
+    )
+    lines = b"".join(
+        json_bytes({"rank": rank, **record}) + b"\n"
+        for rank, record in enumerate(records, first_rank)
+    )
+    return lines, len(records)
+
+
+@app.post("/recommend/stream")
+async def stream_recommendations(
+    user_profile: UserProfile,
+    limit: int = 500,
+    view: str = "full",
+    fields: Optional[str] = None
+):
+    """
+    Stream ranked recommendations as newline-delimited JSON (merchandising exports)
+    
+    Items are ranked by final score only (no diversity pass) and sent in
+    small batches while the rest is still being prepared: each batch is
+    built, explained and encoded on the recommendation pool when the
+    previous one has been sent, so memory stays flat in `limit` and a
+    client that disconnects stops the work.
+    
+    Parameters:
+    - user_profile: User preferences and requirements
+    - limit: Most items to return (default: 500, at most STREAM_MAX_RESULTS)
+    - view / fields: As for /recommend; leaving out "explanation" skips generating it
+    
+    Returns:
+    - One JSON object per line: {"rank": 1, "accessory_id": ..., ...}.
+      A failure after the first line ends the stream with {"error": ...}
+    """
+    if rec_engine is None:
+        raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
+    
+    if limit < 1 or limit > STREAM_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {STREAM_MAX_RESULTS}")
+    
+    if user_profile.budget_min >= user_profile.budget_max:
+        raise HTTPException(status_code=400, detail="budget_min must be less than budget_max")
+    
+    try:
+        item_fields = select_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    description_chars = CARD_DESCRIPTION_CHARS if view == "card" else None
+    
+    user_dict = user_profile.dict()
+    batches = rec_engine.iter_recommendations(user_dict, limit, explain="explanation" in item_fields)
+    
+    # Filter, score and send the first batch before answering, so overload,
+    # timeouts and bad profiles still get a proper status code
+    try:
+        first_lines, sent = await run_engine(
+            _stream_chunk, batches, user_dict, item_fields, description_chars, 1
         )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+    
+    async def ndjson():
+        nonlocal sent
+        if not first_lines:
+            return
+        yield first_lines
+        while True:
+            try:
+                lines, count = await run_engine(
+                    _stream_chunk, batches, user_dict, item_fields, description_chars, sent + 1
+                )
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                yield json_bytes({"error": f"Error generating recommendations: {detail}"}) + b"\n"
+                return
+            if not count:
+                return
+            sent += count
+            yield lines
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 @app.get("/recommend/demo")
@@ -481,7 +684,7 @@ async def demo_recommendations():
         'emotion_preference': ['Happy', 'Satisfied']
     }
     
-    recommendations_df, scores = rec_engine.get_recommendations(demo_user, top_k=6)
+    recommendations_df, scores = await run_engine(rec_engine.get_recommendations, demo_user, top_k=6)
     
     recs_list = []
     for idx, row in recommendations_df.iterrows():
@@ -528,6 +731,15 @@ class CartItemRequest(BaseModel):
     quantity: int = 1
 
 
+class CartMergeItem(BaseModel):
+    accessory_id: str
+    quantity: int = Field(1, ge=1)
+
+
+class CartMergeRequest(BaseModel):
+    items: List[CartMergeItem] = Field(..., description="Guest cart to merge into the user's cart")
+
+
 class CartUpdateRequest(BaseModel):
     accessory_id: str
     quantity: int
@@ -556,7 +768,7 @@ class OrderRequest(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
-def get_current_user(authorization: Optional[str] = Header(None)) -> int:
+async def get_current_user(authorization: Optional[str] = Header(None)) -> int:
     """
     Dependency to get current user from authorization header
     Authorization: Bearer <token>
@@ -569,7 +781,14 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> int:
         if scheme.lower() != 'bearer':
             raise HTTPException(status_code=401, detail="Invalid authentication scheme")
         
-        user_id = SessionManager.validate_session(token)
+        if SessionManager.is_stateless(token):
+            # Signed token: HMAC check and revocation lookup in memory
+            user_id = SessionManager.validate_session(token)
+        else:
+            # Recently validated tokens are answered from memory, without a DB hop
+            user_id = SessionManager.cache.get(token)
+            if user_id is None:
+                user_id = await AsyncSessionManager.validate_session(token, check_cache=False)
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid or expired token")
         
@@ -584,7 +803,7 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> int:
 async def signup(request: SignupRequest):
     """Register a new user"""
     try:
-        result = UserAuth.signup(
+        result = await AsyncUserAuth.signup(
             email=request.email,
             password=request.password,
             full_name=request.full_name,
@@ -592,7 +811,7 @@ async def signup(request: SignupRequest):
         )
         
         # Create session token
-        token = SessionManager.create_session(result['user_id'])
+        token = await AsyncSessionManager.create_session(result['user_id'])
         
         return AuthResponse(
             success=True,
@@ -604,6 +823,9 @@ async def signup(request: SignupRequest):
         )
     except AuthenticationError as e:
         return AuthResponse(success=False, message=str(e))
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=429, detail="Too many sign-ins in progress, please retry",
+                            headers={"Retry-After": "1"})
     except Exception as e:
         return AuthResponse(success=False, message=f"Signup failed: {str(e)}")
 
@@ -612,13 +834,13 @@ async def signup(request: SignupRequest):
 async def login(request: LoginRequest):
     """Login user and create session"""
     try:
-        result = UserAuth.login(
+        result = await AsyncUserAuth.login(
             email=request.email,
             password=request.password
         )
         
         # Create session token
-        token = SessionManager.create_session(result['user_id'])
+        token = await AsyncSessionManager.create_session(result['user_id'])
         
         return AuthResponse(
             success=True,
@@ -630,6 +852,9 @@ async def login(request: LoginRequest):
         )
     except AuthenticationError as e:
         return AuthResponse(success=False, message=str(e))
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=429, detail="Too many sign-ins in progress, please retry",
+                            headers={"Retry-After": "1"})
     except Exception as e:
         return AuthResponse(success=False, message=f"Login failed: {str(e)}")
 
@@ -642,7 +867,7 @@ async def logout(authorization: Optional[str] = Header(None)):
     
     try:
         scheme, token = authorization.split()
-        SessionManager.delete_session(token)
+        await AsyncSessionManager.delete_session(token)
         return {"success": True, "message": "Logged out successfully"}
     except:
         return {"success": True, "message": "Logged out"}
@@ -651,27 +876,31 @@ async def logout(authorization: Optional[str] = Header(None)):
 @app.get("/auth/me")
 async def get_current_user_info(user_id: int = Depends(get_current_user)):
     """Get current user information"""
-    user = UserAuth.get_user_by_id(user_id)
+    user = await AsyncUserAuth.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"success": True, "user": user}
 
 
+@app.get("/me/summary")
+async def get_account_summary(user_id: int = Depends(get_current_user)):
+    """
+    Profile, cart and wishlist in one round trip (one connection) -
+    what the frontend needs on every page load
+    """
+    summary = await AsyncAccountDB.get_summary(user_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"success": True, **summary}
+
+
 # ==================== CART ENDPOINTS ====================
 
 @app.get("/cart")
-async def get_cart(user_id: int = Depends(get_current_user)):
-    """Get user's cart items"""
-    items = CartDB.get_cart_items(user_id)
-    total = CartDB.get_cart_total(user_id)
-    count = CartDB.get_cart_count(user_id)
-    
-    return {
-        "success": True,
-        "items": items,
-        "total": total,
-        "count": count
-    }
+async def get_cart(detail: bool = False, user_id: int = Depends(get_current_user)):
+    """Get user's cart items (list columns; ?detail=true for every accessory column)"""
+    summary = await AsyncCartDB.get_cart_summary(user_id, detail)
+    return {"success": True, **summary}
 
 
 @app.post("/cart")
@@ -680,7 +909,19 @@ async def add_to_cart(
     user_id: int = Depends(get_current_user)
 ):
     """Add item to cart"""
-    result = CartDB.add_to_cart(user_id, request.accessory_id, request.quantity)
+    result = await AsyncCartDB.add_to_cart(user_id, request.accessory_id, request.quantity)
+    return result
+
+
+@app.post("/cart/merge")
+async def merge_cart(
+    request: CartMergeRequest,
+    user_id: int = Depends(get_current_user)
+):
+    """Merge a guest (signed-out) cart into the user's cart"""
+    if not request.items:
+        return {"success": True, "message": "Nothing to merge", "merged": 0}
+    result = await AsyncCartDB.merge_cart(user_id, [item.dict() for item in request.items])
     return result
 
 
@@ -690,7 +931,7 @@ async def update_cart_item(
     user_id: int = Depends(get_current_user)
 ):
     """Update cart item quantity"""
-    result = CartDB.update_cart_quantity(user_id, request.accessory_id, request.quantity)
+    result = await AsyncCartDB.update_cart_quantity(user_id, request.accessory_id, request.quantity)
     return result
 
 
@@ -700,24 +941,24 @@ async def remove_from_cart(
     user_id: int = Depends(get_current_user)
 ):
     """Remove item from cart"""
-    result = CartDB.remove_from_cart(user_id, accessory_id)
+    result = await AsyncCartDB.remove_from_cart(user_id, accessory_id)
     return result
 
 
 @app.delete("/cart")
 async def clear_cart(user_id: int = Depends(get_current_user)):
     """Clear all items from cart"""
-    result = CartDB.clear_cart(user_id)
+    result = await AsyncCartDB.clear_cart(user_id)
     return result
 
 
 # ==================== WISHLIST ENDPOINTS ====================
 
 @app.get("/wishlist")
-async def get_wishlist(user_id: int = Depends(get_current_user)):
-    """Get user's wishlist items"""
-    items = WishlistDB.get_wishlist_items(user_id)
-    count = WishlistDB.get_wishlist_count(user_id)
+async def get_wishlist(detail: bool = False, user_id: int = Depends(get_current_user)):
+    """Get user's wishlist items (list columns; ?detail=true for every accessory column)"""
+    items = await AsyncWishlistDB.get_wishlist_items(user_id, detail)
+    count = len(items)
     
     return {
         "success": True,
@@ -732,7 +973,7 @@ async def add_to_wishlist(
     user_id: int = Depends(get_current_user)
 ):
     """Add item to wishlist"""
-    result = WishlistDB.add_to_wishlist(user_id, request.accessory_id)
+    result = await AsyncWishlistDB.add_to_wishlist(user_id, request.accessory_id)
     return result
 
 
@@ -742,17 +983,76 @@ async def remove_from_wishlist(
     user_id: int = Depends(get_current_user)
 ):
     """Remove item from wishlist"""
-    result = WishlistDB.remove_from_wishlist(user_id, accessory_id)
+    result = await AsyncWishlistDB.remove_from_wishlist(user_id, accessory_id)
     return result
 
 
 @app.delete("/wishlist")
 async def clear_wishlist(user_id: int = Depends(get_current_user)):
     """Clear all items from wishlist"""
-    result = WishlistDB.clear_wishlist(user_id)
+    result = await AsyncWishlistDB.clear_wishlist(user_id)
     return result
 
 
+# ==================== ACCESSORY ENDPOINTS ====================
+
+@app.get("/search")
+async def search_accessories(
+    q: str = Query(..., min_length=1, max_length=200),
+    brand: Optional[str] = None,
+    model: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sentiment: Optional[str] = None,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    Full-text search over accessory name, description, category and reviews,
+    most relevant first; pass next_cursor back as ?cursor= for the next page
+    """
+    try:
+        page = await AsyncAccessoryDB.full_text_search(
+            q, brand=brand, model=model, category=category,
+            min_price=min_price, max_price=max_price, sentiment=sentiment,
+            limit=limit, after=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "success": True,
+        "query": q,
+        "results": page['results'],
+        "count": len(page['results']),
+        "next_cursor": page['next_cursor']
+    }
+
+
+@app.get("/accessories/{accessory_id}")
+async def get_accessory(accessory_id: str, request: Request):
+    """
+    Full accessory record (cart/wishlist lists and recommendation cards only carry a few columns)
+    
+    Served from the catalog snapshot's ID index; accessories the engine
+    does not hold are looked up in the database. The ETag lets clients
+    revalidate with If-None-Match (304 when unchanged).
+    """
+    accessory = None
+    if rec_engine is not None:
+        row = rec_engine.snapshot.row_for_id(accessory_id)
+        if row is not None:
+            accessory = accessory_record(row)
+    if accessory is None:
+        accessory = await AsyncAccessoryDB.get_accessory_by_id(accessory_id)
+    if not accessory:
+        raise HTTPException(status_code=404, detail="Accessory not found")
+    
+    detail = FacetBody(json_bytes({"success": True, "accessory": accessory}))
+    return facet_response(request, detail.body, detail.etag)
+
+
 # ==================== ORDER ENDPOINTS ====================
 
 @app.post("/orders")
@@ -762,7 +1062,7 @@ async def create_order(
 ):
     """Create a new order from cart items"""
     # Get cart items
-    cart_items = CartDB.get_cart_items(user_id)
+    cart_items = await AsyncCartDB.get_cart_items(user_id)
     
     if not cart_items:
         return {"success": False, "message": "Cart is empty"}
@@ -784,7 +1084,7 @@ async def create_order(
     ]
     
     # Create order
-    result = OrderDB.create_order(
+    result = await AsyncOrderDB.create_order(
         user_id=user_id,
         cart_items=order_items,
         total_amount=total_amount,
@@ -802,7 +1102,7 @@ async def get_order(
     user_id: int = Depends(get_current_user)
 ):
     """Get order details by order number"""
-    order = OrderDB.get_order_by_number(order_number)
+    order = await AsyncOrderDB.get_order_by_number(order_number)
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -815,10 +1115,98 @@ async def get_order(
 
 
 @app.get("/orders")
-async def get_user_orders(user_id: int = Depends(get_current_user)):
-    """Get all orders for current user"""
-    orders = OrderDB.get_user_orders(user_id)
-    return {"success": True, "orders": orders, "count": len(orders)}
+async def get_user_orders(
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=MAX_ORDERS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_current_user)
+):
+    """Get current user's orders, newest first; pass next_cursor back as ?cursor= for the next page"""
+    try:
+        page = await AsyncOrderDB.get_user_orders(user_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return {
+        "success": True,
+        "orders": page['orders'],
+        "count": len(page['orders']),
+        "next_cursor": page['next_cursor']
+    }
+
+
+# ==================== ADMIN ENDPOINTS ====================
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency that checks the X-Admin-Token header against ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/admin/catalog", dependencies=[Depends(require_admin)])
+async def get_catalog_info():
+    """Report the catalog snapshot currently served by the engine"""
+    if rec_engine is None:
+        raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
+    
+    database = None
+    if rec_engine.catalog_db is not None:
+        database = {
+            "path": str(rec_engine.catalog_db),
+            "loaded_version": rec_engine.db_catalog_version,
+            "current_version": await db_executor.run(read_catalog_version, rec_engine.catalog_db),
+        }
+    return {
+        "success": True,
+        "snapshot": rec_engine.snapshot.info(),
+        "database": database,
+        "watcher": catalog_watcher.stats()
+    }
+
+
+@app.post("/admin/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_catalog():
+    """
+    Reload the accessory catalog (database or CSV) without restarting
+    
+    Requests already running finish on the previous snapshot.
+    """
+    if rec_engine is None:
+        raise HTTPException(status_code=503, detail="Recommendation engine not initialized")
+    
+    previous_version = rec_engine.catalog_version
+    start = time.perf_counter()
+    try:
+        # Rebuilding is CPU/disk heavy - keep it off the event loop
+        snapshot = await run_engine(rec_engine.reload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "previous_version": previous_version,
+        "snapshot": snapshot.info(),
+        "reload_seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+@app.get("/admin/sessions", dependencies=[Depends(require_admin)])
+async def get_session_sweeper_info():
+    """Report the expired-session sweeper's runs and rows reclaimed"""
+    return {"success": True, "sweeper": session_sweeper.stats()}
+
+
+@app.post("/admin/sessions/sweep", dependencies=[Depends(require_admin)])
+async def sweep_sessions():
+    """Delete expired sessions now instead of waiting for the next scheduled sweep"""
+    try:
+        result = await session_sweeper.sweep_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Session sweep failed: {str(e)}")
+    return {"success": True, "sweep": result}
 
 
 # ==================== RUN SERVER ====================
@@ -0,0 +1,108 @@
+"""
+⚡ ASYNC DATA ACCESS
+Awaitable versions of the database helpers for the FastAPI handlers
+
+CartDB, WishlistDB, AccountDB, OrderDB, AccessoryDB, UserAuth and
+SessionManager are blocking sqlite3 code. Called directly from an
+`async def` handler they stall the event loop for every query. The Async* classes here expose the
+same static methods as coroutines that run the original on a dedicated,
+bounded database executor:
+- DB_POOL_SIZE threads, each borrowing connections from db_pool (the pool
+  keeps that many idle connections, so threads keep reusing theirs)
+- At most DB_QUEUE_SIZE calls wait for a thread; beyond that
+  EngineOverloadedError is raised instead of queueing without bound
+Cart and wishlist mutations (@grouped_write) skip the executor: they are
+awaited straight on the write coordinator, so a caller waiting for its
+batch to commit holds no thread. AsyncUserAuth.login/signup do the same
+for bcrypt: the database steps run on the executor, the password check is
+awaited on the password hasher's processes in between.
+
+Usage:
+    items = await AsyncCartDB.get_cart_items(user_id)
+"""
+
+import os
+from functools import wraps
+
+from typing import Dict
+
+from auth import AuthenticationError, UserAuth, SessionManager
+from db_helpers import CartDB, WishlistDB, AccountDB, OrderDB, AccessoryDB
+from db_pool import MAX_IDLE_CONNECTIONS
+from engine_executor import BoundedEngineExecutor
+from password_hasher import password_hasher, PasswordHasherBusy
+from write_coordinator import write_coordinator
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", min(8, MAX_IDLE_CONNECTIONS)))
+DB_QUEUE_SIZE = int(os.environ.get("DB_QUEUE_SIZE", 256))
+
+# Threads start on first use, so forked serve.py workers get their own
+db_executor = BoundedEngineExecutor(DB_POOL_SIZE, DB_QUEUE_SIZE, name="database")
+
+
+def _awaitable(func):
+    operation = getattr(func, 'operation', None)
+    if operation is not None:
+        @wraps(func)
+        async def write(*args, **kwargs):
+            return await write_coordinator.submit(operation, *args, **kwargs)
+        return staticmethod(write)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await db_executor.run(func, *args, **kwargs)
+    return staticmethod(wrapper)
+
+
+def _async_facade(sync_cls):
+    """Class with every public static/class method of sync_cls as a coroutine"""
+    methods = {
+        name: _awaitable(getattr(sync_cls, name))
+        for name, attr in vars(sync_cls).items()
+        if isinstance(attr, (staticmethod, classmethod)) and not name.startswith('_')
+    }
+    methods['__doc__'] = f"Awaitable {sync_cls.__name__} (runs on the database executor)"
+    return type(f"Async{sync_cls.__name__}", (), methods)
+
+
+AsyncCartDB = _async_facade(CartDB)
+AsyncWishlistDB = _async_facade(WishlistDB)
+AsyncAccountDB = _async_facade(AccountDB)
+AsyncOrderDB = _async_facade(OrderDB)
+AsyncAccessoryDB = _async_facade(AccessoryDB)
+AsyncUserAuth = _async_facade(UserAuth)
+AsyncSessionManager = _async_facade(SessionManager)
+
+
+# ==================== LOGIN AND SIGNUP ====================
+
+async def _login(email: str, password: str) -> Dict:
+    """UserAuth.login with the user read and the login recorded as separate database calls"""
+    user = await db_executor.run(UserAuth.get_login_user, email)
+    
+    try:
+        valid = await password_hasher.verify_async(password, user['password_hash'])
+    except PasswordHasherBusy:
+        raise
+    except Exception:
+        valid = False
+    if not valid:
+        raise AuthenticationError("Invalid email or password")
+    
+    # Re-hash transparently when BCRYPT_ROUNDS changed since this hash was made
+    new_hash = None
+    if password_hasher.needs_rehash(user['password_hash']):
+        new_hash = await password_hasher.hash_async(password)
+    
+    return await db_executor.run(UserAuth.record_login, user, new_hash)
+
+
+async def _signup(email: str, password: str, full_name: str = None, phone: str = None) -> Dict:
+    """UserAuth.signup with the password hashed before a database thread is taken"""
+    UserAuth.check_signup(email, password)
+    password_hash = await password_hasher.hash_async(password)
+    return await db_executor.run(UserAuth.create_user, email, password_hash, full_name, phone)
+
+
+AsyncUserAuth.login = staticmethod(_login)
+AsyncUserAuth.signup = staticmethod(_signup)
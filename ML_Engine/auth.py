@@ -3,15 +3,25 @@
 Handle user registration, login, and password management
 """
 
+import os
 import sqlite3
-import bcrypt
 import secrets
-from pathlib import Path
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Tuple
+from db_pool import DB_PATH, get_connection
+from password_hasher import password_hasher, PasswordHasherBusy
+import signed_tokens
 
-# Database path
-DB_PATH = Path(__file__).parent / 'vehicle_accessories.db'
+# Validated sessions are remembered in memory for at most this many seconds
+# (never past their expiry). A logout on one API worker reaches the other
+# workers' caches only when this TTL runs out.
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', 60))
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+
+SESSION_LIFETIME = timedelta(days=7)
 
 class AuthenticationError(Exception):
     """Custom exception for authentication errors"""
@@ -23,16 +33,16 @@ class UserAuth:
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash a password using bcrypt"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Hash a password using bcrypt (on the password hasher's process pool)"""
+        return password_hasher.hash(password)
     
     @staticmethod
     def verify_password(password: str, password_hash: str) -> bool:
         """Verify a password against its hash"""
         try:
-            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+            return password_hasher.verify(password, password_hash)
+        except PasswordHasherBusy:
+            raise
         except Exception:
             return False
     
@@ -76,6 +86,16 @@ class UserAuth:
         Raises:
             AuthenticationError: If signup fails
         """
+        UserAuth.check_signup(email, password)
+        
+        # Hash password
+        password_hash = UserAuth.hash_password(password)
+        
+        return UserAuth.create_user(email, password_hash, full_name, phone)
+    
+    @staticmethod
+    def check_signup(email: str, password: str):
+        """Raise AuthenticationError unless email and password are acceptable for a new account"""
         # Validate email
         if not UserAuth.validate_email(email):
             raise AuthenticationError("Invalid email format")
@@ -84,12 +104,12 @@ class UserAuth:
         is_valid, error_msg = UserAuth.validate_password(password)
         if not is_valid:
             raise AuthenticationError(error_msg)
-        
-        # Hash password
-        password_hash = UserAuth.hash_password(password)
-        
+    
+    @staticmethod
+    def create_user(email: str, password_hash: str, full_name: str = None, phone: str = None) -> Dict:
+        """Insert a user whose password is already hashed (signup without the bcrypt step)"""
         # Connect to database
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         try:
@@ -136,12 +156,36 @@ class UserAuth:
         Raises:
             AuthenticationError: If login fails
         """
+        user = UserAuth.get_login_user(email)
+        
+        # Verify password
+        if not UserAuth.verify_password(password, user['password_hash']):
+            raise AuthenticationError("Invalid email or password")
+        
+        # Re-hash transparently when BCRYPT_ROUNDS changed since this hash was made
+        new_hash = None
+        if password_hasher.needs_rehash(user['password_hash']):
+            new_hash = UserAuth.hash_password(password)
+        
+        return UserAuth.record_login(user, new_hash)
+    
+    @staticmethod
+    def get_login_user(email: str) -> Dict:
+        """
+        The active user an email signs in as, with the stored password hash
+        
+        Only reads the row: the password check happens after the connection
+        is released, so no database connection waits on bcrypt.
+        
+        Raises:
+            AuthenticationError: Bad email format, unknown or deactivated user
+        """
         # Validate email format
         if not UserAuth.validate_email(email):
             raise AuthenticationError("Invalid email format")
         
         # Connect to database
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -154,46 +198,51 @@ class UserAuth:
             ''', (email,))
             
             user = cursor.fetchone()
-            
-            if not user:
-                raise AuthenticationError("Invalid email or password")
-            
-            # Check if user is active
-            if not user['is_active']:
-                raise AuthenticationError("Account is deactivated")
-            
-            # Verify password
-            if not UserAuth.verify_password(password, user['password_hash']):
-                raise AuthenticationError("Invalid email or password")
-            
+        except Exception as e:
+            raise AuthenticationError(f"Login failed: {str(e)}")
+        finally:
+            conn.close()
+        
+        if not user:
+            raise AuthenticationError("Invalid email or password")
+        
+        # Check if user is active
+        if not user['is_active']:
+            raise AuthenticationError("Account is deactivated")
+        
+        return dict(user)
+    
+    @staticmethod
+    def record_login(user: Dict, new_hash: Optional[str] = None) -> Dict:
+        """Store the login time (and a re-made password hash) of a verified user; the login result"""
+        conn = get_connection(DB_PATH)
+        try:
             # Update last login
-            cursor.execute('''
+            conn.execute('''
                 UPDATE users
-                SET last_login = CURRENT_TIMESTAMP
+                SET last_login = CURRENT_TIMESTAMP,
+                    password_hash = COALESCE(?, password_hash)
                 WHERE user_id = ?
-            ''', (user['user_id'],))
+            ''', (new_hash, user['user_id']))
             conn.commit()
-            
-            # Return user info (without password hash)
-            return {
-                'user_id': user['user_id'],
-                'email': user['email'],
-                'full_name': user['full_name'],
-                'phone': user['phone'],
-                'message': 'Login successful'
-            }
-            
-        except AuthenticationError:
-            raise
         except Exception as e:
             raise AuthenticationError(f"Login failed: {str(e)}")
         finally:
             conn.close()
+        
+        # Return user info (without password hash)
+        return {
+            'user_id': user['user_id'],
+            'email': user['email'],
+            'full_name': user['full_name'],
+            'phone': user['phone'],
+            'message': 'Login successful'
+        }
     
     @staticmethod
     def get_user_by_id(user_id: int) -> Optional[Dict]:
         """Get user information by user_id"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -215,7 +264,7 @@ class UserAuth:
     @staticmethod
     def get_user_by_email(email: str) -> Optional[Dict]:
         """Get user information by email"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -237,7 +286,7 @@ class UserAuth:
     @staticmethod
     def update_user(user_id: int, full_name: str = None, phone: str = None) -> Dict:
         """Update user information"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         try:
@@ -269,7 +318,7 @@ class UserAuth:
     @staticmethod
     def change_password(user_id: int, old_password: str, new_password: str) -> Dict:
         """Change user password"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         try:
@@ -309,18 +358,95 @@ class UserAuth:
 
 # ==================== SESSION MANAGEMENT ====================
 
+class SessionCache:
+    """Bounded LRU of token -> user_id entries that expire on their own"""
+    
+    def __init__(self, max_size: int = SESSION_CACHE_SIZE, ttl: float = SESSION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, token: str) -> Optional[int]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, token: str, user_id: int, expires_at: datetime):
+        # Cap the TTL at the session expiry so an expired session is never served
+        deadline = min(time.time() + self.ttl, expires_at.timestamp())
+        if self.max_size <= 0 or deadline <= time.time():
+            return
+        with self._lock:
+            self._entries[token] = (user_id, deadline)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
 class SessionManager:
-    """Manage user sessions with tokens (database-backed)"""
+    """
+    Manage user sessions with tokens
+    
+    Tokens are random strings stored in the sessions table, or - with
+    SESSION_TOKEN_MODE=signed - HMAC-signed tokens checked in memory
+    (see signed_tokens.py). Signed tokens keep validating in either mode
+    as long as their key is configured.
+    """
+    
+    cache = SessionCache()
+    signer = signed_tokens.manager_from_env()
+    _schema_ready = False
+    _schema_lock = threading.Lock()
     
     @staticmethod
     def generate_token() -> str:
         """Generate a secure random token"""
         return secrets.token_urlsafe(32)
     
+    @classmethod
+    def init_schema(cls):
+        """Create the sessions table and indexes (once per process - call at startup)"""
+        with cls._schema_lock:
+            if not cls._schema_ready:
+                cls._create_sessions_table()
+                if cls.signer is not None:
+                    signed_tokens.RevocationList.init_schema()
+                    # Revocations persisted by other workers and before a restart
+                    cls.signer.revocations.refresh()
+                cls._schema_ready = True
+    
+    @classmethod
+    def _ensure_sessions_table(cls):
+        """Make sure init_schema has run (a flag check after the first call)"""
+        if not cls._schema_ready:
+            cls.init_schema()
+    
     @staticmethod
-    def _ensure_sessions_table():
+    def _create_sessions_table():
         """Create sessions table if it doesn't exist"""
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         try:
             cursor.execute('''
@@ -338,14 +464,22 @@ class SessionManager:
         finally:
             conn.close()
     
+    @classmethod
+    def is_stateless(cls, token: str) -> bool:
+        """True for signed tokens: validating them needs no I/O (revocations are refreshed in the background)"""
+        return cls.signer is not None and cls.signer.is_signed(token)
+    
     @classmethod
     def create_session(cls, user_id: int) -> str:
         """Create a new session for user"""
         cls._ensure_sessions_table()
+        if cls.signer is not None and signed_tokens.SESSION_TOKEN_MODE == 'signed':
+            return cls.signer.issue(user_id, int(SESSION_LIFETIME.total_seconds()))
+        
         token = cls.generate_token()
-        expires_at = datetime.now() + timedelta(days=7)
+        expires_at = datetime.now() + SESSION_LIFETIME
         
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         try:
             cursor.execute('''
@@ -353,15 +487,24 @@ class SessionManager:
                 VALUES (?, ?, ?)
             ''', (token, user_id, expires_at))
             conn.commit()
+            cls.cache.put(token, user_id, expires_at)
             return token
         finally:
             conn.close()
     
     @classmethod
-    def validate_session(cls, token: str) -> Optional[int]:
+    def validate_session(cls, token: str, check_cache: bool = True) -> Optional[int]:
         """Validate session token and return user_id"""
+        if cls.is_stateless(token):
+            return cls.signer.verify(token)
+        
+        if check_cache:
+            user_id = cls.cache.get(token)
+            if user_id is not None:
+                return user_id
+        
         cls._ensure_sessions_table()
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         try:
@@ -383,20 +526,48 @@ class SessionManager:
                 conn.commit()
                 return None
             
+            cls.cache.put(token, user_id, expires_at)
             return user_id
         finally:
             conn.close()
     
+    @classmethod
+    def purge_expired_sessions(cls, batch_size: int = 500) -> int:
+        """Delete up to batch_size expired sessions (via idx_sessions_expires); returns rows deleted"""
+        cls._ensure_sessions_table()
+        conn = get_connection(DB_PATH)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                DELETE FROM sessions
+                WHERE rowid IN (
+                    SELECT rowid FROM sessions
+                    WHERE expires_at < ?
+                    LIMIT ?
+                )
+            ''', (datetime.now(), batch_size))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+    
     @classmethod
     def delete_session(cls, token: str) -> bool:
         """Delete a session (logout)"""
         cls._ensure_sessions_table()
-        conn = sqlite3.connect(DB_PATH)
+        if cls.is_stateless(token):
+            return cls.signer.revoke(token)
+        
+        cls.cache.invalidate(token)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
         
         try:
             cursor.execute('DELETE FROM sessions WHERE token = ?', (token,))
             conn.commit()
+            # Again, in case a concurrent validate_session re-cached it meanwhile
+            cls.cache.invalidate(token)
             return cursor.rowcount > 0
         finally:
             conn.close()
@@ -0,0 +1,1363 @@
+"""
+⏱️ PERFORMANCE BENCHMARKS
+Repeatable measurements for the API server, engine and database layers
+
+Each benchmark prints a small table so results can be pasted into reviews.
+
+Usage:
+    python benchmarks.py workers --counts 1 4 16
+    python benchmarks.py concurrency --clients 50 --pool-sizes 1 4
+    python benchmarks.py db --readers 8 --writers 2 --seconds 5
+    python benchmarks.py writes --clients 64 --seconds 5
+    python benchmarks.py cart-projection --items 100
+    python benchmarks.py orders --orders 1000
+    python benchmarks.py checkout --workers 4 --customers 25
+    python benchmarks.py search --rows 1000000
+    python benchmarks.py catalog-load --rows 200000
+    python benchmarks.py serialize --top-k 50
+    python benchmarks.py card-view --requests 50
+    python benchmarks.py stream --rows 60000 --limits 100 1000 5000
+    python benchmarks.py mixed --rec-clients 10 --cart-clients 40 --seconds 15
+    python benchmarks.py auth --sessions 1000 --checks 20000
+    python benchmarks.py login-storm --rec-clients 4 --login-clients 32 --seconds 10
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ML_ENGINE_DIR = Path(__file__).parent
+
+
+def print_header(title):
+    """Print formatted header"""
+    print("\n" + "=" * 80)
+    print(f"  {title}")
+    print("=" * 80)
+
+
+# ==================== PROCESS MEMORY ====================
+
+def _descendants(root_pid: int) -> List[int]:
+    """root_pid and all of its descendant processes (Linux /proc)"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # Field 4 is the parent pid; the command name may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS of one process in kB (PSS splits shared pages fairly)"""
+    usage = {'rss': 0, 'pss': 0}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    usage[key.lower()] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+def process_tree_memory_mb(root_pid: int) -> Dict[str, float]:
+    pids = _descendants(root_pid)
+    totals = {'rss': 0, 'pss': 0}
+    for pid in pids:
+        usage = _memory_kb(pid)
+        totals['rss'] += usage['rss']
+        totals['pss'] += usage['pss']
+    return {
+        'processes': len(pids),
+        'rss_mb': totals['rss'] / 1024,
+        'pss_mb': totals['pss'] / 1024,
+    }
+
+
+# ==================== MULTI-WORKER STARTUP ====================
+
+def _launch_and_wait(command: List[str], workers: int, timeout: float) -> Dict:
+    """Start a server, wait until every worker completed startup, then measure it"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=ML_ENGINE_DIR,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+
+    ready = threading.Event()
+    started = [0]
+
+    def watch_output():
+        for line in process.stdout:
+            if 'Application startup complete' in line:
+                started[0] += 1
+                if started[0] >= workers:
+                    ready.set()
+
+    threading.Thread(target=watch_output, daemon=True).start()
+    try:
+        if not ready.wait(timeout):
+            raise RuntimeError(f"Only {started[0]}/{workers} workers started within {timeout}s")
+        startup_seconds = time.perf_counter() - start
+        time.sleep(1.0)  # let lazily-touched pages settle
+        memory = process_tree_memory_mb(process.pid)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    return {'startup_s': startup_seconds, **memory}
+
+
+def bench_workers(counts: List[int], port: int = 8765, timeout: float = 600.0):
+    """Startup time and total memory: per-worker engines vs. the preloading launcher"""
+    print_header("🏭 MULTI-WORKER STARTUP & MEMORY")
+
+    modes = {
+        'uvicorn --workers': lambda n: [
+            sys.executable, '-m', 'uvicorn', 'api:app',
+            '--port', str(port), '--workers', str(n), '--log-level', 'info'
+        ],
+        'serve.py (preload)': lambda n: [
+            sys.executable, 'serve.py', '--port', str(port), '--workers', str(n)
+        ],
+    }
+
+    print(f"\n{'MODE':<22} {'WORKERS':>8} {'STARTUP (s)':>12} {'PROCS':>6} {'RSS (MB)':>10} {'PSS (MB)':>10}")
+    print("-" * 74)
+    for workers in counts:
+        for mode, command in modes.items():
+            result = _launch_and_wait(command(workers), workers, timeout)
+            print(f"{mode:<22} {workers:>8} {result['startup_s']:>12.2f} {result['processes']:>6} "
+                  f"{result['rss_mb']:>10.1f} {result['pss_mb']:>10.1f}")
+    print("\nRSS counts shared pages once per process; PSS splits them, so it is the real total.")
+
+
+# ==================== CONCURRENT RECOMMENDATIONS ====================
+
+SAMPLE_PROFILE = {
+    'car_brand': 'Toyota',
+    'car_model': 'Camry',
+    'budget_min': 500,
+    'budget_max': 5000,
+    'quality_threshold': 0.3,
+    'sentiment_preference': 'any',
+    'emotion_preference': []
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _timed_request(url: str, body: bytes = None, headers: Dict = None) -> float:
+    """Milliseconds for one request (POST when a body is given)"""
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json', **(headers or {})})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def _start_server(port: int, env: Dict, timeout: float = 300.0) -> subprocess.Popen:
+    """Start one uvicorn process and return once the application is up"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port), '--log-level', 'info'],
+        cwd=ML_ENGINE_DIR, env={**os.environ, **env},
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    ready = threading.Event()
+
+    def watch_output():
+        for line in process.stdout:
+            # Logged once the socket is bound (after startup completes)
+            if 'Uvicorn running on' in line:
+                ready.set()
+
+    threading.Thread(target=watch_output, daemon=True).start()
+    if not ready.wait(timeout):
+        process.kill()
+        raise RuntimeError(f"Server did not start within {timeout}s")
+    return process
+
+
+def _stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def bench_concurrency(clients: int, requests_per_client: int, pool_sizes: List[int], port: int = 8766):
+    """Recommendation latency under concurrent load, and /health latency alongside it"""
+    print_header("🧵 CONCURRENT RECOMMENDATIONS")
+    base = f"http://127.0.0.1:{port}"
+    body = json.dumps(SAMPLE_PROFILE).encode()
+
+    print(f"\n{'POOL':>5} {'CLIENTS':>8} {'REQ/S':>8} {'REC p50':>9} {'REC p99':>9} "
+          f"{'HEALTH p50':>11} {'HEALTH p99':>11}   (ms)")
+    print("-" * 80)
+    for pool_size in pool_sizes:
+        process = _start_server(port, {'REC_POOL_SIZE': str(pool_size)})
+        try:
+            _timed_request(f"{base}/recommend", body)  # warm-up
+
+            health_latencies: List[float] = []
+            done = threading.Event()
+
+            def probe_health():
+                while not done.is_set():
+                    health_latencies.append(_timed_request(f"{base}/health"))
+                    time.sleep(0.02)
+
+            def client(_):
+                return [_timed_request(f"{base}/recommend", body) for _ in range(requests_per_client)]
+
+            prober = threading.Thread(target=probe_health, daemon=True)
+            prober.start()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                latencies = [ms for batch in pool.map(client, range(clients)) for ms in batch]
+            elapsed = time.perf_counter() - start
+            done.set()
+            prober.join()
+        finally:
+            _stop_server(process)
+
+        print(f"{pool_size:>5} {clients:>8} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} "
+              f"{percentile(health_latencies, 50):>11.1f} {percentile(health_latencies, 99):>11.1f}")
+    print("\n/health stays in the low milliseconds because recommendations run off the event loop.")
+
+
+# ==================== SQLITE THROUGHPUT ====================
+
+CART_READ_SQL = '''
+    SELECT c.cart_id, c.quantity, c.added_at, a.*
+    FROM cart_items c
+    JOIN accessories a ON c.accessory_id = a.accessory_id
+    WHERE c.user_id = ?
+    ORDER BY c.added_at DESC
+'''
+CART_WRITE_SQL = 'UPDATE cart_items SET quantity = quantity + 1 WHERE user_id = ? AND accessory_id = ?'
+
+
+def _seed_database(path: Path, users: int, items_per_cart: int, accessories: int = 1269):
+    """Full schema plus synthetic accessories, users and carts"""
+    from database import create_database
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_database(path)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        'INSERT INTO accessories (accessory_id, car_brand, car_model, accessory_name, price, description) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [(str(i), f'Brand{i % 20}', f'Model{i % 90}', f'Accessory {i}', 100.0 + i, 'x' * 400)
+         for i in range(accessories)]
+    )
+    conn.executemany(
+        'INSERT INTO users (user_id, email, password_hash) VALUES (?, ?, ?)',
+        [(u, f'user{u}@example.com', '-') for u in range(1, users + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO cart_items (user_id, accessory_id, quantity) VALUES (?, ?, 1)',
+        [(u, str((u * 31 + k) % accessories)) for u in range(1, users + 1) for k in range(items_per_cart)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _run_db_workload(connect, release, readers: int, writers: int, seconds: float,
+                     users: int, items_per_cart: int) -> Dict:
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(write: bool):
+        rng = random.Random()
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            user_id = rng.randint(1, users)
+            conn = connect()
+            try:
+                if write:
+                    accessory_id = str((user_id * 31 + rng.randrange(items_per_cart)) % 1269)
+                    conn.execute(CART_WRITE_SQL, (user_id, accessory_id))
+                    conn.commit()
+                else:
+                    conn.execute(CART_READ_SQL, (user_id,)).fetchall()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            finally:
+                release(conn)
+        with lock:
+            counts['writes' if write else 'reads'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=(False,)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(True,)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def bench_db(readers: int, writers: int, seconds: float, users: int = 200, items_per_cart: int = 10):
+    """Cart read/write throughput: connect-per-query vs. the tuned connection pool"""
+    from db_pool import ConnectionPool
+
+    print_header("🗄️ SQLITE READ/WRITE THROUGHPUT")
+    print(f"\n{readers} reader + {writers} writer threads for {seconds:.0f}s per mode, "
+          f"{users} users x {items_per_cart} cart items")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = Path(tmp) / 'before.db'
+        after_path = Path(tmp) / 'after.db'
+        for path in (before_path, after_path):
+            _seed_database(path, users, items_per_cart)
+        # Recreate the old setup: default rollback journal, per-query connections
+        conn = sqlite3.connect(before_path)
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.close()
+
+        pool = ConnectionPool(after_path)
+        modes = {
+            'connect per query': (lambda: sqlite3.connect(before_path), lambda conn: conn.close()),
+            'pooled + WAL': (pool.acquire, pool.release),
+        }
+
+        print(f"\n{'MODE':<20} {'READS/S':>10} {'WRITES/S':>10} {'LOCK ERRORS':>12}")
+        print("-" * 56)
+        for mode, (connect, release) in modes.items():
+            counts = _run_db_workload(connect, release, readers, writers, seconds, users, items_per_cart)
+            print(f"{mode:<20} {counts['reads'] / seconds:>10.0f} {counts['writes'] / seconds:>10.0f} "
+                  f"{counts['errors']:>12}")
+        pool.close_all()
+
+
+# ==================== CART PROJECTIONS ====================
+
+def bench_cart_projection(items: int, other_users: int, repeats: int):
+    """One cart read: every accessory column vs. the list columns, old vs. covering index"""
+    from database import LIST_INDEXES, read_accessories_csv
+    from db_helpers import CartDB
+
+    print_header("🛒 CART LIST PROJECTION")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        _seed_database(db_path, users=other_users + 1, items_per_cart=0, accessories=0)
+        catalog = read_accessories_csv()
+        conn = sqlite3.connect(db_path)
+        catalog.to_sql('accessories', conn, if_exists='append', index=False)
+        ids = catalog['accessory_id'].astype(str).tolist()
+
+        # Other carts are filled in the same round-robin order, so the measured
+        # cart's rows are spread over the table as they would be in production
+        conn.executemany(
+            'INSERT INTO cart_items (user_id, accessory_id, quantity, added_at) VALUES (?, ?, 1, ?)',
+            [(u, ids[(u * 31 + k) % len(ids)], f'2025-01-01 00:{k // 60:02d}:{k % 60:02d}')
+             for k in range(items) for u in range(1, other_users + 2)]
+        )
+        conn.commit()
+        conn.row_factory = sqlite3.Row
+
+        setups = {
+            'user_id index': ['DROP INDEX IF EXISTS idx_cart_user_added',
+                              'CREATE INDEX idx_cart_user ON cart_items(user_id)'],
+            'covering index': ['DROP INDEX IF EXISTS idx_cart_user',
+                               f"CREATE INDEX idx_cart_user_added ON {LIST_INDEXES['idx_cart_user_added']}"],
+        }
+
+        print(f"\n{items}-item cart, {other_users} other carts of the same size, "
+              f"{repeats} reads per mode (query + dict conversion, then json.dumps)")
+        print(f"\n{'COLUMNS':<10} {'INDEX':<16} {'QUERY ms':>9} {'p99 ms':>8} {'JSON ms':>8} {'BYTES':>10}")
+        print("-" * 66)
+        for index_name, statements in setups.items():
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute('ANALYZE')
+            for columns, detail in (('a.*', True), ('list', False)):
+                query_ms, json_ms = [], []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    summary = CartDB._summarize(CartDB._fetch_items(conn.cursor(), 1, detail))
+                    middle = time.perf_counter()
+                    body = json.dumps(summary, default=str)
+                    query_ms.append((middle - start) * 1000)
+                    json_ms.append((time.perf_counter() - middle) * 1000)
+                assert summary['count'] == items
+                print(f"{columns:<10} {index_name:<16} {sum(query_ms) / repeats:>9.3f} "
+                      f"{percentile(query_ms, 99):>8.3f} {sum(json_ms) / repeats:>8.3f} {len(body):>10,}")
+        conn.close()
+
+
+# ==================== CART WRITE THROUGHPUT ====================
+
+def _transaction_per_call(pool, operation, *args):
+    """The previous write path: borrow a connection, run, commit"""
+    conn = pool.acquire()
+    conn.row_factory = sqlite3.Row
+    try:
+        result = operation(conn.cursor(), *args)
+        conn.commit()
+        return result
+    finally:
+        pool.release(conn)
+
+
+def bench_writes(clients: int, seconds: float, users: int = 200):
+    """Sustained cart writes/s from concurrent async callers: per-call transactions vs. group commit"""
+    import asyncio
+    from db_helpers import CartDB
+    from db_pool import ConnectionPool
+    from engine_executor import BoundedEngineExecutor
+    from write_coordinator import WriteCoordinator
+
+    print_header("✍️ CART WRITE THROUGHPUT")
+    add = CartDB.add_to_cart.operation
+
+    async def drive(write) -> Dict:
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + seconds
+
+        async def client(n: int):
+            nonlocal errors
+            rng = random.Random(n)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    result = await write(rng.randint(1, users), str(rng.randrange(1269)))
+                    if not result['success']:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*(client(n) for n in range(clients)))
+        return {'latencies': latencies, 'errors': errors}
+
+    print(f"\n{clients} concurrent async callers adding to {users} carts for {seconds:.0f}s per mode")
+    print(f"\n{'MODE':<32} {'WRITES/S':>9} {'ERRORS':>7} {'p50 ms':>8} {'p99 ms':>8} {'BATCH':>6}")
+    print("-" * 76)
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('transaction per call (8 threads)', 'group commit (1 writer)'):
+            db_path = Path(tmp) / f'{len(mode)}.db'
+            _seed_database(db_path, users=users, items_per_cart=0)
+            if mode.startswith('transaction'):
+                pool, executor = ConnectionPool(db_path), BoundedEngineExecutor(8, 100000, name="bench")
+                result = asyncio.run(drive(lambda *args: executor.run(_transaction_per_call, pool, add, *args)))
+                executor.shutdown()
+                pool.close_all()
+                batch = 1.0
+            else:
+                coordinator = WriteCoordinator(db_path)
+                result = asyncio.run(drive(lambda *args: coordinator.submit(add, *args)))
+                coordinator.shutdown()
+                batch = coordinator.stats()['mean_batch']
+            samples = result['latencies']
+            print(f"{mode:<32} {len(samples) / seconds:>9.0f} {result['errors']:>7} "
+                  f"{percentile(samples, 50):>8.2f} {percentile(samples, 99):>8.2f} {batch:>6.1f}")
+
+
+# ==================== ORDER HISTORY ====================
+
+def _orders_n_plus_one(conn: sqlite3.Connection, user_id: int) -> List[Dict]:
+    """The old OrderDB.get_user_orders: every order, then one items query per order"""
+    orders = [dict(row) for row in conn.execute(
+        'SELECT * FROM orders WHERE user_id = ? ORDER BY order_date DESC', (user_id,))]
+    for order in orders:
+        order['items'] = [dict(row) for row in conn.execute(
+            'SELECT * FROM order_items WHERE order_id = ?', (order['order_id'],))]
+    return orders
+
+
+def bench_orders(orders: int, items_per_order: int, other_users: int, repeats: int):
+    """Order history latency: N+1 full history vs. keyset pages"""
+    from db_helpers import OrderDB
+
+    print_header("📦 ORDER HISTORY")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        _seed_database(db_path, users=other_users + 1, items_per_cart=0)
+        conn = sqlite3.connect(db_path)
+        # Users place orders in turn, so one user's history is spread over the table
+        conn.executemany(
+            'INSERT INTO orders (order_number, user_id, total_amount, full_name, email, phone, '
+            'address, city, state, pincode, payment_method, order_date) '
+            "VALUES (?, ?, 1000.0, 'Bench', 'b@example.com', '0', 'x', 'c', 's', '1', 'cod', ?)",
+            [(f'ORD-{n}-{u}', u, f'2024-01-01 {n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}')
+             for n in range(orders) for u in range(1, other_users + 2)]
+        )
+        conn.execute(
+            'INSERT INTO order_items (order_id, accessory_id, accessory_name, quantity, price) '
+            'SELECT o.order_id, a.accessory_id, a.accessory_name, 1, a.price '
+            'FROM orders o JOIN accessories a ON CAST(a.accessory_id AS INTEGER) < ?',
+            (items_per_order,)
+        )
+        conn.commit()
+        conn.execute('ANALYZE')
+        conn.row_factory = sqlite3.Row
+
+        def all_pages(page_size: int = 100):
+            fetched, after = [], None
+            while True:
+                page = OrderDB._fetch_page(conn.cursor(), 1, page_size, after)
+                fetched.extend(page['orders'])
+                after = page['next_cursor']
+                if after is None:
+                    return fetched
+
+        # Cursor to the middle of the history
+        middle = None
+        for _ in range(orders // 40):
+            middle = OrderDB._fetch_page(conn.cursor(), 1, 20, middle)['next_cursor']
+
+        modes = {
+            # mode: (fetch, queries per fetch)
+            'N+1, full history': (lambda: _orders_n_plus_one(conn, 1), orders + 1),
+            'keyset, all pages of 100': (all_pages, 2 * -(-orders // 100)),
+            'keyset, first page of 20': (lambda: OrderDB._fetch_page(conn.cursor(), 1, 20)['orders'], 2),
+            'keyset, middle page of 20': (
+                lambda: OrderDB._fetch_page(conn.cursor(), 1, 20, middle)['orders'], 2),
+        }
+
+        print(f"\nOne user with {orders} orders x {items_per_order} items, {other_users} other users "
+              f"with the same, {repeats} reads per mode")
+        print(f"\n{'MODE':<28} {'ORDERS':>7} {'QUERIES':>8} {'MEAN ms':>9} {'p99 ms':>8} {'JSON BYTES':>12}")
+        print("-" * 78)
+        for mode, (fetch, queries) in modes.items():
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                result = fetch()
+                samples.append((time.perf_counter() - start) * 1000)
+            print(f"{mode:<28} {len(result):>7} {queries:>8} {sum(samples) / repeats:>9.2f} "
+                  f"{percentile(samples, 99):>8.2f} {len(json.dumps(result, default=str)):>12,}")
+        conn.close()
+
+
+# ==================== CHECKOUT STRESS ====================
+
+BENCH_DELIVERY = {
+    'full_name': 'Bench User', 'email': 'bench@example.com', 'phone': '0000000000',
+    'address': '1 Bench Road', 'city': 'Pune', 'state': 'MH', 'pincode': '411001'
+}
+
+
+def _checkout_worker(first_user: int, customers: int, orders_per_customer: int,
+                     items_per_order: int, legacy_numbers: bool) -> Dict[str, int]:
+    """One API worker's worth of concurrent checkouts (runs in a spawned process)"""
+    import db_helpers
+    from db_helpers import OrderDB
+
+    if legacy_numbers:
+        # The previous scheme: one order number per wall-clock second
+        db_helpers.order_numbers.next = lambda: f"ORD-{int(time.time())}"
+
+    items = [{'accessory_id': str(i), 'accessory_name': f'Accessory {i}', 'quantity': 1, 'price': 100.0 + i}
+             for i in range(items_per_order)]
+    total = sum(item['price'] for item in items)
+    counts = {'created': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def customer(user_id: int):
+        for _ in range(orders_per_customer):
+            result = OrderDB.create_order(user_id, items, total, 0, BENCH_DELIVERY, 'cod')
+            with lock:
+                counts['created' if result['success'] else 'failed'] += 1
+
+    threads = [threading.Thread(target=customer, args=(first_user + n,)) for n in range(customers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def bench_checkout(workers: int, customers: int, orders_per_customer: int, items_per_order: int):
+    """Concurrent checkouts from several processes: failures and throughput by numbering scheme"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    print_header("🧾 CHECKOUT STRESS")
+    users = workers * customers
+    expected = users * orders_per_customer
+    print(f"\n{workers} worker processes x {customers} concurrent customers x {orders_per_customer} orders "
+          f"= {expected} orders of {items_per_order} items")
+    print(f"\n{'ORDER NUMBERS':<26} {'CREATED':>8} {'FAILED':>8} {'UNIQUE':>8} {'ORDERS/S':>10}")
+    print("-" * 64)
+
+    for label, legacy in (('ORD-<unix seconds> (old)', True), ('time + sequence + pid', False)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / 'bench.db'
+            _seed_database(db_path, users=users, items_per_cart=0)
+            # Spawned workers bind db_helpers to this path on import
+            os.environ['VEHICLE_DB_PATH'] = str(db_path)
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                start = time.perf_counter()
+                futures = [pool.submit(_checkout_worker, 1 + w * customers, customers, orders_per_customer,
+                                       items_per_order, legacy) for w in range(workers)]
+                results = [future.result() for future in futures]
+                elapsed = time.perf_counter() - start
+
+            conn = sqlite3.connect(db_path)
+            unique = conn.execute('SELECT COUNT(DISTINCT order_number) FROM orders').fetchone()[0]
+            item_rows = conn.execute('SELECT COUNT(*) FROM order_items').fetchone()[0]
+            conn.close()
+            created = sum(r['created'] for r in results)
+            failed = sum(r['failed'] for r in results)
+            assert item_rows == created * items_per_order
+            print(f"{label:<26} {created:>8} {failed:>8} {unique:>8} {created / elapsed:>10.0f}")
+
+
+# ==================== FULL-TEXT SEARCH ====================
+
+SEARCH_VOCABULARY = (
+    'seat cover floor mat led light bulb horn mirror spoiler wiper blade charger mount holder '
+    'camera sensor alarm steering wheel grip cushion pillow organizer dashboard perfume vacuum '
+    'cleaner polish wax shampoo tyre inflator pump jump starter cable socket fog lamp projector '
+    'chrome garnish bumper guard door visor sunshade curtain cover body waterproof leather fabric '
+    'premium universal heavy duty compact wireless portable stainless steel rubber carbon fibre '
+    'black beige grey red blue easy install durable stylish comfortable value quality'
+).split()
+
+
+# Made-up words for the long tail of rare terms (model codes, brand names...)
+_tail = random.Random(0)
+SEARCH_TAIL = [''.join(_tail.choice('bcdfgklmnprstvz') + _tail.choice('aeiou') for _ in range(3))
+               for _ in range(20000)]
+# Zipf-like: a few words are in most listings, most words in very few
+_SEARCH_CUM_WEIGHTS = list(itertools.accumulate(
+    1 / (rank + 1) for rank in range(len(SEARCH_VOCABULARY) + len(SEARCH_TAIL))))
+
+
+def _synthetic_text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choices(SEARCH_VOCABULARY + SEARCH_TAIL, cum_weights=_SEARCH_CUM_WEIGHTS, k=words))
+
+
+def bench_search(rows: int, repeats: int):
+    """Search latency at catalog scale: LIKE scan vs. the FTS5 index, with filters and deep pages"""
+    from database import SEARCH_TRIGGERS, create_search_index
+    from db_helpers import AccessoryDB
+
+    print_header("🔎 FULL-TEXT SEARCH")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        _seed_database(db_path, users=0, items_per_cart=0, accessories=0)
+        conn = sqlite3.connect(db_path)
+        rng = random.Random(7)
+
+        # Bulk load: insert without the sync triggers, then index everything in one rebuild
+        for trigger in SEARCH_TRIGGERS:
+            conn.execute(f'DROP TRIGGER {trigger}')
+        start = time.perf_counter()
+        chunk = 50_000
+        for first in range(0, rows, chunk):
+            conn.executemany(
+                'INSERT INTO accessories (accessory_id, car_brand, car_model, accessory_name, price, '
+                'description, category, reviews) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(str(i), f'Brand{i % 20}', f'Model{i % 90}', _synthetic_text(rng, 5), 100.0 + i % 5000,
+                  _synthetic_text(rng, 25), rng.choice(SEARCH_VOCABULARY[:12]), _synthetic_text(rng, 40))
+                 for i in range(first, min(first + chunk, rows))]
+            )
+            conn.commit()
+        load_seconds = time.perf_counter() - start
+        create_search_index(conn.cursor())
+        conn.commit()
+        index_seconds = time.perf_counter() - start - load_seconds
+        conn.execute('ANALYZE')
+        conn.row_factory = sqlite3.Row
+        db_mb = db_path.stat().st_size / 1e6
+        print(f"\n{rows:,} accessories loaded in {load_seconds:.1f}s, search index built in "
+              f"{index_seconds:.1f}s ({rows / index_seconds:,.0f} rows/s), database {db_mb:,.0f} MB")
+
+        def like_scan(term: str):
+            pattern = f'%{term}%'
+            return conn.execute(
+                'SELECT accessory_id FROM accessories WHERE accessory_name LIKE ? OR description LIKE ? '
+                'OR category LIKE ? OR reviews LIKE ?', (pattern,) * 4).fetchall()
+
+        def page(query: str, filters: Dict = None, after: str = None):
+            filters = {'brand': None, 'model': None, 'category': None, 'min_price': None,
+                       'max_price': None, 'sentiment': None, **(filters or {})}
+            return AccessoryDB._search_page(conn.cursor(), query, filters, 20, after)
+
+        def nth_page(query: str, n: int):
+            after = None
+            for _ in range(n - 1):
+                after = page(query, after=after)['next_cursor']
+            return after
+
+        rare, uncommon, common = SEARCH_TAIL[2000], 'portable', 'wiper'
+        deep = nth_page(f'{common} {uncommon}', 10)
+        modes = {
+            # mode: fetch
+            f'LIKE scan "{rare}" (all matches, unranked)': lambda: like_scan(rare),
+            f'FTS "{rare}"': lambda: page(rare)['results'],
+            f'FTS "{uncommon}"': lambda: page(uncommon)['results'],
+            f'FTS "{common}"': lambda: page(common)['results'],
+            f'FTS "{common} {uncommon}"': lambda: page(f'{common} {uncommon}')['results'],
+            f'FTS "{common} {uncommon}" page 10': lambda: page(f'{common} {uncommon}', after=deep)['results'],
+            f'FTS "{uncommon}" + brand/price': lambda: page(
+                uncommon, {'brand': 'Brand3', 'max_price': 2500})['results'],
+        }
+
+        print(f"\n{repeats} searches per mode, 20 results per page")
+        print(f"\n{'MODE':<46} {'MATCHES':>9} {'MEAN ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        print("-" * 84)
+        for mode, fetch in modes.items():
+            term = mode.split('"')[1]
+            matches = conn.execute('SELECT COUNT(*) FROM accessories_fts WHERE accessories_fts MATCH ?',
+                                   (' '.join(f'"{word}"' for word in term.split()),)).fetchone()[0]
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fetch()
+                samples.append((time.perf_counter() - start) * 1000)
+            print(f"{mode:<46} {matches:>9,} {sum(samples) / repeats:>9.2f} "
+                  f"{percentile(samples, 50):>8.2f} {percentile(samples, 99):>8.2f}")
+        conn.close()
+
+
+# ==================== CATALOG LOAD ====================
+
+def _catalog_load_worker(loader: str, csv_path: Path, db_path: Path, chunk_rows: int) -> Tuple[float, float]:
+    """One catalog import in a fresh (spawned) process: (seconds, peak RSS MB)"""
+    import resource
+    from database import create_search_index, load_accessories_from_csv, read_accessories_csv
+
+    start = time.perf_counter()
+    if loader == 'to_sql':
+        # The previous loader: whole CSV in memory, table replaced, search index rebuilt
+        conn = sqlite3.connect(db_path)
+        read_accessories_csv(csv_path).to_sql('accessories', conn, if_exists='replace', index=False)
+        create_search_index(conn.cursor())
+        conn.commit()
+        conn.close()
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert load_accessories_from_csv(csv_path, db_path, chunk_rows)
+    seconds = time.perf_counter() - start
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_catalog_load(rows: int, chunk_rows: int):
+    """Catalog CSV import: pandas to_sql(replace) vs. the chunked transactional loader"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import pandas as pd
+    from database import ACCESSORIES_CSV
+
+    print_header("📥 CATALOG LOAD")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The real catalog repeated under new IDs up to the requested size
+        source = pd.read_csv(ACCESSORIES_CSV)
+        copies = -(-rows // len(source))
+        catalog = pd.concat([source] * copies, ignore_index=True).head(rows)
+        catalog['Accessory_ID'] = range(1, len(catalog) + 1)
+        csv_path = Path(tmp) / 'catalog.csv'
+        catalog.to_csv(csv_path, index=False)
+        csv_mb = csv_path.stat().st_size / 1e6
+        del source, catalog
+
+        def schema(conn) -> str:
+            primary_key = any(column[5] for column in conn.execute('PRAGMA table_info(accessories)'))
+            indexes = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = 'accessories' "
+                "AND name NOT LIKE 'sqlite_autoindex%'").fetchone()[0]
+            triggers = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'accessories'"
+            ).fetchone()[0]
+            return f"pk={'yes' if primary_key else 'no'} idx={indexes} trg={triggers}"
+
+        def load(loader: str, db_path: Path) -> Tuple[float, float]:
+            # A fresh process per load, so peak RSS belongs to that load alone
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                return pool.submit(_catalog_load_worker, loader, csv_path, db_path, chunk_rows).result()
+
+        print(f"\n{rows:,} rows, {csv_mb:,.0f} MB CSV, chunks of {chunk_rows:,} rows; "
+              f"the search index is rebuilt in every mode")
+        print(f"\n{'LOADER':<36} {'SECONDS':>8} {'ROWS/S':>10} {'PEAK RSS MB':>12} {'SCHEMA AFTER':>24}")
+        print("-" * 95)
+        for label, loader, reload in (('to_sql(replace) (old)', 'to_sql', False),
+                                      ('chunked upsert, empty table', 'chunked', False),
+                                      ('chunked upsert, reload over itself', 'chunked', True)):
+            db_path = Path(tmp) / f'{loader}.db'
+            if not db_path.exists():
+                _seed_database(db_path, users=0, items_per_cart=0, accessories=0)
+            if reload:
+                load(loader, db_path)
+            seconds, peak_mb = load(loader, db_path)
+            conn = sqlite3.connect(db_path)
+            count = conn.execute('SELECT COUNT(*) FROM accessories').fetchone()[0]
+            assert count == rows, count
+            print(f"{label:<36} {seconds:>8.2f} {count / seconds:>10,.0f} {peak_mb:>12,.0f} {schema(conn):>24}")
+            conn.close()
+
+
+# ==================== RESPONSE SERIALIZATION ====================
+
+def _per_row_response(api, recommendations, scores, user_profile) -> bytes:
+    """The previous path: iterrows, one Pydantic model per row, re-validated and re-encoded by FastAPI"""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    flags, notes = api._cross_compatibility(recommendations, user_profile)
+    recs_list = []
+    for (_, row), flag, note in zip(recommendations.iterrows(), flags, notes):
+        recs_list.append(api.AccessoryRecommendation(
+            accessory_id=str(row['Accessory_ID']),
+            accessory_name=str(row['Accessory Name']),
+            car_brand=str(row['Car Brand']),
+            car_model=str(row['Car Model']),
+            price=float(row['Accessory Price']),
+            description=str(row['Accessory Description']),
+            sentiment_score=float(row['Sentiment_Score']),
+            sentiment_label=str(row['Sentiment_Label']),
+            quality_score=float(row['Overall_Quality_Score']),
+            dominant_emotion=str(row['Dominant_Emotion']),
+            final_score=float(row['final_score']),
+            explanation=str(row['explanation']),
+            compatible_cars=str(row['Compatible Cars']),
+            is_cross_compatible=flag,
+            compatibility_note=note,
+            top_reviews=str(row.get('Top 5 Reviews', '')),
+            key_strengths=str(row.get('Key_Strengths', 'N/A')),
+            key_weaknesses=str(row.get('Key_Weaknesses', 'N/A'))
+        ))
+    response = api.RecommendationResponse(
+        success=True, count=len(recs_list), recommendations=recs_list, score_breakdown=scores
+    )
+    # response_model: validate the returned model again, then encode
+    validated = api.RecommendationResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def _columnar_response(api, recommendations, scores, user_profile) -> bytes:
+    """The current path: column-wise records encoded by orjson"""
+    from recommendation_serializer import json_response, recommendation_records
+
+    flags, notes = api._cross_compatibility(recommendations, user_profile)
+    return json_response({
+        "success": True,
+        "count": len(recommendations),
+        "recommendations": recommendation_records(recommendations, flags, notes),
+        "score_breakdown": scores
+    }).body
+
+
+def bench_serialize(top_k: int, repeats: int):
+    """Time to turn one /recommend result into response bytes"""
+    os.environ.setdefault('CATALOG_SOURCE', 'csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import api
+        api.rec_engine = api.create_engine()
+        user_profile = {
+            'car_brand': 'Maruti Suzuki', 'car_model': 'Swift', 'budget_min': 100, 'budget_max': 20000,
+            'quality_threshold': -1, 'sentiment_preference': 'any',
+        }
+        recommendations, scores = api.rec_engine.get_recommendations(user_profile, top_k=top_k)
+
+    print_header("📦 RECOMMENDATION SERIALIZATION")
+    print(f"\n{len(recommendations)} recommendations, {repeats} encodes per mode")
+    print(f"\n{'PATH':<22} {'BREAKDOWN':<10} {'MEAN ms':>8} {'p99 ms':>8} {'BYTES':>9}")
+    print("-" * 61)
+    paths = {
+        'per-row models': lambda breakdown: _per_row_response(api, recommendations, breakdown, user_profile),
+        'columnar + orjson': lambda breakdown: _columnar_response(api, recommendations, breakdown, user_profile),
+    }
+    for name, encode in paths.items():
+        for breakdown in (scores, None):
+            encode(breakdown)  # warm up
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                body = encode(breakdown)
+                samples.append((time.perf_counter() - start) * 1000)
+            print(f"{name:<22} {'yes' if breakdown else 'no':<10} {sum(samples) / repeats:>8.3f} "
+                  f"{percentile(samples, 99):>8.3f} {len(body):>9,}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine_ms = {}
+        for include_scores in (True, False):
+            start = time.perf_counter()
+            for _ in range(20):
+                api.rec_engine.get_recommendations(user_profile, top_k=top_k, include_scores=include_scores)
+            engine_ms[include_scores] = (time.perf_counter() - start) / 20 * 1000
+    print(f"\nEngine time per request: {engine_ms[True]:.2f} ms with score breakdown, "
+          f"{engine_ms[False]:.2f} ms without")
+
+
+def _first_byte(url: str, body: bytes = None, headers: Dict = None) -> Tuple[float, float, int, int]:
+    """(time to first byte ms, total ms, body bytes, status) of one request"""
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json', **(headers or {})})
+    start = time.perf_counter()
+    try:
+        response = urllib.request.urlopen(request, timeout=120)
+    except urllib.error.HTTPError as e:
+        response = e  # 304 Not Modified
+    with response:
+        first = response.read(1)
+        ttfb = (time.perf_counter() - start) * 1000
+        size = len(first) + len(response.read())
+    return ttfb, (time.perf_counter() - start) * 1000, size, response.status
+
+
+def bench_card_view(requests: int, port: int = 8769):
+    """Response size and time to first byte: full items vs. view=card, and /accessories/{id}"""
+    print_header("🃏 CARD VIEW vs. FULL ITEMS")
+    base = f"http://127.0.0.1:{port}"
+    body = json.dumps(SAMPLE_PROFILE).encode()
+    endpoints = [
+        ('/recommend?top_k=50', 'flat top_k=50'),
+        ('/recommend/sectioned?exact_match_count=6&compatible_count=6', 'sectioned 6+6'),
+        ('/recommend/sectioned?exact_match_count=20&compatible_count=20', 'sectioned 20+20'),
+    ]
+
+    process = _start_server(port, {'CATALOG_SOURCE': 'csv'})
+    try:
+        _first_byte(f"{base}/recommend", body)  # warm-up
+
+        print(f"\n{requests} requests per row\n")
+        print(f"{'REQUEST':<18} {'VIEW':<6} {'BYTES':>8} {'TTFB p50':>9} {'TTFB p99':>9} {'TOTAL p50':>10}   (ms)")
+        print("-" * 70)
+        for path, label in endpoints:
+            for view in ('full', 'card'):
+                url = f"{base}{path}&view={view}"
+                samples = [_first_byte(url, body) for _ in range(requests)]
+                ttfb = [sample[0] for sample in samples]
+                total = [sample[1] for sample in samples]
+                print(f"{label:<18} {view:<6} {samples[0][2]:>8,} {percentile(ttfb, 50):>9.2f} "
+                      f"{percentile(ttfb, 99):>9.2f} {percentile(total, 50):>10.2f}")
+
+        # Details of one recommended accessory: first load, then revalidation
+        with urllib.request.urlopen(urllib.request.Request(
+                f"{base}/recommend?top_k=1&view=card", data=body,
+                headers={'Content-Type': 'application/json'})) as response:
+            accessory_id = json.loads(response.read())['recommendations'][0]['accessory_id']
+        url = f"{base}/accessories/{accessory_id}"
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers['ETag']
+        print(f"\n{'DETAILS':<25} {'STATUS':>6} {'BYTES':>8} {'TTFB p50':>9} {'TTFB p99':>9}   (ms)")
+        print("-" * 64)
+        for label, headers in (('GET /accessories/{id}', None), ('  with If-None-Match', {'If-None-Match': etag})):
+            samples = [_first_byte(url, headers=headers) for _ in range(requests * 4)]
+            ttfb = [sample[0] for sample in samples]
+            print(f"{label:<25} {samples[0][3]:>6} {samples[0][2]:>8,} "
+                  f"{percentile(ttfb, 50):>9.2f} {percentile(ttfb, 99):>9.2f}")
+    finally:
+        _stop_server(process)
+
+
+# ==================== STREAMED EXPORTS ====================
+
+def _drain_stream(api, batches, user_profile, fields) -> Tuple[float, float, int, int]:
+    """(first chunk ms, total ms, items, bytes) of reading a ranked stream to the end"""
+    start = time.perf_counter()
+    first_ms, sent, size = None, 0, 0
+    while True:
+        lines, count = api._stream_chunk(batches, user_profile, fields, None, sent + 1)
+        if not count:
+            break
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start) * 1000
+        sent += count
+        size += len(lines)
+    return first_ms or 0.0, (time.perf_counter() - start) * 1000, sent, size
+
+
+def bench_stream(rows: int, limits: List[int], repeats: int):
+    """/recommend/stream: time to first item and peak memory vs. building the whole export at once"""
+    import tracemalloc
+    import pandas as pd
+    from catalog_snapshot import tfidf_documents
+    from recommendation_serializer import RECOMMENDATION_FIELDS
+
+    os.environ.setdefault('CATALOG_SOURCE', 'csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import api
+        api.rec_engine = engine = api.create_engine()
+        # The real catalog repeated under new IDs and names (so deduplication keeps the copies)
+        source = engine.df
+        copies = -(-rows // len(source))
+        catalog = pd.concat([source] * copies, ignore_index=True).head(rows)
+        copy = (catalog.index // len(source)).astype(str)
+        catalog['Accessory_ID'] = range(1, len(catalog) + 1)
+        catalog['Accessory_Name_Normalized'] = catalog['Accessory_Name_Normalized'].astype(str) + ' #' + copy
+        vectorizer = engine.tfidf_vectorizer
+        engine._publish(catalog, vectorizer, vectorizer.transform(tfidf_documents(catalog)), source='bench')
+    user_profile = {
+        **SAMPLE_PROFILE, 'budget_min': 0, 'budget_max': 1_000_000,
+        'quality_threshold': -1, 'emotion_preference': [],
+    }
+    fields = tuple(RECOMMENDATION_FIELDS)
+
+    def batches(limit: int, streamed: bool):
+        if streamed:
+            return engine.iter_recommendations(user_profile, limit)
+        # One batch holding every item: what a materialized response has to build
+        return engine.iter_recommendations(user_profile, limit, first_batch=limit, batch_size=limit)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        candidates = len(engine._apply_hard_filters(user_profile, engine.snapshot))
+
+    print_header("🌊 STREAMED RECOMMENDATION EXPORT")
+    print(f"\n{len(catalog):,} catalog rows, {candidates:,} candidates for "
+          f"{user_profile['car_brand']}; best of {repeats} runs\n")
+    print(f"{'LIMIT':>6} {'MODE':<13} {'ITEMS':>6} {'FIRST ms':>9} {'TOTAL ms':>9} {'PEAK MB':>8} {'BYTES':>11}")
+    print("-" * 68)
+    for limit in limits:
+        for streamed in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):
+                runs = [_drain_stream(api, batches(limit, streamed), user_profile, fields) for _ in range(repeats)]
+                # Memory in a separate pass: tracemalloc slows allocation-heavy code
+                tracemalloc.start()
+                _drain_stream(api, batches(limit, streamed), user_profile, fields)
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+            first_ms = min(run[0] for run in runs)
+            total_ms = min(run[1] for run in runs)
+            print(f"{limit:>6} {'streamed' if streamed else 'materialized':<13} {runs[0][2]:>6} "
+                  f"{first_ms:>9.1f} {total_ms:>9.1f} {peak:>8.1f} {runs[0][3]:>11,}")
+
+
+# ==================== MIXED API LOAD ====================
+
+def _signup(base: str, email: str) -> str:
+    body = json.dumps({'email': email, 'password': 'BenchPass123', 'full_name': 'Bench'}).encode()
+    request = urllib.request.Request(f"{base}/auth/signup", data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())['token']
+
+
+def bench_mixed(rec_clients: int, cart_clients: int, seconds: float, users: int = 20, port: int = 8767):
+    """Recommendation + cart traffic together; /health latency shows event-loop stalls"""
+    print_header("🔀 MIXED RECOMMENDATION + CART LOAD")
+    base = f"http://127.0.0.1:{port}"
+    rec_body = json.dumps(SAMPLE_PROFILE).encode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        _seed_database(db_path, users=0, items_per_cart=0)
+        process = _start_server(port, {'VEHICLE_DB_PATH': str(db_path)})
+        try:
+            tokens = [_signup(base, f'bench{u}@example.com') for u in range(users)]
+            latencies: Dict[str, List[float]] = {'recommend': [], 'cart read': [], 'cart write': [], 'health': []}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+
+            def record(kind, ms):
+                with lock:
+                    latencies[kind].append(ms)
+
+            def rec_client():
+                while time.perf_counter() < deadline:
+                    record('recommend', _timed_request(f"{base}/recommend", rec_body))
+
+            def cart_client(n):
+                rng = random.Random(n)
+                headers = {'Authorization': f'Bearer {tokens[n % len(tokens)]}'}
+                while time.perf_counter() < deadline:
+                    if rng.random() < 0.3:
+                        body = json.dumps({'accessory_id': str(rng.randrange(1269)), 'quantity': 1}).encode()
+                        record('cart write', _timed_request(f"{base}/cart", body, headers))
+                    else:
+                        record('cart read', _timed_request(f"{base}/cart", headers=headers))
+
+            def probe_health():
+                while time.perf_counter() < deadline:
+                    record('health', _timed_request(f"{base}/health"))
+                    time.sleep(0.02)
+
+            threads = [threading.Thread(target=rec_client) for _ in range(rec_clients)]
+            threads += [threading.Thread(target=cart_client, args=(n,)) for n in range(cart_clients)]
+            threads.append(threading.Thread(target=probe_health))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            _stop_server(process)
+
+    print(f"\n{rec_clients} recommendation + {cart_clients} cart clients for {seconds:.0f}s")
+    print(f"\n{'REQUEST':<12} {'COUNT':>7} {'REQ/S':>8} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    print("-" * 52)
+    for kind, samples in latencies.items():
+        print(f"{kind:<12} {len(samples):>7} {len(samples) / seconds:>8.1f} "
+              f"{percentile(samples, 50):>10.1f} {percentile(samples, 99):>10.1f}")
+    print("\n/health does no I/O: its latency is how long requests wait for the event loop.")
+
+
+# ==================== SESSION VALIDATION ====================
+
+def bench_auth(sessions: int, checks: int):
+    """Auth checks per second: sessions-table lookup, in-memory cache, signed tokens"""
+    print_header("🔐 SESSION VALIDATION THROUGHPUT")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        _seed_database(db_path, users=sessions, items_per_cart=0)
+        # auth binds its database path at import time
+        os.environ['VEHICLE_DB_PATH'] = str(db_path)
+        from auth import SessionManager
+        from signed_tokens import SignedTokenManager
+
+        SessionManager.signer = None
+        SessionManager.init_schema()
+        db_tokens = [SessionManager.create_session(user_id) for user_id in range(1, sessions + 1)]
+
+        signer = SignedTokenManager({'bench': os.urandom(32)})
+        signer.revocations.init_schema()
+        signed = [signer.issue(user_id, 3600) for user_id in range(1, sessions + 1)]
+        for token in signed[::10]:
+            signer.revoke(token)  # a realistic revocation list
+
+        modes = {
+            'sessions table': lambda token: SessionManager.validate_session(token, check_cache=False),
+            'table + cache': SessionManager.validate_session,
+            'signed (HMAC)': signer.verify,
+        }
+        tokens = {'sessions table': db_tokens, 'table + cache': db_tokens, 'signed (HMAC)': signed}
+
+        print(f"\n{sessions} sessions, {checks} validations per mode (single thread)")
+        print(f"\n{'MODE':<18} {'CHECKS/S':>12} {'us/CHECK':>10}")
+        print("-" * 42)
+        for mode, validate in modes.items():
+            mode_tokens = tokens[mode]
+            start = time.perf_counter()
+            for i in range(checks):
+                validate(mode_tokens[i % sessions])
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<18} {checks / elapsed:>12.0f} {elapsed / checks * 1e6:>10.1f}")
+
+
+# ==================== LOGIN STORM ====================
+
+def _login_status(base: str, email: str) -> Tuple[int, float]:
+    """HTTP status and milliseconds of one login"""
+    body = json.dumps({'email': email, 'password': 'BenchPass123'}).encode()
+    request = urllib.request.Request(f"{base}/auth/login", data=body, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, (time.perf_counter() - start) * 1000
+
+
+def bench_login_storm(rec_clients: int, login_clients: int, seconds: float, users: int = 10, port: int = 8768):
+    """Recommendation latency alone, then during a burst of logins"""
+    print_header("🔑 RECOMMENDATIONS DURING A LOGIN STORM")
+    base = f"http://127.0.0.1:{port}"
+    rec_body = json.dumps(SAMPLE_PROFILE).encode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        _seed_database(db_path, users=0, items_per_cart=0)
+        process = _start_server(port, {'VEHICLE_DB_PATH': str(db_path)})
+        try:
+            emails = [f'storm{u}@example.com' for u in range(users)]
+            for email in emails:
+                _signup(base, email)
+
+            def run_phase(with_logins: bool) -> Dict[str, List]:
+                results = {'recommend': [], 'login': [], 'statuses': []}
+                lock = threading.Lock()
+                deadline = time.perf_counter() + seconds
+
+                def rec_client():
+                    while time.perf_counter() < deadline:
+                        ms = _timed_request(f"{base}/recommend", rec_body)
+                        with lock:
+                            results['recommend'].append(ms)
+
+                def login_client(n):
+                    while time.perf_counter() < deadline:
+                        status, ms = _login_status(base, emails[n % users])
+                        with lock:
+                            results['statuses'].append(status)
+                            if status == 200:
+                                results['login'].append(ms)
+                        if status == 429:
+                            time.sleep(0.05)
+
+                threads = [threading.Thread(target=rec_client) for _ in range(rec_clients)]
+                if with_logins:
+                    threads += [threading.Thread(target=login_client, args=(n,)) for n in range(login_clients)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                return results
+
+            quiet = run_phase(False)
+            storm = run_phase(True)
+        finally:
+            _stop_server(process)
+
+    print(f"\n{rec_clients} recommendation clients, {login_clients} login clients, {seconds:.0f}s per phase")
+    print(f"\n{'PHASE':<14} {'REC p50':>9} {'REC p99':>9} {'LOGINS OK':>10} {'LOGIN p99':>10} {'429s':>6}   (ms)")
+    print("-" * 66)
+    for phase, results in (('quiet', quiet), ('login storm', storm)):
+        print(f"{phase:<14} {percentile(results['recommend'], 50):>9.1f} {percentile(results['recommend'], 99):>9.1f} "
+              f"{len(results['login']):>10} {percentile(results['login'], 99):>10.1f} "
+              f"{results['statuses'].count(429):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    workers = subparsers.add_parser('workers', help="Multi-worker startup time and memory")
+    workers.add_argument('--counts', type=int, nargs='+', default=[1, 4, 16])
+    workers.add_argument('--port', type=int, default=8765)
+
+    concurrency = subparsers.add_parser('concurrency', help="Recommendation and /health latency under load")
+    concurrency.add_argument('--clients', type=int, default=50)
+    concurrency.add_argument('--requests', type=int, default=4, help="Requests per client")
+    concurrency.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 4])
+    concurrency.add_argument('--port', type=int, default=8766)
+
+    db = subparsers.add_parser('db', help="SQLite cart read/write throughput")
+    db.add_argument('--readers', type=int, default=8)
+    db.add_argument('--writers', type=int, default=2)
+    db.add_argument('--seconds', type=float, default=5.0)
+
+    writes = subparsers.add_parser('writes', help="Sustained cart writes/s: per-call transactions vs. group commit")
+    writes.add_argument('--clients', type=int, default=64)
+    writes.add_argument('--seconds', type=float, default=5.0)
+
+    projection = subparsers.add_parser('cart-projection', help="Cart read time and payload size by column set")
+    projection.add_argument('--items', type=int, default=100)
+    projection.add_argument('--other-users', type=int, default=200)
+    projection.add_argument('--repeats', type=int, default=200)
+
+    order_history = subparsers.add_parser('orders', help="Order history latency: N+1 vs. keyset pages")
+    order_history.add_argument('--orders', type=int, default=1000)
+    order_history.add_argument('--items-per-order', type=int, default=3)
+    order_history.add_argument('--other-users', type=int, default=20)
+    order_history.add_argument('--repeats', type=int, default=50)
+
+    checkout = subparsers.add_parser('checkout', help="Concurrent checkouts across worker processes")
+    checkout.add_argument('--workers', type=int, default=4)
+    checkout.add_argument('--customers', type=int, default=25, help="Concurrent customers per worker")
+    checkout.add_argument('--orders', type=int, default=4, help="Orders per customer")
+    checkout.add_argument('--items', type=int, default=10, help="Items per order")
+
+    search = subparsers.add_parser('search', help="Full-text search latency at catalog scale")
+    search.add_argument('--rows', type=int, default=1_000_000)
+    search.add_argument('--repeats', type=int, default=50)
+
+    catalog_load = subparsers.add_parser('catalog-load', help="Catalog CSV import rows/s by loader")
+    catalog_load.add_argument('--rows', type=int, default=200_000)
+    catalog_load.add_argument('--chunk-rows', type=int, default=5000)
+
+    serialize = subparsers.add_parser('serialize', help="Recommendation response encoding time")
+    serialize.add_argument('--top-k', type=int, default=50)
+    serialize.add_argument('--repeats', type=int, default=200)
+
+    card_view = subparsers.add_parser('card-view', help="Response size and TTFB: full items vs. view=card")
+    card_view.add_argument('--requests', type=int, default=50)
+    card_view.add_argument('--port', type=int, default=8769)
+
+    stream = subparsers.add_parser('stream', help="Streamed export: time to first item and peak memory")
+    stream.add_argument('--rows', type=int, default=60000)
+    stream.add_argument('--limits', type=int, nargs='+', default=[100, 1000, 5000])
+    stream.add_argument('--repeats', type=int, default=3)
+
+    mixed = subparsers.add_parser('mixed', help="Mixed recommendation and cart API load")
+    mixed.add_argument('--rec-clients', type=int, default=10)
+    mixed.add_argument('--cart-clients', type=int, default=40)
+    mixed.add_argument('--seconds', type=float, default=15.0)
+    mixed.add_argument('--port', type=int, default=8767)
+
+    auth = subparsers.add_parser('auth', help="Session validation throughput by token mode")
+    auth.add_argument('--sessions', type=int, default=1000)
+    auth.add_argument('--checks', type=int, default=20000)
+
+    storm = subparsers.add_parser('login-storm', help="Recommendation latency during a burst of logins")
+    storm.add_argument('--rec-clients', type=int, default=4)
+    storm.add_argument('--login-clients', type=int, default=32)
+    storm.add_argument('--seconds', type=float, default=10.0)
+    storm.add_argument('--port', type=int, default=8768)
+
+    args = parser.parse_args()
+    if args.benchmark == 'workers':
+        bench_workers(args.counts, port=args.port)
+    elif args.benchmark == 'concurrency':
+        bench_concurrency(args.clients, args.requests, args.pool_sizes, port=args.port)
+    elif args.benchmark == 'db':
+        bench_db(args.readers, args.writers, args.seconds)
+    elif args.benchmark == 'writes':
+        bench_writes(args.clients, args.seconds)
+    elif args.benchmark == 'cart-projection':
+        bench_cart_projection(args.items, args.other_users, args.repeats)
+    elif args.benchmark == 'orders':
+        bench_orders(args.orders, args.items_per_order, args.other_users, args.repeats)
+    elif args.benchmark == 'checkout':
+        bench_checkout(args.workers, args.customers, args.orders, args.items)
+    elif args.benchmark == 'search':
+        bench_search(args.rows, args.repeats)
+    elif args.benchmark == 'catalog-load':
+        bench_catalog_load(args.rows, args.chunk_rows)
+    elif args.benchmark == 'serialize':
+        bench_serialize(args.top_k, args.repeats)
+    elif args.benchmark == 'card-view':
+        bench_card_view(args.requests, port=args.port)
+    elif args.benchmark == 'stream':
+        bench_stream(args.rows, args.limits, args.repeats)
+    elif args.benchmark == 'mixed':
+        bench_mixed(args.rec_clients, args.cart_clients, args.seconds, port=args.port)
+    elif args.benchmark == 'auth':
+        bench_auth(args.sessions, args.checks)
+    elif args.benchmark == 'login-storm':
+        bench_login_storm(args.rec_clients, args.login_clients, args.seconds, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+🗂️ CATALOG FACETS
+Brand/model lists and dataset statistics, built once per catalog snapshot
+
+/brands, /brands/{brand}/models, /brands-with-models and /stats only
+change when the catalog does, yet each request used to scan the whole
+DataFrame (/brands-with-models once per brand). CatalogFacets computes
+them in a single pass when a snapshot is built and keeps each response
+as ready-to-send JSON bytes with a content-hash ETag:
+- Serving a facet is a dict lookup, no pandas and no JSON encoding
+- Equal content gives an equal ETag across reloads and across workers,
+  so clients revalidate with If-None-Match and get 304 Not Modified
+"""
+
+import hashlib
+import json
+import math
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+def _to_json(payload) -> bytes:
+    # Same encoding as FastAPI's JSONResponse
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _float(value) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class FacetBody:
+    """One pre-serialized JSON response and its ETag"""
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class BrandModels:
+    """
+    /brands/{brand}/models for one brand, minus the "brand" field
+
+    The response echoes the brand as requested (any letter case), so that
+    field is spliced in front of the pre-serialized rest.
+    """
+
+    __slots__ = ('tail', 'etag')
+
+    def __init__(self, models, accessory_count: int):
+        self.tail = _to_json({
+            "models": models,
+            "count": len(models),
+            "accessory_count": accessory_count,
+        })[1:]
+        self.etag = FacetBody(self.tail).etag
+
+    def body(self, brand: str) -> bytes:
+        return b'{"brand":' + _to_json(brand) + b',' + self.tail
+
+
+class CatalogFacets:
+    """Immutable facet responses for one catalog snapshot"""
+
+    def __init__(self, df: pd.DataFrame):
+        # object dtype so Categorical (compacted) columns group the same way
+        pairs = pd.DataFrame({
+            'brand': df['Car Brand'].astype(object),
+            'model': df['Car Model'].astype(object),
+        })
+        accessory_counts = pairs['brand'].value_counts()
+        models = pairs.drop_duplicates().groupby('brand', sort=True)['model'].agg(sorted)
+
+        brands_data = {
+            brand: {
+                "models": brand_models,
+                "model_count": len(brand_models),
+                "accessory_count": int(accessory_counts[brand]),
+            }
+            for brand, brand_models in models.items()
+        }
+        self.brands = FacetBody(_to_json({"brands": list(brands_data), "count": len(brands_data)}))
+        self.brands_with_models = FacetBody(_to_json({"brands": brands_data, "total_brands": len(brands_data)}))
+
+        # Brand lookup is case-insensitive: "toyota" and "TOYOTA" rows count together
+        lowered = pairs.assign(brand=pairs['brand'].str.lower())
+        lowered_counts = lowered['brand'].value_counts()
+        lowered_models = lowered.drop_duplicates().groupby('brand')['model'].agg(sorted)
+        self._models_by_brand: Dict[str, BrandModels] = {
+            brand: BrandModels(brand_models, int(lowered_counts[brand]))
+            for brand, brand_models in lowered_models.items()
+        }
+
+        price = df['Accessory Price']
+        quality = df['Overall_Quality_Score']
+        sentiment = df['Sentiment_Label'].astype(object).value_counts()
+        self.stats = FacetBody(_to_json({
+            "total_accessories": len(df),
+            "total_brands": len(brands_data),
+            "price_range": {
+                "min": _float(price.min()),
+                "max": _float(price.max()),
+                "mean": _float(price.mean())
+            },
+            "sentiment_distribution": {label: int(count) for label, count in sentiment.items()},
+            "quality_stats": {
+                "mean": _float(quality.mean()),
+                "min": _float(quality.min()),
+                "max": _float(quality.max())
+            }
+        }))
+
+    def models_for(self, brand: str) -> Optional[BrandModels]:
+        """Models of a brand (case-insensitive), or None when the brand has no accessories"""
+        return self._models_by_brand.get(brand.lower())
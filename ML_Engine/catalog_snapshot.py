@@ -0,0 +1,178 @@
+"""
+📸 CATALOG SNAPSHOTS
+Immutable, versioned views of the accessory catalog
+
+The recommendation engine serves every request from one CatalogSnapshot.
+Reloads and incremental updates never modify a published snapshot - they
+build a new one and swap the engine's reference to it, so requests that
+are already running finish on the snapshot they started with.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from catalog_facets import CatalogFacets
+from filter_planner import CatalogStatistics, FilterPlanner
+
+# Columns that feed the TF-IDF document of an accessory
+TEXT_COLUMNS = ['Accessory Description', 'Accessory Name']
+
+# Normalized matching columns and the display column each one is derived from
+NORMALIZED_COLUMNS = {
+    'Accessory_Name_Normalized': 'Accessory Name',
+    'Car_Brand_Normalized': 'Car Brand',
+    'Car_Model_Normalized': 'Car Model',
+    'Compatible_Cars_Normalized': 'Compatible Cars',
+}
+
+# Columns the filters, scoring and facets read; a catalog without values in
+# any of them cannot be served (e.g. tables loaded before the normalized
+# columns were added)
+REQUIRED_COLUMNS = (
+    'Accessory_ID', 'Accessory Name', 'Accessory Description', 'Accessory Price',
+    'Car Brand', 'Car Model', 'Overall_Quality_Score', 'Sentiment_Score',
+    'Sentiment_Label', 'Dominant_Emotion', *NORMALIZED_COLUMNS,
+)
+
+
+class CatalogUpdateError(Exception):
+    """Raised when an incremental catalog update cannot be applied"""
+    pass
+
+
+def tfidf_documents(df: pd.DataFrame) -> pd.Series:
+    """Build the text that is vectorized for each accessory"""
+    # Go through object dtype so Categorical (compacted) columns work too
+    description = df['Accessory Description'].astype(object).fillna('').astype(str)
+    name = df['Accessory Name'].astype(object).fillna('').astype(str)
+    return description + ' ' + name
+
+
+def _assign(df: pd.DataFrame, positions: np.ndarray, column: str, value):
+    """Set a column value, extending Categorical columns with new values"""
+    dtype = df[column].dtype
+    if isinstance(dtype, pd.CategoricalDtype) and value not in dtype.categories:
+        df[column] = df[column].cat.add_categories([value])
+    df.loc[positions, column] = value
+
+
+class CatalogSnapshot:
+    """Read-only catalog state: rows, text vectors, filter statistics and facets"""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        tfidf_vectorizer,
+        tfidf_matrix,
+        version: int,
+        source: str
+    ):
+        # Row positions in df line up with rows of tfidf_matrix
+        self.df = df.reset_index(drop=True)
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.version = version
+        self.source = source
+        self.loaded_at = datetime.now()
+        self.filter_planner = FilterPlanner(CatalogStatistics(self.df))
+        # Brand/model/stats responses, served without touching df
+        self.facets = CatalogFacets(self.df)
+        # str(Accessory_ID) -> row position (first row wins if an ID repeats)
+        ids = self.df['Accessory_ID'].to_numpy(dtype=object).astype(str).tolist()
+        self._positions = {accessory_id: position for position, accessory_id in reversed(list(enumerate(ids)))}
+
+    def info(self) -> Dict:
+        """Summary used by the admin endpoints"""
+        return {
+            'version': self.version,
+            'source': self.source,
+            'loaded_at': self.loaded_at.isoformat(),
+            'total_accessories': len(self.df),
+        }
+
+    def positions_for_ids(self, accessory_ids: Iterable) -> np.ndarray:
+        """Row positions of the given accessory IDs (compared as strings)"""
+        wanted = {str(accessory_id) for accessory_id in accessory_ids}
+        return np.flatnonzero(self.df['Accessory_ID'].astype(str).isin(wanted).to_numpy())
+
+    def row_for_id(self, accessory_id) -> Optional[pd.Series]:
+        """The catalog row of one accessory (dict lookup), or None"""
+        position = self._positions.get(str(accessory_id))
+        return None if position is None else self.df.iloc[position]
+
+    # ==================== INCREMENTAL UPDATES ====================
+    # Each method returns the (df, tfidf_matrix) pair for the next snapshot,
+    # re-vectorizing only the rows whose text actually changed.
+
+    def _prepare_rows(self, records: List[Dict]) -> pd.DataFrame:
+        """Align new records with the catalog columns and fill normalized fields"""
+        rows = pd.DataFrame(records)
+        unknown = set(rows.columns) - set(self.df.columns)
+        if unknown:
+            raise CatalogUpdateError(f"Unknown columns: {sorted(unknown)}")
+        if 'Accessory_ID' not in rows.columns or rows['Accessory_ID'].isna().any():
+            raise CatalogUpdateError("Every accessory needs an Accessory_ID")
+
+        for normalized, source in NORMALIZED_COLUMNS.items():
+            if source not in rows.columns:
+                continue
+            derived = rows[source].fillna('').astype(str).str.lower().str.strip()
+            if normalized in rows.columns:
+                rows[normalized] = rows[normalized].fillna(derived)
+            else:
+                rows[normalized] = derived
+
+        return rows.reindex(columns=self.df.columns)
+
+    def with_added(self, records: List[Dict]):
+        rows = self._prepare_rows(records)
+        if rows['Accessory_ID'].astype(str).duplicated().any():
+            raise CatalogUpdateError("Duplicate Accessory_ID in new records")
+        existing = self.positions_for_ids(rows['Accessory_ID'])
+        if len(existing):
+            ids = self.df['Accessory_ID'].iloc[existing].tolist()
+            raise CatalogUpdateError(f"Accessories already exist: {ids}")
+
+        df = pd.concat([self.df, rows], ignore_index=True)
+        new_vectors = self.tfidf_vectorizer.transform(tfidf_documents(rows))
+        matrix = sparse.vstack([self.tfidf_matrix, new_vectors], format='csr')
+        return df, matrix
+
+    def with_updated(self, accessory_id, changes: Dict):
+        positions = self.positions_for_ids([accessory_id])
+        if len(positions) == 0:
+            raise CatalogUpdateError(f"Accessory not found: {accessory_id}")
+        unknown = set(changes) - set(self.df.columns)
+        if unknown:
+            raise CatalogUpdateError(f"Unknown columns: {sorted(unknown)}")
+        if 'Accessory_ID' in changes and str(changes['Accessory_ID']) != str(accessory_id):
+            raise CatalogUpdateError("Accessory_ID cannot be changed")
+
+        df = self.df.copy()
+        for column, value in changes.items():
+            _assign(df, positions, column, value)
+        # Keep the matching columns in step with edited display columns
+        for normalized, source in NORMALIZED_COLUMNS.items():
+            if source in changes and normalized not in changes:
+                _assign(df, positions, normalized, str(changes[source]).lower().strip())
+
+        matrix = self.tfidf_matrix
+        if any(column in changes for column in TEXT_COLUMNS):
+            new_vectors = self.tfidf_vectorizer.transform(tfidf_documents(df.iloc[positions]))
+            # Append the new rows, then gather so they replace the old ones in place
+            combined = sparse.vstack([matrix, new_vectors], format='csr')
+            order = np.arange(matrix.shape[0])
+            order[positions] = matrix.shape[0] + np.arange(len(positions))
+            matrix = combined[order]
+        return df, matrix
+
+    def with_removed(self, accessory_ids: Iterable):
+        positions = self.positions_for_ids(accessory_ids)
+        if len(positions) == 0:
+            raise CatalogUpdateError("None of the accessories were found")
+
+        keep = np.ones(len(self.df), dtype=bool)
+        keep[positions] = False
+        return self.df[keep], self.tfidf_matrix[np.flatnonzero(keep)]
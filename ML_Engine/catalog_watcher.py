@@ -0,0 +1,93 @@
+"""
+🔭 CATALOG WATCHER
+Background task that reloads the engine when the database catalog changes
+
+With CATALOG_SOURCE=db the engine reads its catalog from the same
+accessories table that cart, wishlist and order queries join against.
+Every write to that table bumps the catalog_version row (triggers in
+database.py), so the watcher only has to compare one integer every
+CATALOG_POLL_SECONDS seconds:
+- The version check runs on the database executor
+- A changed version rebuilds the snapshot on the engine's executor;
+  requests already running finish on the previous snapshot
+- CATALOG_POLL_SECONDS=0 disables polling (POST /admin/catalog/reload
+  still works)
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from async_db import db_executor
+
+CATALOG_POLL_SECONDS = float(os.environ.get('CATALOG_POLL_SECONDS', 10))
+
+
+class CatalogWatcher:
+    """Polls the database catalog version and reloads the engine when it moves"""
+
+    def __init__(self, interval: float = CATALOG_POLL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.checks = 0
+        self.reloads = 0
+        self.last_reload: Optional[Dict] = None
+
+    async def check_once(self, engine) -> Optional[Dict]:
+        """Reload now if the catalog version changed; what was reloaded, or None"""
+        self.checks += 1
+        if not await db_executor.run(engine.catalog_changed):
+            return None
+
+        start = time.perf_counter()
+        previous = engine.db_catalog_version
+        snapshot = await engine.run_async(engine.reload)
+        self.reloads += 1
+        self.last_reload = {
+            'finished_at': datetime.now().isoformat(),
+            'from_catalog_version': previous,
+            'to_catalog_version': engine.db_catalog_version,
+            'snapshot_version': snapshot.version,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        print(f"🔭 Catalog version {previous} -> {engine.db_catalog_version}: "
+              f"reloaded in {self.last_reload['seconds']:.3f}s")
+        return self.last_reload
+
+    async def _run_forever(self, engine):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_once(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the current snapshot; the next poll retries
+                print(f"⚠️  Catalog reload failed: {e}")
+
+    def start(self, engine):
+        """Schedule the watcher on the running event loop (no-op without a database catalog)"""
+        if self.interval <= 0 or engine.catalog_db is None:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_forever(engine))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'interval_seconds': self.interval,
+            'checks': self.checks,
+            'reloads': self.reloads,
+            'last_reload': self.last_reload,
+        }
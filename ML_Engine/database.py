@@ -3,26 +3,194 @@
 SQLite database for Vehicle Accessories Recommendation System
 """
 
-import sqlite3
+import numpy as np
 import pandas as pd
 from pathlib import Path
+import sqlite3
 import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from db_pool import DB_PATH, open_connection
 
-# Database file path
-DB_PATH = Path(__file__).parent / 'vehicle_accessories.db'
+# Indexes for the per-user list queries in db_helpers. A user's rows come
+# out already in display order (no sort step); the cart and wishlist ones
+# also carry every column the query reads, so those tables are never touched.
+# They start with user_id, so they replace the old single-column user_id indexes.
+LIST_INDEXES = {
+    'idx_cart_user_added': 'cart_items(user_id, added_at, accessory_id, quantity)',
+    'idx_wishlist_user_added': 'wishlist(user_id, added_at, accessory_id)',
+    # order_id is the rowid, which SQLite appends to every index entry
+    'idx_order_user_date': 'orders(user_id, order_date)',
+}
+SUPERSEDED_INDEXES = ('idx_cart_user', 'idx_wishlist_user', 'idx_order_user')
 
-def create_database():
-    """Create all database tables with proper schema"""
-    print("🔄 Creating database schema...")
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Enable foreign keys
-    cursor.execute("PRAGMA foreign_keys = ON")
-    
-    # ==================== TABLE 1: ACCESSORIES ====================
-    # Main product catalog with ML features
+
+def create_list_indexes(cursor):
+    """Create LIST_INDEXES and drop the indexes they supersede"""
+    for name, target in LIST_INDEXES.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+    for name in SUPERSEDED_INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def ensure_list_indexes(db_path: Path = DB_PATH):
+    """Bring an existing database up to date with LIST_INDEXES (run at API startup)"""
+    conn = open_connection(db_path)
+    try:
+        create_list_indexes(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Secondary indexes on the catalog. The bulk loader drops them and builds
+# each once after the last row instead of updating them row by row.
+ACCESSORY_INDEXES = {
+    'idx_car_brand': 'accessories(car_brand)',
+    'idx_car_model': 'accessories(car_model)',
+    'idx_price': 'accessories(price)',
+    'idx_sentiment': 'accessories(sentiment_score)',
+    'idx_quality': 'accessories(quality_score)',
+    'idx_category': 'accessories(category)',
+}
+
+
+def create_accessory_indexes(cursor):
+    for name, target in ACCESSORY_INDEXES.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+
+# Columns added to accessories after databases were already deployed
+ADDED_ACCESSORY_COLUMNS = (
+    'accessory_name_normalized', 'car_brand_normalized',
+    'car_model_normalized', 'compatible_cars_normalized'
+)
+
+
+# ==================== CATALOG VERSION ====================
+# One row counting changes to accessories. The recommendation engine reads
+# its catalog from this database and reloads when the number moves, so one
+# catalog import reaches /recommend and /cart alike. Triggers count ad-hoc
+# edits; the bulk loader drops them for the load and bumps the row once.
+
+CATALOG_VERSION_TRIGGERS = {
+    f'accessories_version_{event.lower()}': f'''
+        AFTER {event} ON accessories BEGIN
+            UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+        END'''
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+}
+
+
+def create_catalog_version(cursor):
+    """The catalog_version row and the triggers that bump it"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1)')
+    for name, body in CATALOG_VERSION_TRIGGERS.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+def bump_catalog_version(cursor) -> int:
+    cursor.execute('''
+        UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+        RETURNING version
+    ''')
+    return cursor.fetchone()[0]
+
+
+def read_catalog_version(db_path: Path = DB_PATH) -> int:
+    """Current catalog version (0 when the database has no catalog yet)"""
+    conn = open_connection(db_path)
+    try:
+        row = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+
+# Full-text index behind /search. External content: the index stores only
+# tokens and reads column values back from accessories by rowid. Triggers
+# keep it in step with every insert, update and delete on accessories.
+SEARCH_COLUMNS = ('accessory_name', 'description', 'category', 'reviews')
+# bm25 weight of a match in each column: a hit in the name counts most
+SEARCH_WEIGHTS = {'accessory_name': 10.0, 'description': 2.0, 'category': 5.0, 'reviews': 1.0}
+SEARCH_TABLE = 'accessories_fts'
+
+SEARCH_TRIGGERS = {
+    'accessories_fts_insert': f'''
+        AFTER INSERT ON accessories BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES (new.rowid, {', '.join(f'new.{c}' for c in SEARCH_COLUMNS)});
+        END''',
+    'accessories_fts_delete': f'''
+        AFTER DELETE ON accessories BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.rowid, {', '.join(f'old.{c}' for c in SEARCH_COLUMNS)});
+        END''',
+    'accessories_fts_update': f'''
+        AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON accessories BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.rowid, {', '.join(f'old.{c}' for c in SEARCH_COLUMNS)});
+            INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES (new.rowid, {', '.join(f'new.{c}' for c in SEARCH_COLUMNS)});
+        END''',
+}
+
+
+def create_search_index(cursor) -> bool:
+    """
+    Create the FTS5 table and its sync triggers where missing.
+    
+    The index is rebuilt from accessories whenever a trigger had to be
+    (re)created: the table was new, or accessories was dropped and reloaded
+    (which drops its triggers). Returns True if it was rebuilt.
+    """
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'accessories'"
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            {', '.join(SEARCH_COLUMNS)},
+            content='accessories', content_rowid='rowid',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    ''')
+    for name, body in SEARCH_TRIGGERS.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    if existing.issuperset(SEARCH_TRIGGERS):
+        return False
+    rebuild_search_index(cursor)
+    return True
+
+
+def rebuild_search_index(cursor):
+    """Re-read every accessory into the FTS index (after bulk loads or VACUUM)"""
+    cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def ensure_search_index(db_path: Path = DB_PATH):
+    """Bring an existing database up to date with the search index (run at API startup)"""
+    conn = open_connection(db_path)
+    try:
+        if create_search_index(conn.cursor()):
+            print("✅ Rebuilt accessories search index")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def create_accessories_table(cursor):
+    """The catalog table (accessory_id primary key) and its ACCESSORY_INDEXES"""
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS accessories (
             accessory_id TEXT PRIMARY KEY,
@@ -81,6 +249,10 @@ def create_database():
             
             -- Normalized fields for search
             brand_normalized TEXT,
+            accessory_name_normalized TEXT,
+            car_brand_normalized TEXT,
+            car_model_normalized TEXT,
+            compatible_cars_normalized TEXT,
             
             -- Metadata
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -88,13 +260,32 @@ def create_database():
         )
     ''')
     
+    # Tables created before a column was added to the schema above
+    cursor.execute('PRAGMA table_info(accessories)')
+    existing = {column[1] for column in cursor.fetchall()}
+    for column in ADDED_ACCESSORY_COLUMNS:
+        if column not in existing:
+            cursor.execute(f'ALTER TABLE accessories ADD COLUMN {column} TEXT')
+    
     # Indexes for fast queries
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_car_brand ON accessories(car_brand)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_car_model ON accessories(car_model)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_price ON accessories(price)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sentiment ON accessories(sentiment_score)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_quality ON accessories(quality_score)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON accessories(category)')
+    create_accessory_indexes(cursor)
+    create_catalog_version(cursor)
+
+
+def create_database(db_path: Path = DB_PATH):
+    """Create all database tables with proper schema"""
+    print("🔄 Creating database schema...")
+    
+    # Also switches the file to WAL mode (persistent) for the API's pooled connections
+    conn = open_connection(db_path)
+    cursor = conn.cursor()
+    
+    # Enable foreign keys
+    cursor.execute("PRAGMA foreign_keys = ON")
+    
+    # ==================== TABLE 1: ACCESSORIES ====================
+    # Main product catalog with ML features
+    create_accessories_table(cursor)
     
     print("✅ Created 'accessories' table with indexes")
     
@@ -130,8 +321,6 @@ def create_database():
             UNIQUE(user_id, accessory_id)
         )
     ''')
-    
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cart_user ON cart_items(user_id)')
     print("✅ Created 'cart_items' table")
     
     # ==================== TABLE 4: WISHLIST ====================
@@ -147,8 +336,6 @@ def create_database():
             UNIQUE(user_id, accessory_id)
         )
     ''')
-    
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_wishlist_user ON wishlist(user_id)')
     print("✅ Created 'wishlist' table")
     
     # ==================== TABLE 5: ORDERS ====================
@@ -185,7 +372,6 @@ def create_database():
         )
     ''')
     
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_user ON orders(user_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_number ON orders(order_number)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_date ON orders(order_date)')
     print("✅ Created 'orders' table")
@@ -225,6 +411,9 @@ def create_database():
     
     print("✅ Created 'user_profiles' table")
     
+    create_list_indexes(cursor)
+    create_search_index(cursor)
+    
     conn.commit()
     conn.close()
     
@@ -240,102 +429,232 @@ def create_database():
     print("   7. user_profiles - User preferences")
 
 
-def load_accessories_from_csv():
-    """Load accessories data from CSV into database"""
-    print("\n🔄 Loading accessories from CSV...")
-    
-    # Path to CSV file
-    csv_path = Path(__file__).parent.parent / 'Dataset' / 'processed' / 'accessories_with_advanced_sentiment.csv'
-    
-    if not csv_path.exists():
-        print(f"❌ CSV file not found: {csv_path}")
-        return False
-    
-    # Read CSV
-    df = pd.read_csv(csv_path)
-    print(f"📄 Loaded {len(df)} accessories from CSV")
-    
+ACCESSORIES_CSV = Path(__file__).parent.parent / 'Dataset' / 'processed' / 'accessories_with_advanced_sentiment.csv'
+
+# Map CSV columns to database columns
+CSV_COLUMN_MAPPING = {
+    'Accessory_ID': 'accessory_id',
+    'Car Brand': 'car_brand',
+    'Car Model': 'car_model',
+    'Accessory Name': 'accessory_name',
+    'Accessory Price': 'price',
+    'Accessory Description': 'description',
+    'Compatible Cars': 'compatible_cars',
+    'Top 5 Reviews': 'reviews',
+    'Category': 'category',
+    'Sentiment_Score': 'sentiment_score',
+    'Sentiment_Label': 'sentiment_label',
+    'Sentiment_VADER': 'sentiment_vader',
+    'Sentiment_Polarity': 'sentiment_polarity',
+    'Sentiment_Subjectivity': 'sentiment_subjectivity',
+    'Sentiment_Strength': 'sentiment_strength',
+    'Overall_Quality_Score': 'overall_quality_score',
+    'Aspect_Quality_Score': 'aspect_quality_score',
+    'Aspect_Quality_Mentions': 'aspect_quality_mentions',
+    'Aspect_Durability_Score': 'aspect_durability_score',
+    'Aspect_Durability_Mentions': 'aspect_durability_mentions',
+    'Aspect_Installation_Score': 'aspect_installation_score',
+    'Aspect_Installation_Mentions': 'aspect_installation_mentions',
+    'Aspect_Design_Score': 'aspect_design_score',
+    'Aspect_Design_Mentions': 'aspect_design_mentions',
+    'Aspect_Compatibility_Score': 'aspect_compatibility_score',
+    'Aspect_Compatibility_Mentions': 'aspect_compatibility_mentions',
+    'Aspect_Value_Score': 'aspect_value_score',
+    'Aspect_Value_Mentions': 'aspect_value_mentions',
+    'Aspect_Comfort_Score': 'aspect_comfort_score',
+    'Aspect_Comfort_Mentions': 'aspect_comfort_mentions',
+    'Aspect_Performance_Score': 'aspect_performance_score',
+    'Aspect_Performance_Mentions': 'aspect_performance_mentions',
+    'Dominant_Emotion': 'dominant_emotion',
+    'Emotion_Happy_Score': 'emotion_happy',
+    'Emotion_Satisfied_Score': 'emotion_satisfied',
+    'Emotion_Disappointed_Score': 'emotion_disappointed',
+    'Emotion_Angry_Score': 'emotion_angry',
+    'Emotion_Neutral_Score': 'emotion_neutral',
+    'Key_Phrases': 'key_phrases',
+    'Key_Strengths': 'key_strengths',
+    'Key_Weaknesses': 'key_weaknesses',
+    'Recommendation_Explanation': 'recommendation_explanation',
+    'Brand_Normalized': 'brand_normalized',
+    'Accessory_Name_Normalized': 'accessory_name_normalized',
+    'Car_Brand_Normalized': 'car_brand_normalized',
+    'Car_Model_Normalized': 'car_model_normalized',
+    'Compatible_Cars_Normalized': 'compatible_cars_normalized'
+}
+
+
+def _clean_catalog(df: pd.DataFrame) -> pd.DataFrame:
     # Clean column names - remove spaces and special characters
     df.columns = df.columns.str.strip()
-    
-    # Map CSV columns to database columns
-    column_mapping = {
-        'Accessory_ID': 'accessory_id',
-        'Car Brand': 'car_brand',
-        'Car Model': 'car_model',
-        'Accessory Name': 'accessory_name',
-        'Accessory Price': 'price',
-        'Accessory Description': 'description',
-        'Compatible Cars': 'compatible_cars',
-        'Top 5 Reviews': 'reviews',
-        'Category': 'category',
-        'Sentiment_Score': 'sentiment_score',
-        'Sentiment_Label': 'sentiment_label',
-        'Sentiment_VADER': 'sentiment_vader',
-        'Sentiment_Polarity': 'sentiment_polarity',
-        'Sentiment_Subjectivity': 'sentiment_subjectivity',
-        'Sentiment_Strength': 'sentiment_strength',
-        'Overall_Quality_Score': 'overall_quality_score',
-        'Aspect_Quality_Score': 'aspect_quality_score',
-        'Aspect_Quality_Mentions': 'aspect_quality_mentions',
-        'Aspect_Durability_Score': 'aspect_durability_score',
-        'Aspect_Durability_Mentions': 'aspect_durability_mentions',
-        'Aspect_Installation_Score': 'aspect_installation_score',
-        'Aspect_Installation_Mentions': 'aspect_installation_mentions',
-        'Aspect_Design_Score': 'aspect_design_score',
-        'Aspect_Design_Mentions': 'aspect_design_mentions',
-        'Aspect_Compatibility_Score': 'aspect_compatibility_score',
-        'Aspect_Compatibility_Mentions': 'aspect_compatibility_mentions',
-        'Aspect_Value_Score': 'aspect_value_score',
-        'Aspect_Value_Mentions': 'aspect_value_mentions',
-        'Aspect_Comfort_Score': 'aspect_comfort_score',
-        'Aspect_Comfort_Mentions': 'aspect_comfort_mentions',
-        'Aspect_Performance_Score': 'aspect_performance_score',
-        'Aspect_Performance_Mentions': 'aspect_performance_mentions',
-        'Dominant_Emotion': 'dominant_emotion',
-        'Emotion_Happy_Score': 'emotion_happy',
-        'Emotion_Satisfied_Score': 'emotion_satisfied',
-        'Emotion_Disappointed_Score': 'emotion_disappointed',
-        'Emotion_Angry_Score': 'emotion_angry',
-        'Emotion_Neutral_Score': 'emotion_neutral',
-        'Key_Phrases': 'key_phrases',
-        'Key_Strengths': 'key_strengths',
-        'Key_Weaknesses': 'key_weaknesses',
-        'Recommendation_Explanation': 'recommendation_explanation',
-        'Brand_Normalized': 'brand_normalized'
-    }
-    
-    # Rename columns
-    df = df.rename(columns=column_mapping)
+    df = df.rename(columns=CSV_COLUMN_MAPPING)
     
     # Select only columns that exist in both CSV and database
-    db_columns = list(column_mapping.values())
-    existing_columns = [col for col in db_columns if col in df.columns]
-    df_clean = df[existing_columns]
+    existing_columns = [col for col in CSV_COLUMN_MAPPING.values() if col in df.columns]
+    return df[existing_columns].fillna('')
+
+
+def read_accessories_csv(csv_path: Path = ACCESSORIES_CSV) -> pd.DataFrame:
+    """The catalog CSV with database column names (columns missing from the CSV dropped, NaN -> '')"""
+    return _clean_catalog(pd.read_csv(csv_path))
+
+
+# CSV rows read, converted and written per executemany call
+CATALOG_CHUNK_ROWS = 5000
+# SQLite page cache for the load's connection (MB)
+CATALOG_LOAD_CACHE_MB = 64
+
+
+def _upsert_sql(columns: List[str]) -> str:
+    updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col != 'accessory_id')
+    return f'''
+        INSERT INTO accessories ({', '.join(columns)})
+        VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT(accessory_id) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+    '''
+
+
+def load_accessories_from_csv(
+    csv_path: Path = ACCESSORIES_CSV,
+    db_path: Path = DB_PATH,
+    chunk_rows: int = CATALOG_CHUNK_ROWS
+) -> Optional[Dict]:
+    """
+    Load the catalog CSV into the accessories table, replacing its contents
+    
+    The CSV is streamed CATALOG_CHUNK_ROWS rows at a time and upserted
+    into the schema from create_accessories_table, so the primary key,
+    indexes and search triggers survive (to_sql would drop them). Rows
+    whose accessory_id is not in the CSV are deleted. Everything happens
+    in one transaction: readers keep seeing the previous catalog until
+    it commits, and a failure leaves that catalog untouched.
+    
+    The secondary indexes and the search index are dropped for the load
+    and built once at the end. The catalog version is bumped once, which
+    tells running recommendation engines to reload.
+    
+    Returns:
+        Dict with rows, deleted, seconds, rows_per_second and
+        catalog_version, or None on failure
+    """
+    print("\n🔄 Loading accessories from CSV...")
     
-    # Fill NaN values
-    df_clean = df_clean.fillna('')
+    if not Path(csv_path).exists():
+        print(f"❌ CSV file not found: {csv_path}")
+        return None
     
-    # Connect to database
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_connection(db_path)
+    # Transactions are managed explicitly below
+    conn.isolation_level = None
+    # Room for the whole load in memory, so dirty pages are not spilled mid-transaction
+    conn.execute(f'PRAGMA cache_size = -{CATALOG_LOAD_CACHE_MB * 1024}')
+    cursor = conn.cursor()
+    start = time.perf_counter()
     
     try:
-        # Insert data (replace if exists)
-        df_clean.to_sql('accessories', conn, if_exists='replace', index=False)
-        print(f"✅ Loaded {len(df_clean)} accessories into database")
+        cursor.execute('BEGIN IMMEDIATE')
         
-        # Verify
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM accessories")
-        count = cursor.fetchone()[0]
-        print(f"✅ Verified: {count} accessories in database")
+        # A table written by the old to_sql loader has no primary key to upsert on.
+        # foreign_keys is off on this connection, so dropping it leaves carts alone.
+        cursor.execute('PRAGMA table_info(accessories)')
+        if not any(column[5] for column in cursor.fetchall()):
+            cursor.execute('DROP TABLE IF EXISTS accessories')
+        create_accessories_table(cursor)
         
-        return True
+        for name in ACCESSORY_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        for name in list(SEARCH_TRIGGERS) + list(CATALOG_VERSION_TRIGGERS):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS loaded_ids (accessory_id TEXT PRIMARY KEY)')
+        cursor.execute('DELETE FROM temp.loaded_ids')
+        
+        rows = 0
+        # IDs stay strings: a float column (one blank ID in a chunk) would store '12.0'
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, dtype={'Accessory_ID': str}):
+            chunk = _clean_catalog(chunk)
+            if (chunk['accessory_id'] == '').any():
+                raise ValueError(f"Row without an Accessory_ID near CSV row {rows + 1}")
+            columns = list(chunk.columns)
+            # object dtype turns numpy scalars into Python values sqlite3 can bind
+            values = chunk.astype(object).values.tolist()
+            cursor.executemany(_upsert_sql(columns), values)
+            cursor.executemany(
+                'INSERT OR IGNORE INTO temp.loaded_ids VALUES (?)',
+                ((accessory_id,) for accessory_id in chunk['accessory_id'])
+            )
+            rows += len(values)
+        
+        cursor.execute('''
+            DELETE FROM accessories
+            WHERE accessory_id NOT IN (SELECT accessory_id FROM temp.loaded_ids)
+        ''')
+        deleted = cursor.rowcount
+        
+        # One sorted build per index, and one FTS rebuild (the triggers are recreated)
+        create_accessory_indexes(cursor)
+        create_search_index(cursor)
+        # The whole load counts as one catalog change
+        create_catalog_version(cursor)
+        version = bump_catalog_version(cursor)
+        cursor.execute('COMMIT')
     except Exception as e:
+        if conn.in_transaction:
+            cursor.execute('ROLLBACK')
         print(f"❌ Error loading data: {e}")
-        return False
+        return None
+    finally:
+        conn.close()
+    
+    seconds = time.perf_counter() - start
+    stats = {
+        'rows': rows,
+        'deleted': deleted,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds else rows,
+        'catalog_version': version,
+    }
+    print(f"✅ Loaded {rows} accessories into database in {seconds:.2f}s "
+          f"({stats['rows_per_second']:,} rows/s, {deleted} removed) - catalog version {version}")
+    return stats
+
+
+# Engine (CSV) column name of every database column
+CATALOG_COLUMNS = {db_column: csv_column for csv_column, db_column in CSV_COLUMN_MAPPING.items()}
+
+
+def read_catalog(db_path: Path = DB_PATH) -> Tuple[int, pd.DataFrame]:
+    """
+    The catalog version and accessories, laid out as the engine expects
+    
+    Version and rows come from one read transaction, so they always match.
+    Rows are fetched in one pass and turned into columns in bulk, under
+    their CSV names and with the dtypes pd.read_csv gives. Accessory IDs
+    stay strings.
+    """
+    conn = open_connection(db_path)
+    try:
+        conn.execute('BEGIN')
+        existing = {column[1] for column in conn.execute('PRAGMA table_info(accessories)')}
+        columns = [column for column in CATALOG_COLUMNS if column in existing]
+        if 'accessory_id' not in existing:
+            return 0, pd.DataFrame()
+        try:
+            version = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()[0]
+        except (sqlite3.OperationalError, TypeError):
+            # Loaded before catalog versions existed
+            version = 0
+        rows = conn.execute(f'SELECT {", ".join(columns)} FROM accessories ORDER BY rowid').fetchall()
+        conn.rollback()
     finally:
         conn.close()
+    
+    values = zip(*rows) if rows else [()] * len(columns)
+    data = {}
+    for column, column_values in zip(columns, values):
+        # The loader stores missing values as ''; with those as NaN, dtype
+        # inference lands where pd.read_csv does (declared types are not
+        # reliable: sentiment_strength is REAL but holds labels)
+        data[CATALOG_COLUMNS[column]] = pd.Series(column_values).replace('', np.nan).infer_objects()
+    return version, pd.DataFrame(data)
 
 
 def verify_database():
@@ -346,7 +665,7 @@ def verify_database():
         print(f"❌ Database not found: {DB_PATH}")
         return False
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_connection(DB_PATH)
     cursor = conn.cursor()
     
     # Get all tables
@@ -3,20 +3,41 @@
 CRUD operations for cart, wishlist, orders, and accessories
 """
 
+import base64
+import json
+import os
+import re
 import sqlite3
-from pathlib import Path
+import threading
+import time
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+from database import SEARCH_COLUMNS, SEARCH_TABLE, SEARCH_WEIGHTS
+from db_pool import DB_PATH, get_connection
+from write_coordinator import grouped_write
 
-# Database path
-DB_PATH = Path(__file__).parent / 'vehicle_accessories.db'
+
+# ==================== LIST PROJECTIONS ====================
+
+# Accessory columns the cart and wishlist pages render. The full row (~50
+# columns: reviews, aspect scores, explanations...) is only read on request
+# (detail=True) or per item through AccessoryDB.get_accessory_by_id.
+CART_LIST_COLUMNS = (
+    'accessory_id', 'accessory_name', 'car_brand', 'car_model',
+    'category', 'price', 'sentiment_label', 'dominant_emotion'
+)
+WISHLIST_LIST_COLUMNS = CART_LIST_COLUMNS + ('description',)
+
+
+def accessory_columns(columns: Tuple[str, ...], detail: bool = False) -> str:
+    """SELECT list for the joined accessories table (alias a)"""
+    return 'a.*' if detail else ', '.join(f'a.{column}' for column in columns)
 
 
 # ==================== HELPER FUNCTIONS ====================
 
 def get_db_connection():
-    """Get database connection with row factory"""
-    conn = sqlite3.connect(DB_PATH)
+    """Get a pooled database connection with row factory (close() returns it)"""
+    conn = get_connection(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -26,139 +47,170 @@ def dict_from_row(row) -> Dict:
     return dict(row) if row else None
 
 
+def encode_cursor(*values) -> str:
+    """Opaque keyset-pagination cursor holding the sort key of a page's last row"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> List:
+    """Values passed to encode_cursor (ValueError if the cursor is malformed)"""
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    if not isinstance(values, list) or not all(isinstance(v, (str, int, float)) for v in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
 # ==================== CART OPERATIONS ====================
 
+# Merging a guest cart never leaves more than this many of one accessory
+# in the user's cart (larger guest quantities are capped, not rejected)
+MAX_MERGE_QUANTITY = 99
+
 class CartDB:
     """Database operations for shopping cart"""
     
     @staticmethod
-    def get_cart_items(user_id: int) -> List[Dict]:
-        """Get all cart items for a user with accessory details"""
+    def _fetch_items(cursor, user_id: int, detail: bool = False) -> List[Dict]:
+        # Walks idx_cart_user_added: no cart_items table lookups, no sort
+        cursor.execute(f'''
+            SELECT 
+                c.cart_id,
+                c.quantity,
+                c.added_at,
+                {accessory_columns(CART_LIST_COLUMNS, detail)}
+            FROM cart_items c
+            JOIN accessories a ON c.accessory_id = a.accessory_id
+            WHERE c.user_id = ?
+            ORDER BY c.added_at DESC
+        ''', (user_id,))
+        return [dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _summarize(items: List[Dict]) -> Dict:
+        """Total and count derived from already-fetched items (same as get_cart_total/count)"""
+        return {
+            'items': items,
+            'total': sum(item['quantity'] * item['price'] for item in items if item['price'] is not None),
+            'count': sum(item['quantity'] for item in items)
+        }
+    
+    @staticmethod
+    def get_cart_items(user_id: int, detail: bool = False) -> List[Dict]:
+        """Get all cart items for a user (CART_LIST_COLUMNS, or every accessory column with detail=True)"""
         conn = get_db_connection()
-        cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                SELECT 
-                    c.cart_id,
-                    c.quantity,
-                    c.added_at,
-                    a.*
-                FROM cart_items c
-                JOIN accessories a ON c.accessory_id = a.accessory_id
-                WHERE c.user_id = ?
-                ORDER BY c.added_at DESC
-            ''', (user_id,))
-            
-            items = [dict(row) for row in cursor.fetchall()]
-            return items
-            
+            return CartDB._fetch_items(conn.cursor(), user_id, detail)
         finally:
             conn.close()
     
     @staticmethod
-    def add_to_cart(user_id: int, accessory_id: str, quantity: int = 1) -> Dict:
-        """Add item to cart or update quantity if exists"""
+    def get_cart_summary(user_id: int, detail: bool = False) -> Dict:
+        """
+        Cart items, total price and item count from one query on one connection
+        
+        Returns:
+            Dict with items, total, count
+        """
         conn = get_db_connection()
-        cursor = conn.cursor()
         
         try:
-            # Check if item already in cart
+            return CartDB._summarize(CartDB._fetch_items(conn.cursor(), user_id, detail))
+        finally:
+            conn.close()
+    
+    # Mutations run on the single writer connection and are group-committed
+    # (write_coordinator); they get its cursor and must not commit themselves.
+    
+    @staticmethod
+    @grouped_write
+    def add_to_cart(cursor, user_id: int, accessory_id: str, quantity: int = 1) -> Dict:
+        """Add item to cart, or add to its quantity if already there (one atomic upsert)"""
+        try:
             cursor.execute('''
-                SELECT cart_id, quantity
-                FROM cart_items
-                WHERE user_id = ? AND accessory_id = ?
-            ''', (user_id, accessory_id))
-            
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update quantity
-                new_quantity = existing['quantity'] + quantity
-                cursor.execute('''
-                    UPDATE cart_items
-                    SET quantity = ?
-                    WHERE cart_id = ?
-                ''', (new_quantity, existing['cart_id']))
-                message = 'Cart updated'
-            else:
-                # Insert new item
-                cursor.execute('''
-                    INSERT INTO cart_items (user_id, accessory_id, quantity)
-                    VALUES (?, ?, ?)
-                ''', (user_id, accessory_id, quantity))
-                message = 'Item added to cart'
-            
-            conn.commit()
+                INSERT INTO cart_items (user_id, accessory_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, accessory_id)
+                DO UPDATE SET quantity = quantity + excluded.quantity
+                RETURNING quantity
+            ''', (user_id, accessory_id, quantity))
+            
+            new_quantity = cursor.fetchone()['quantity']
+            message = 'Item added to cart' if new_quantity == quantity else 'Cart updated'
             return {'success': True, 'message': message}
             
         except Exception as e:
             return {'success': False, 'message': str(e)}
-        finally:
-            conn.close()
     
     @staticmethod
-    def update_cart_quantity(user_id: int, accessory_id: str, quantity: int) -> Dict:
+    @grouped_write
+    def merge_cart(cursor, user_id: int, items: List[Dict]) -> Dict:
+        """
+        Merge a guest cart into the user's cart in one statement
+        
+        Args:
+            user_id: User ID
+            items: List of dicts with accessory_id, quantity
+        
+        New items are inserted, items already in the cart get the guest
+        quantity added, unknown accessory IDs and quantities below 1 are
+        skipped. Each resulting quantity is capped at MAX_MERGE_QUANTITY.
+        """
+        guest_cart = json.dumps([
+            {'accessory_id': str(item['accessory_id']), 'quantity': int(item.get('quantity', 1))}
+            for item in items
+        ])
+        # The WHERE clause also lets SQLite parse ON CONFLICT after INSERT ... SELECT ... JOIN
+        cursor.execute('''
+            INSERT INTO cart_items (user_id, accessory_id, quantity)
+            SELECT ?, a.accessory_id, MIN(json_extract(g.value, '$.quantity'), ?)
+            FROM json_each(?) g
+            JOIN accessories a ON a.accessory_id = json_extract(g.value, '$.accessory_id')
+            WHERE json_extract(g.value, '$.quantity') > 0
+            ON CONFLICT(user_id, accessory_id)
+            DO UPDATE SET quantity = MIN(quantity + excluded.quantity, ?)
+        ''', (user_id, MAX_MERGE_QUANTITY, guest_cart, MAX_MERGE_QUANTITY))
+        
+        return {'success': True, 'message': 'Cart merged', 'merged': cursor.rowcount}
+    
+    @staticmethod
+    @grouped_write
+    def update_cart_quantity(cursor, user_id: int, accessory_id: str, quantity: int) -> Dict:
         """Update quantity of cart item"""
         if quantity <= 0:
-            return CartDB.remove_from_cart(user_id, accessory_id)
+            return CartDB.remove_from_cart.operation(cursor, user_id, accessory_id)
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE cart_items
+            SET quantity = ?
+            WHERE user_id = ? AND accessory_id = ?
+        ''', (quantity, user_id, accessory_id))
         
-        try:
-            cursor.execute('''
-                UPDATE cart_items
-                SET quantity = ?
-                WHERE user_id = ? AND accessory_id = ?
-            ''', (quantity, user_id, accessory_id))
-            
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                return {'success': True, 'message': 'Quantity updated'}
-            else:
-                return {'success': False, 'message': 'Item not found in cart'}
-                
-        finally:
-            conn.close()
+        if cursor.rowcount > 0:
+            return {'success': True, 'message': 'Quantity updated'}
+        else:
+            return {'success': False, 'message': 'Item not found in cart'}
     
     @staticmethod
-    def remove_from_cart(user_id: int, accessory_id: str) -> Dict:
+    @grouped_write
+    def remove_from_cart(cursor, user_id: int, accessory_id: str) -> Dict:
         """Remove item from cart"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM cart_items
+            WHERE user_id = ? AND accessory_id = ?
+        ''', (user_id, accessory_id))
         
-        try:
-            cursor.execute('''
-                DELETE FROM cart_items
-                WHERE user_id = ? AND accessory_id = ?
-            ''', (user_id, accessory_id))
-            
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                return {'success': True, 'message': 'Item removed from cart'}
-            else:
-                return {'success': False, 'message': 'Item not found in cart'}
-                
-        finally:
-            conn.close()
+        if cursor.rowcount > 0:
+            return {'success': True, 'message': 'Item removed from cart'}
+        else:
+            return {'success': False, 'message': 'Item not found in cart'}
     
     @staticmethod
-    def clear_cart(user_id: int) -> Dict:
+    @grouped_write
+    def clear_cart(cursor, user_id: int) -> Dict:
         """Clear all items from user's cart"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('DELETE FROM cart_items WHERE user_id = ?', (user_id,))
-            conn.commit()
-            
-            return {'success': True, 'message': 'Cart cleared'}
-            
-        finally:
-            conn.close()
+        cursor.execute('DELETE FROM cart_items WHERE user_id = ?', (user_id,))
+        return {'success': True, 'message': 'Cart cleared'}
     
     @staticmethod
     def get_cart_count(user_id: int) -> int:
@@ -206,72 +258,58 @@ class WishlistDB:
     """Database operations for wishlist"""
     
     @staticmethod
-    def get_wishlist_items(user_id: int) -> List[Dict]:
-        """Get all wishlist items for a user with accessory details"""
+    def _fetch_items(cursor, user_id: int, detail: bool = False) -> List[Dict]:
+        # Walks idx_wishlist_user_added: no wishlist table lookups, no sort
+        cursor.execute(f'''
+            SELECT 
+                w.wishlist_id,
+                w.added_at,
+                {accessory_columns(WISHLIST_LIST_COLUMNS, detail)}
+            FROM wishlist w
+            JOIN accessories a ON w.accessory_id = a.accessory_id
+            WHERE w.user_id = ?
+            ORDER BY w.added_at DESC
+        ''', (user_id,))
+        return [dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def get_wishlist_items(user_id: int, detail: bool = False) -> List[Dict]:
+        """Get all wishlist items for a user (WISHLIST_LIST_COLUMNS, or every accessory column with detail=True)"""
         conn = get_db_connection()
-        cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                SELECT 
-                    w.wishlist_id,
-                    w.added_at,
-                    a.*
-                FROM wishlist w
-                JOIN accessories a ON w.accessory_id = a.accessory_id
-                WHERE w.user_id = ?
-                ORDER BY w.added_at DESC
-            ''', (user_id,))
-            
-            items = [dict(row) for row in cursor.fetchall()]
-            return items
-            
+            return WishlistDB._fetch_items(conn.cursor(), user_id, detail)
         finally:
             conn.close()
     
     @staticmethod
-    def add_to_wishlist(user_id: int, accessory_id: str) -> Dict:
-        """Add item to wishlist"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    @grouped_write
+    def add_to_wishlist(cursor, user_id: int, accessory_id: str) -> Dict:
+        """Add item to wishlist (no-op if it is already there)"""
+        cursor.execute('''
+            INSERT INTO wishlist (user_id, accessory_id)
+            VALUES (?, ?)
+            ON CONFLICT(user_id, accessory_id) DO NOTHING
+        ''', (user_id, accessory_id))
         
-        try:
-            cursor.execute('''
-                INSERT INTO wishlist (user_id, accessory_id)
-                VALUES (?, ?)
-            ''', (user_id, accessory_id))
-            
-            conn.commit()
+        if cursor.rowcount > 0:
             return {'success': True, 'message': 'Item added to wishlist'}
-            
-        except sqlite3.IntegrityError:
+        else:
             return {'success': False, 'message': 'Item already in wishlist'}
-        except Exception as e:
-            return {'success': False, 'message': str(e)}
-        finally:
-            conn.close()
     
     @staticmethod
-    def remove_from_wishlist(user_id: int, accessory_id: str) -> Dict:
+    @grouped_write
+    def remove_from_wishlist(cursor, user_id: int, accessory_id: str) -> Dict:
         """Remove item from wishlist"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM wishlist
+            WHERE user_id = ? AND accessory_id = ?
+        ''', (user_id, accessory_id))
         
-        try:
-            cursor.execute('''
-                DELETE FROM wishlist
-                WHERE user_id = ? AND accessory_id = ?
-            ''', (user_id, accessory_id))
-            
-            conn.commit()
-            
-            if cursor.rowcount > 0:
-                return {'success': True, 'message': 'Item removed from wishlist'}
-            else:
-                return {'success': False, 'message': 'Item not found in wishlist'}
-                
-        finally:
-            conn.close()
+        if cursor.rowcount > 0:
+            return {'success': True, 'message': 'Item removed from wishlist'}
+        else:
+            return {'success': False, 'message': 'Item not found in wishlist'}
     
     @staticmethod
     def is_in_wishlist(user_id: int, accessory_id: str) -> bool:
@@ -291,42 +329,114 @@ class WishlistDB:
             conn.close()
     
     @staticmethod
-    def clear_wishlist(user_id: int) -> Dict:
+    @grouped_write
+    def clear_wishlist(cursor, user_id: int) -> Dict:
         """Clear all items from user's wishlist"""
+        cursor.execute('DELETE FROM wishlist WHERE user_id = ?', (user_id,))
+        return {'success': True, 'message': 'Wishlist cleared'}
+    
+    @staticmethod
+    def get_wishlist_count(user_id: int) -> int:
+        """Get number of items in wishlist"""
         conn = get_db_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('DELETE FROM wishlist WHERE user_id = ?', (user_id,))
-            conn.commit()
+            cursor.execute('''
+                SELECT COUNT(*) as count
+                FROM wishlist
+                WHERE user_id = ?
+            ''', (user_id,))
             
-            return {'success': True, 'message': 'Wishlist cleared'}
+            result = cursor.fetchone()
+            return result['count']
             
         finally:
             conn.close()
+
+
+# ==================== ACCOUNT SUMMARY ====================
+
+class AccountDB:
+    """Everything a page load needs about the signed-in user, in one call"""
     
     @staticmethod
-    def get_wishlist_count(user_id: int) -> int:
-        """Get number of items in wishlist"""
+    def get_summary(user_id: int) -> Optional[Dict]:
+        """
+        Profile, cart and wishlist on one connection (three indexed reads
+        instead of the five connections /auth/me, /cart and /wishlist use)
+        
+        Returns:
+            Dict with user, cart {items, total, count}, wishlist {items, count};
+            None if the user does not exist
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
         
         try:
             cursor.execute('''
-                SELECT COUNT(*) as count
-                FROM wishlist
-                WHERE user_id = ?
+                SELECT user_id, email, full_name, phone, created_at, last_login
+                FROM users
+                WHERE user_id = ? AND is_active = 1
             ''', (user_id,))
+            user = dict_from_row(cursor.fetchone())
+            if user is None:
+                return None
             
-            result = cursor.fetchone()
-            return result['count']
+            wishlist_items = WishlistDB._fetch_items(cursor, user_id)
+            return {
+                'user': user,
+                'cart': CartDB._summarize(CartDB._fetch_items(cursor, user_id)),
+                'wishlist': {'items': wishlist_items, 'count': len(wishlist_items)}
+            }
             
         finally:
             conn.close()
 
 
+# ==================== ORDER NUMBERS ====================
+
+class OrderNumberGenerator:
+    """
+    Unique, time-ordered order numbers: ORD-<epoch milliseconds><3-digit sequence>-<pid>
+    
+    - Thread-safe: a lock guards the (millisecond, sequence) state
+    - Safe across serve.py workers: each process stamps its own pid
+    - Monotonic within a process: the millisecond never goes backwards (clock
+      steps are ignored) and a full sequence borrows the next millisecond
+    """
+    
+    SEQUENCE_LIMIT = 1000
+    
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+    
+    def next(self) -> str:
+        with self._lock:
+            now_ms = int(self._clock() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms, self._sequence = now_ms, 0
+            else:
+                self._sequence += 1
+                if self._sequence >= self.SEQUENCE_LIMIT:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+            millis, sequence = self._last_ms, self._sequence
+        return f"ORD-{millis}{sequence:03d}-{os.getpid()}"
+
+
+order_numbers = OrderNumberGenerator()
+
+
 # ==================== ORDER OPERATIONS ====================
 
+# Orders per page of /orders history
+ORDERS_PAGE_SIZE = 20
+MAX_ORDERS_PAGE_SIZE = 100
+
+
 class OrderDB:
     """Database operations for orders"""
     
@@ -354,8 +464,8 @@ class OrderDB:
         cursor = conn.cursor()
         
         try:
-            # Generate order number
-            order_number = f"ORD-{int(datetime.now().timestamp())}"
+            # Generate order number (never repeats, even for concurrent checkouts)
+            order_number = order_numbers.next()
             
             # Insert order
             cursor.execute('''
@@ -380,19 +490,21 @@ class OrderDB:
             
             order_id = cursor.lastrowid
             
-            # Insert order items
-            for item in cart_items:
-                cursor.execute('''
-                    INSERT INTO order_items (
-                        order_id, accessory_id, accessory_name, quantity, price
-                    ) VALUES (?, ?, ?, ?, ?)
-                ''', (
+            # Insert order items (one bulk statement)
+            cursor.executemany('''
+                INSERT INTO order_items (
+                    order_id, accessory_id, accessory_name, quantity, price
+                ) VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (
                     order_id,
                     item['accessory_id'],
                     item.get('accessory_name', ''),
                     item['quantity'],
                     item['price']
-                ))
+                )
+                for item in cart_items
+            ])
             
             # Clear cart
             cursor.execute('DELETE FROM cart_items WHERE user_id = ?', (user_id,))
@@ -444,37 +556,125 @@ class OrderDB:
             conn.close()
     
     @staticmethod
-    def get_user_orders(user_id: int) -> List[Dict]:
-        """Get all orders for a user"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        try:
+    def _fetch_page(cursor, user_id: int, limit: int, after: Optional[str] = None) -> Dict:
+        if after is None:
             cursor.execute('''
                 SELECT * FROM orders
                 WHERE user_id = ?
-                ORDER BY order_date DESC
-            ''', (user_id,))
-            
-            orders = [dict(row) for row in cursor.fetchall()]
-            
-            # Get items for each order
-            for order in orders:
-                cursor.execute('''
-                    SELECT * FROM order_items
-                    WHERE order_id = ?
-                ''', (order['order_id'],))
-                
-                order['items'] = [dict(row) for row in cursor.fetchall()]
-            
-            return orders
-            
+                ORDER BY order_date DESC, order_id DESC
+                LIMIT ?
+            ''', (user_id, limit + 1))
+        else:
+            order_date, order_id = decode_cursor(after)
+            cursor.execute('''
+                SELECT * FROM orders
+                WHERE user_id = ? AND (order_date, order_id) < (?, ?)
+                ORDER BY order_date DESC, order_id DESC
+                LIMIT ?
+            ''', (user_id, order_date, order_id, limit + 1))
+        
+        # One row past the page tells us whether another page exists
+        rows = cursor.fetchall()
+        orders = [dict(row) for row in rows[:limit]]
+        
+        # Items for the whole page in one query, grouped here
+        items_by_order = {order['order_id']: [] for order in orders}
+        if orders:
+            placeholders = ', '.join('?' * len(orders))
+            cursor.execute(f'''
+                SELECT * FROM order_items
+                WHERE order_id IN ({placeholders})
+                ORDER BY order_item_id
+            ''', list(items_by_order))
+            for row in cursor.fetchall():
+                items_by_order[row['order_id']].append(dict(row))
+        for order in orders:
+            order['items'] = items_by_order[order['order_id']]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = orders[-1]
+            next_cursor = encode_cursor(last['order_date'], last['order_id'])
+        return {'orders': orders, 'next_cursor': next_cursor}
+    
+    @staticmethod
+    def get_user_orders(user_id: int, limit: int = ORDERS_PAGE_SIZE, after: Optional[str] = None) -> Dict:
+        """
+        One page of a user's orders, newest first, each with its items
+        
+        Keyset pagination on (order_date, order_id) through idx_order_user_date:
+        pass the previous page's next_cursor as `after`. Every page costs two
+        queries, however deep into the history it is.
+        
+        Returns:
+            Dict with orders and next_cursor (None on the last page)
+        
+        Raises:
+            ValueError: If `after` is not a cursor returned by this method
+        """
+        limit = max(1, min(limit, MAX_ORDERS_PAGE_SIZE))
+        conn = get_db_connection()
+        
+        try:
+            return OrderDB._fetch_page(conn.cursor(), user_id, limit, after)
         finally:
             conn.close()
 
 
 # ==================== ACCESSORY OPERATIONS ====================
 
+# Results per page of /search
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+# Words of a search query that are matched; the rest are ignored
+MAX_SEARCH_TERMS = 16
+SEARCH_LIST_COLUMNS = WISHLIST_LIST_COLUMNS + ('overall_quality_score',)
+
+_SEARCH_TERM = re.compile(r'\w+')
+_BM25 = f"bm25({SEARCH_TABLE}, {', '.join(str(SEARCH_WEIGHTS[c]) for c in SEARCH_COLUMNS)})"
+
+
+def fts_query(text: str) -> str:
+    """
+    FTS5 MATCH expression for free text typed by a user
+    
+    Every word must match (after porter stemming, so "covers" finds "cover").
+    Words are quoted, so FTS5 operators and punctuation in the input are
+    matched literally instead of raising a syntax error.
+    
+    Raises:
+        ValueError: If the text contains no words
+    """
+    terms = _SEARCH_TERM.findall(text)[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise ValueError("Search query has no searchable words")
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def accessory_filters(
+    brand: str = None,
+    model: str = None,
+    category: str = None,
+    min_price: float = None,
+    max_price: float = None,
+    sentiment: str = None
+) -> Tuple[str, List]:
+    """WHERE conditions (joined with AND, on alias a) and their parameters"""
+    conditions, params = ['1=1'], []
+    for column, value in (('car_brand', brand), ('car_model', model),
+                          ('category', category), ('sentiment_label', sentiment)):
+        if value:
+            conditions.append(f'a.{column} = ?')
+            params.append(value)
+    if min_price is not None:
+        conditions.append('a.price >= ?')
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append('a.price <= ?')
+        params.append(max_price)
+    return ' AND '.join(conditions), params
+
+
 class AccessoryDB:
     """Database operations for accessories"""
     
@@ -506,37 +706,107 @@ class AccessoryDB:
         cursor = conn.cursor()
         
         try:
-            query = 'SELECT * FROM accessories WHERE 1=1'
-            params = []
-            
-            if brand:
-                query += ' AND car_brand = ?'
-                params.append(brand)
-            
-            if model:
-                query += ' AND car_model = ?'
-                params.append(model)
-            
-            if min_price is not None:
-                query += ' AND price >= ?'
-                params.append(min_price)
-            
-            if max_price is not None:
-                query += ' AND price <= ?'
-                params.append(max_price)
-            
-            if sentiment:
-                query += ' AND sentiment_label = ?'
-                params.append(sentiment)
-            
-            query += f' LIMIT {limit}'
-            
-            cursor.execute(query, params)
+            where, params = accessory_filters(brand, model, None, min_price, max_price, sentiment)
+            cursor.execute(f'SELECT * FROM accessories a WHERE {where} LIMIT ?', params + [int(limit)])
             return [dict(row) for row in cursor.fetchall()]
             
         finally:
             conn.close()
     
+    @staticmethod
+    def _search_page(cursor, query: str, filters: Dict, limit: int, after: Optional[str] = None) -> Dict:
+        match = f'{SEARCH_TABLE} MATCH ?'
+        match_params = [fts_query(query)]
+        if after is not None:
+            # Keyset: strictly after the previous page's last (score, rowid)
+            try:
+                score, rowid = decode_cursor(after)
+            except ValueError:
+                raise ValueError("Invalid cursor")
+            match += f' AND ({_BM25}, rowid) > (?, ?)'
+            match_params += [score, rowid]
+        
+        where, params = accessory_filters(**filters)
+        if params:
+            # Filters are joined in before the LIMIT, so a page is never short
+            # because rows were dropped after it
+            page = ''
+        else:
+            # Unfiltered, the page is cut from the index alone and only its
+            # rows are read from accessories
+            page = 'ORDER BY score, rowid LIMIT ?'
+            match_params.append(limit + 1)
+        
+        cursor.execute(f'''
+            WITH hits AS (
+                SELECT rowid, {_BM25} AS score
+                FROM {SEARCH_TABLE}
+                WHERE {match}
+                {page}
+            )
+            SELECT {accessory_columns(SEARCH_LIST_COLUMNS)}, h.score, h.rowid AS search_rowid
+            FROM hits h
+            JOIN accessories a ON a.rowid = h.rowid
+            WHERE {where}
+            ORDER BY h.score, h.rowid
+            LIMIT ?
+        ''', match_params + params + [limit + 1])
+        
+        # One row past the page tells us whether another page exists
+        rows = cursor.fetchall()
+        results = []
+        for row in rows[:limit]:
+            result = dict(row)
+            del result['search_rowid']
+            # bm25 is lower-is-better; flip it so clients see higher = more relevant
+            result['relevance'] = round(-result.pop('score'), 4)
+            results.append(result)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last['score'], last['search_rowid'])
+        return {'results': results, 'next_cursor': next_cursor}
+    
+    @staticmethod
+    def full_text_search(
+        query: str,
+        brand: str = None,
+        model: str = None,
+        category: str = None,
+        min_price: float = None,
+        max_price: float = None,
+        sentiment: str = None,
+        limit: int = SEARCH_PAGE_SIZE,
+        after: Optional[str] = None
+    ) -> Dict:
+        """
+        One page of accessories matching `query`, most relevant first
+        
+        Ranked by bm25 over SEARCH_COLUMNS (weighted by SEARCH_WEIGHTS) through
+        the accessories_fts index. Pass the previous page's next_cursor as
+        `after` for the next page.
+        
+        Returns:
+            Dict with results (SEARCH_LIST_COLUMNS plus relevance) and
+            next_cursor (None on the last page)
+        
+        Raises:
+            ValueError: If the query has no words or `after` is not a cursor
+                returned by this method
+        """
+        limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+        filters = {
+            'brand': brand, 'model': model, 'category': category,
+            'min_price': min_price, 'max_price': max_price, 'sentiment': sentiment,
+        }
+        conn = get_db_connection()
+        
+        try:
+            return AccessoryDB._search_page(conn.cursor(), query, filters, limit, after)
+        finally:
+            conn.close()
+    
     @staticmethod
     def get_all_brands() -> List[str]:
         """Get all unique car brands"""
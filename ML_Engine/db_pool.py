@@ -0,0 +1,150 @@
+"""
+🔌 SQLITE CONNECTION POOL
+Shared, tuned SQLite connections for db_helpers, auth and database
+
+Opening a SQLite connection means opening the file, reading the schema and
+starting with an empty statement cache - and the API used to do that for
+every single query. Connections handed out here are opened once, tuned
+once and reused:
+- WAL journal: readers never block the writer and vice versa
+- synchronous=NORMAL: durable at checkpoints, no fsync on every commit
+- busy_timeout: writers wait for the lock instead of failing immediately
+- mmap_size: reads come straight from the page cache
+- A statement cache that survives between requests
+
+Callers keep the plain sqlite3 pattern - `conn = get_connection()` ...
+`conn.close()` - where close() returns the connection to the pool (rolling
+back anything left uncommitted, exactly like a real close would).
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Database path (override with VEHICLE_DB_PATH, e.g. for benchmarks)
+DB_PATH = Path(os.environ.get('VEHICLE_DB_PATH', Path(__file__).parent / 'vehicle_accessories.db'))
+
+# Applied to every new connection
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,                # milliseconds
+    'mmap_size': 256 * 1024 * 1024,      # bytes
+}
+
+# Prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Idle connections kept per database file
+MAX_IDLE_CONNECTIONS = 16
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool"""
+
+    pool: Optional['ConnectionPool'] = None
+    idle = False
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def close_for_real(self):
+        self.pool = None
+        super().close()
+
+
+def open_connection(db_path: Union[str, Path] = None, factory=sqlite3.Connection) -> sqlite3.Connection:
+    """Open a new tuned connection (not pooled - for one-off scripts)"""
+    conn = sqlite3.connect(
+        db_path or DB_PATH,
+        factory=factory,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Pooled connections move between threads, never used by two at once
+        check_same_thread=False
+    )
+    for pragma, value in PRAGMAS.items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+    return conn
+
+
+class ConnectionPool:
+    """Reusable connections to one SQLite database file"""
+
+    def __init__(self, db_path: Union[str, Path], max_idle: int = MAX_IDLE_CONNECTIONS):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self) -> PooledConnection:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: never share a SQLite handle with the parent
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                conn = self._idle.pop()
+                self.reused += 1
+            else:
+                conn = None
+                self.opened += 1
+
+        if conn is None:
+            conn = open_connection(self.db_path, factory=PooledConnection)
+            conn.pool = self
+        # Every caller starts from sqlite3's defaults
+        conn.idle = False
+        conn.row_factory = None
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if conn.idle:
+            return  # closed twice
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close_for_real()
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                conn.idle = True
+                self._idle.append(conn)
+                return
+        conn.close_for_real()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close_for_real()
+
+    def stats(self) -> Dict:
+        return {'idle': len(self._idle), 'opened': self.opened, 'reused': self.reused}
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Union[str, Path] = None) -> ConnectionPool:
+    """The shared pool for a database file"""
+    key = str(db_path or DB_PATH)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key)
+        return _pools[key]
+
+
+def get_connection(db_path: Union[str, Path] = None) -> PooledConnection:
+    """Borrow a connection; call close() to return it"""
+    return get_pool(db_path).acquire()
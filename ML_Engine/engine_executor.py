@@ -0,0 +1,139 @@
+"""
+🧵 ENGINE EXECUTOR
+Bounded thread pool that lets asyncio code await CPU-bound engine work
+
+Recommendation scoring is numpy / scipy / pandas work that blocks whatever
+thread runs it. BoundedEngineExecutor runs it on a fixed number of threads
+behind a bounded queue:
+- At most max_workers calls run at once, at most max_queue more wait
+- A call submitted beyond that fails fast with EngineOverloadedError
+  instead of piling up latency
+- Each call can carry a timeout; a call that times out while still queued
+  never starts
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+
+
+class EngineOverloadedError(Exception):
+    """Raised when the executor's workers and queue are all taken"""
+    pass
+
+
+class BoundedEngineExecutor:
+    """Thread pool with a bounded queue, per-call timeouts and load gauges"""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 32,
+        default_timeout: Optional[float] = None,
+        name: str = "engine"
+    ):
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers must be >= 1 and max_queue >= 0")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_pid = None
+        self._in_flight = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    # ==================== GAUGES ====================
+
+    @property
+    def in_flight(self) -> int:
+        """Calls currently running on a worker thread"""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Calls accepted but waiting for a worker thread"""
+        return self._queued
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'queued': self._queued,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+            }
+
+    # ==================== EXECUTION ====================
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork: a forked worker builds its own pool
+        # (and forgets calls that were running in the parent)
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._in_flight = self._queued = 0
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, func):
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def _release_if_never_started(self, future):
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, func, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker thread and await the result
+
+        Raises:
+            EngineOverloadedError: all workers busy and the queue is full
+            asyncio.TimeoutError: no result within timeout (default_timeout if None)
+        """
+        with self._lock:
+            pool = self._get_pool()
+            if self._in_flight + self._queued >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise EngineOverloadedError(
+                    f"{self.name.capitalize()} overloaded: {self._in_flight} running, {self._queued} queued"
+                )
+            self._queued += 1
+
+        future = pool.submit(self._run, partial(func, *args, **kwargs))
+        future.add_done_callback(self._release_if_never_started)
+
+        timeout = self.default_timeout if timeout is None else timeout
+        try:
+            # On timeout wait_for cancels the future; that only succeeds
+            # (and frees the queue slot) if the call has not started yet
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker threads, dropping calls that have not started"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
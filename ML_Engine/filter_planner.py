@@ -0,0 +1,261 @@
+"""
+🧭 FILTER PLANNER
+Cost-based ordering of the recommendation engine's hard filters
+
+Instead of always applying car → budget → quality → sentiment and materializing
+a new DataFrame after each step, the planner:
+- Keeps selectivity statistics gathered once from the catalog
+  (price/quality histograms, sentiment counts, per-model and per-brand counts)
+- Estimates how many rows each predicate will keep for a given user profile
+- Runs the cheapest-per-rejected-row (usually the most selective) predicate first
+- Evaluates the remaining predicates only on the surviving row positions
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Tuple
+
+UNIVERSAL_PATTERN = 'universal|all cars'
+
+# Relative per-row evaluation cost of each predicate kind.
+# Numeric comparisons are cheap; regex/substring matches over text are not.
+PREDICATE_COSTS = {
+    'car': 12.0,
+    'budget': 1.0,
+    'quality': 1.0,
+    'sentiment': 4.0,
+}
+
+
+class CatalogStatistics:
+    """Per-predicate selectivity statistics collected once from the catalog"""
+
+    def __init__(self, df: pd.DataFrame, bins: int = 32):
+        self.row_count = len(df)
+
+        # Value histograms for the numeric range predicates
+        self.price_hist = self._histogram(df['Accessory Price'], bins)
+        self.quality_hist = self._histogram(df['Overall_Quality_Score'], bins)
+
+        # Categorical counts
+        self.sentiment_counts = df['Sentiment_Label'].str.lower().value_counts().to_dict()
+        self.model_counts = df['Car_Model_Normalized'].fillna('').str.lower().value_counts().to_dict()
+        self.brand_counts = df['Car_Brand_Normalized'].fillna('').str.lower().value_counts().to_dict()
+        self.compatible_counts = df['Compatible_Cars_Normalized'].fillna('').str.lower().value_counts().to_dict()
+        self.universal_count = int(df['Compatible_Cars_Normalized'].str.contains(
+            UNIVERSAL_PATTERN, case=False, na=False, regex=True
+        ).sum())
+
+    @staticmethod
+    def _histogram(values: pd.Series, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Build a value histogram, ignoring missing values"""
+        clean = values.dropna().to_numpy(dtype=float)
+        if len(clean) == 0:
+            return np.zeros(1), np.array([0.0, 0.0])
+        return np.histogram(clean, bins=bins)
+
+    def _range_fraction(self, hist: Tuple[np.ndarray, np.ndarray], low: float, high: float) -> float:
+        """Estimate the fraction of rows with low <= value <= high (uniform within bins)"""
+        counts, edges = hist
+        if self.row_count == 0 or high < low:
+            return 0.0
+
+        total = 0.0
+        for count, left, right in zip(counts, edges[:-1], edges[1:]):
+            if count == 0 or right < low or left > high:
+                continue
+            width = right - left
+            if width <= 0:
+                total += count
+                continue
+            overlap = min(right, high) - max(left, low)
+            total += count * max(overlap, 0.0) / width
+        return min(total / self.row_count, 1.0)
+
+    def budget_selectivity(self, budget_min: float, budget_max: float) -> float:
+        return self._range_fraction(self.price_hist, budget_min, budget_max)
+
+    def quality_selectivity(self, threshold: float) -> float:
+        return self._range_fraction(self.quality_hist, threshold, np.inf)
+
+    def sentiment_selectivity(self, labels: List[str]) -> float:
+        if self.row_count == 0:
+            return 0.0
+        return sum(self.sentiment_counts.get(label, 0) for label in labels) / self.row_count
+
+    def car_selectivity(self, car_brand: str, car_model: str) -> float:
+        """Estimate the car filter from per-model, per-brand and compatibility counts"""
+        if self.row_count == 0:
+            return 0.0
+
+        if car_model:
+            compatible = sum(c for cars, c in self.compatible_counts.items() if car_model in cars)
+            exact_model = sum(c for model, c in self.model_counts.items() if car_model in model)
+            # Exact-model rows usually also list the model in their compatible cars,
+            # so take the larger of the two instead of double counting
+            estimate = max(compatible, exact_model) + self.universal_count
+        else:
+            brand = sum(c for b, c in self.brand_counts.items() if car_brand in b)
+            compatible = sum(c for cars, c in self.compatible_counts.items() if car_brand in cars)
+            estimate = max(brand, compatible)
+
+        return min(estimate / self.row_count, 1.0)
+
+
+class Predicate:
+    """A single hard filter with its estimated selectivity and per-row cost"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        evaluate: Callable[[pd.DataFrame, np.ndarray], np.ndarray],
+        estimated_selectivity: float,
+        cost: float
+    ):
+        self.name = name
+        self.description = description
+        self.evaluate = evaluate
+        self.estimated_selectivity = estimated_selectivity
+        self.cost = cost
+
+    @property
+    def rank(self) -> float:
+        """Cost paid per row rejected - lower ranks run first"""
+        return self.cost / max(1.0 - self.estimated_selectivity, 1e-6)
+
+
+class FilterPlanner:
+    """Build, order and execute the hard-filter predicates for a user profile"""
+
+    def __init__(self, stats: CatalogStatistics):
+        self.stats = stats
+
+    def build_predicates(self, user_profile: Dict, include_car: bool = True) -> List[Predicate]:
+        """Translate a user profile into the predicates that apply to it"""
+        predicates = []
+
+        # Car brand AND model (if car info provided)
+        if include_car and user_profile.get('car_brand'):
+            car_brand = user_profile['car_brand'].lower().strip()
+            car_model = (user_profile.get('car_model') or '').lower().strip()
+            predicates.append(Predicate(
+                name='car',
+                description=f"brand='{car_brand}', model='{car_model}'",
+                evaluate=lambda df, pos: self._car_mask(df, pos, car_brand, car_model),
+                estimated_selectivity=self.stats.car_selectivity(car_brand, car_model),
+                cost=PREDICATE_COSTS['car']
+            ))
+
+        # Budget range
+        if 'budget_min' in user_profile and 'budget_max' in user_profile:
+            budget_min = user_profile['budget_min']
+            budget_max = user_profile['budget_max']
+
+            def budget_mask(df, pos):
+                prices = df['Accessory Price'].to_numpy()[pos]
+                return (prices >= budget_min) & (prices <= budget_max)
+
+            predicates.append(Predicate(
+                name='budget',
+                description=f"{budget_min}-{budget_max}",
+                evaluate=budget_mask,
+                estimated_selectivity=self.stats.budget_selectivity(budget_min, budget_max),
+                cost=PREDICATE_COSTS['budget']
+            ))
+
+        # Minimum quality threshold
+        if 'quality_threshold' in user_profile:
+            threshold = user_profile['quality_threshold']
+
+            def quality_mask(df, pos):
+                return df['Overall_Quality_Score'].to_numpy()[pos] >= threshold
+
+            predicates.append(Predicate(
+                name='quality',
+                description=f">= {threshold}",
+                evaluate=quality_mask,
+                estimated_selectivity=self.stats.quality_selectivity(threshold),
+                cost=PREDICATE_COSTS['quality']
+            ))
+
+        # Sentiment preference (case-insensitive)
+        sentiment_labels = {
+            'positive': ['positive'],
+            'neutral': ['positive', 'neutral'],
+        }.get(user_profile.get('sentiment_preference'))
+        if sentiment_labels:
+            def sentiment_mask(df, pos):
+                labels = df['Sentiment_Label'].iloc[pos].str.lower()
+                return labels.isin(sentiment_labels).to_numpy()
+
+            predicates.append(Predicate(
+                name='sentiment',
+                description=user_profile['sentiment_preference'],
+                evaluate=sentiment_mask,
+                estimated_selectivity=self.stats.sentiment_selectivity(sentiment_labels),
+                cost=PREDICATE_COSTS['sentiment']
+            ))
+
+        return predicates
+
+    @staticmethod
+    def _car_mask(df: pd.DataFrame, pos: np.ndarray, car_brand: str, car_model: str) -> np.ndarray:
+        """Same matching rules as the original car filter, on surviving rows only"""
+        compatible = df['Compatible_Cars_Normalized'].iloc[pos]
+        brand = df['Car_Brand_Normalized'].iloc[pos]
+
+        if car_model:
+            # Accessory must either:
+            # 1. Be specifically compatible with the model, OR
+            # 2. Be universal, OR
+            # 3. Have the same car model as the user's car (exact match)
+            model_match = compatible.str.contains(car_model, case=False, na=False)
+            universal_match = compatible.str.contains(UNIVERSAL_PATTERN, case=False, na=False, regex=True)
+            brand_match = brand.str.contains(car_brand, case=False, na=False)
+            exact_model_match = df['Car_Model_Normalized'].iloc[pos].str.contains(
+                car_model, case=False, na=False
+            )
+            mask = model_match | universal_match | (brand_match & exact_model_match)
+        else:
+            # If no model specified, just filter by brand
+            mask = brand.str.contains(car_brand, case=False, na=False) | \
+                   compatible.str.contains(car_brand, case=False, na=False)
+
+        return mask.to_numpy()
+
+    def plan(self, predicates: List[Predicate]) -> List[Predicate]:
+        """Order predicates so the cheapest-per-rejected-row runs first"""
+        return sorted(predicates, key=lambda p: p.rank)
+
+    def execute(
+        self,
+        df: pd.DataFrame,
+        predicates: List[Predicate]
+    ) -> Tuple[pd.DataFrame, List[Dict]]:
+        """
+        Run the planned predicates over df, touching only surviving rows
+
+        Returns:
+            Tuple of (filtered_df, plan) where plan lists, per executed step,
+            the estimated and actual selectivity
+        """
+        positions = np.arange(len(df))
+        plan = []
+
+        for predicate in self.plan(predicates):
+            rows_in = len(positions)
+            if rows_in > 0:
+                positions = positions[predicate.evaluate(df, positions)]
+            rows_out = len(positions)
+            plan.append({
+                'predicate': predicate.name,
+                'description': predicate.description,
+                'estimated_selectivity': round(predicate.estimated_selectivity, 4),
+                'actual_selectivity': round(rows_out / rows_in, 4) if rows_in else None,
+                'rows_in': rows_in,
+                'rows_out': rows_out,
+            })
+
+        # Positions stay sorted, so row order matches the unplanned filter chain
+        return df.iloc[positions], plan
@@ -0,0 +1,130 @@
+"""
+🔑 PASSWORD HASHER
+bcrypt hashing and verification on a dedicated, size-limited process pool
+
+A bcrypt check costs hundreds of milliseconds of CPU by design. Running it
+in the API process lets a burst of logins starve recommendation requests.
+PasswordHasher sends the work to PASSWORD_HASH_PROCESSES worker processes:
+- At most PASSWORD_HASH_MAX_PENDING hash/verify calls may be running or
+  waiting; one more raises PasswordHasherBusy (the API answers 429)
+- BCRYPT_ROUNDS sets the cost of new hashes; needs_rehash() tells login to
+  re-hash a password stored with a different cost
+- PASSWORD_HASH_PROCESSES=0 hashes in the calling thread (scripts, tests)
+- hash_async()/verify_async() await the worker process from the event loop,
+  so no thread (in particular no database thread) waits on bcrypt
+"""
+
+import asyncio
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_PROCESSES = int(os.environ.get('PASSWORD_HASH_PROCESSES', min(2, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 4 * max(1, PASSWORD_HASH_PROCESSES)))
+
+# $2b$12$<22-char salt><31-char hash>
+_COST_PATTERN = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already pending"""
+    pass
+
+
+# Module-level so worker processes can unpickle them by reference
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _checkpw(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """bcrypt on a process pool, behind a non-blocking concurrency limit"""
+
+    def __init__(
+        self,
+        processes: int = PASSWORD_HASH_PROCESSES,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        rounds: int = BCRYPT_ROUNDS
+    ):
+        self.processes = processes
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid = None
+        self.rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            # A forked API worker must not reuse its parent's pool
+            if self._pool is None or self._pool_pid != os.getpid():
+                # spawn: the API process has threads, which fork does not copy safely
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _call(self, func, *args):
+        if self.processes <= 0:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many password checks in progress")
+        try:
+            return self._get_pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    async def _call_async(self, func, *args):
+        if self.processes <= 0:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many password checks in progress")
+        try:
+            future = self._get_pool().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the worker is done, even if the caller gives up
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    async def hash_async(self, password: str) -> str:
+        return (await self._call_async(_hashpw, password.encode('utf-8'), self.rounds)).decode('utf-8')
+
+    async def verify_async(self, password: str, password_hash: str) -> bool:
+        return await self._call_async(_checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def hash(self, password: str) -> str:
+        return self._call(_hashpw, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._call(_checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when the stored hash was made with a different cost than BCRYPT_ROUNDS"""
+        match = _COST_PATTERN.match(password_hash or '')
+        return match is None or int(match.group(1)) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
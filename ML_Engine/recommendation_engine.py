@@ -15,74 +15,323 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Mapping, Tuple, Optional, Union
 import pickle
+import threading
 from pathlib import Path
 import warnings
+from catalog_snapshot import REQUIRED_COLUMNS, CatalogSnapshot, CatalogUpdateError, tfidf_documents
+from database import read_catalog, read_catalog_version
+from shared_catalog import SharedCatalogReader
+from engine_executor import BoundedEngineExecutor, EngineOverloadedError
 warnings.filterwarnings('ignore')
 
+# Rows ranked by a partial selection before the first streamed batch is sent;
+# later batches come from one sort of the remaining rows
+STREAM_FIRST_BATCH = 32
+STREAM_BATCH = 128
+
 
 class PersonalizedRecommendationEngine:
     """
     Intelligent recommendation engine that provides personalized accessory suggestions
+    
+    Safe to call from several threads at once: each request reads one immutable
+    catalog snapshot, and writers only swap the snapshot reference.
     """
     
-    def __init__(self, data_path: str = None):
-        """Initialize the recommendation engine"""
+    def __init__(
+        self,
+        data_path: str = None,
+        shared_prefix: str = None,
+        catalog_db: Union[str, Path] = None,
+        max_workers: int = 4,
+        max_queue: int = 32,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize the recommendation engine
+        
+        Args:
+            data_path: Directory with the processed dataset
+            shared_prefix: Attach to a catalog published in shared memory by
+                shared_catalog.py instead of loading the CSV in this process
+            catalog_db: Read the catalog from the accessories table of this
+                SQLite database (the one carts and orders use) instead of
+                the CSV, and reload when its catalog version changes
+            max_workers: Threads that run the *_async methods
+            max_queue: Async calls allowed to wait for a thread before
+                EngineOverloadedError is raised
+            timeout: Default per-call timeout of the *_async methods (seconds)
+        """
         if data_path is None:
             # Auto-detect path relative to this file
             current_dir = Path(__file__).parent
             data_path = current_dir.parent / 'Dataset' / 'processed'
         self.data_path = Path(data_path)
-        self.df = None
-        self.tfidf_matrix = None
-        self.tfidf_vectorizer = None
-        self.load_data()
-        
-    def load_data(self):
+        self.catalog_db = Path(catalog_db) if catalog_db is not None else None
+        # catalog_version row the current snapshot was read at (database source only)
+        self.db_catalog_version: Optional[int] = None
+        # Per-thread debug state, so concurrent requests don't overwrite each other
+        self._local = threading.local()
+        # Every request reads from one immutable snapshot; writers swap the reference
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._write_lock = threading.Lock()
+        self._shared = SharedCatalogReader(shared_prefix) if shared_prefix else None
+        # Threads start on the first async call, so a preloaded engine forks cleanly
+        self.executor = BoundedEngineExecutor(max_workers, max_queue, default_timeout=timeout)
+        if self._shared is not None:
+            self._attach_shared()
+        else:
+            self.load_data()
+    
+    @property
+    def last_filter_plan(self) -> List[Dict]:
+        """Filter plan of the most recent request handled on the calling thread"""
+        return getattr(self._local, 'filter_plan', [])
+    
+    # ==================== CATALOG SNAPSHOT ====================
+    
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Currently published catalog snapshot"""
+        snapshot = self._snapshot
+        # In shared-memory mode, remap when the loader has published a new generation
+        if self._shared is not None and self._shared.generation() != snapshot.version:
+            with self._write_lock:
+                if self._shared.generation() != self._snapshot.version:
+                    self._attach_shared()
+            snapshot = self._snapshot
+        return snapshot
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.snapshot.df
+    
+    @property
+    def tfidf_matrix(self):
+        return self.snapshot.tfidf_matrix
+    
+    @property
+    def tfidf_vectorizer(self):
+        return self.snapshot.tfidf_vectorizer
+    
+    @property
+    def filter_planner(self):
+        return self.snapshot.filter_planner
+    
+    @property
+    def catalog_version(self) -> int:
+        return self.snapshot.version
+    
+    def load_data(self) -> CatalogSnapshot:
         """Load all necessary data and models"""
         print("🔄 Loading recommendation data...")
         
-        # Load main dataset with advanced sentiment
-        self.df = pd.read_csv(self.data_path / 'accessories_with_advanced_sentiment.csv')
-        print(f"✅ Loaded {len(self.df)} accessories with {len(self.df.columns)} features")
+        df, source = None, 'csv'
+        if self.catalog_db is not None:
+            # The same rows cart, wishlist and order queries join against
+            version, df = read_catalog(self.catalog_db)
+            self.db_catalog_version = version
+            unusable = [
+                column for column in REQUIRED_COLUMNS
+                if column not in df.columns or df[column].isna().all()
+            ]
+            if len(df) and unusable:
+                print(f"⚠️  The accessories table in {self.catalog_db.name} has no values for "
+                      f"{', '.join(unusable)} - using the CSV. Re-import the catalog with "
+                      f"database.py to serve it from the database")
+                df = None
+            elif len(df):
+                source = f'sqlite:v{version}'
+                print(f"✅ Loaded {len(df)} accessories with {len(df.columns)} features "
+                      f"from {self.catalog_db.name} (catalog version {version})")
+            else:
+                print(f"⚠️  No accessories in {self.catalog_db} - using the CSV "
+                      f"(import it with database.py to share one catalog with the cart)")
+                df = None
+        
+        if df is None:
+            # Load main dataset with advanced sentiment
+            df = pd.read_csv(self.data_path / 'accessories_with_advanced_sentiment.csv')
+            print(f"✅ Loaded {len(df)} accessories with {len(df.columns)} features")
         
         # Load TF-IDF vectorizer if available
         tfidf_vectorizer_path = self.data_path / 'tfidf_vectorizer.pkl'
         if tfidf_vectorizer_path.exists():
             with open(tfidf_vectorizer_path, 'rb') as f:
-                self.tfidf_vectorizer = pickle.load(f)
+                tfidf_vectorizer = pickle.load(f)
             print("✅ Loaded TF-IDF vectorizer")
             
             # Generate TF-IDF matrix for accessories
-            descriptions = self.df['Accessory Description'].fillna('') + ' ' + \
-                          self.df['Accessory Name'].fillna('')
-            self.tfidf_matrix = self.tfidf_vectorizer.transform(descriptions)
-            print(f"✅ Generated TF-IDF matrix: {self.tfidf_matrix.shape}")
+            tfidf_matrix = tfidf_vectorizer.transform(tfidf_documents(df))
+            print(f"✅ Generated TF-IDF matrix: {tfidf_matrix.shape}")
         else:
             print("⚠️  TF-IDF vectorizer not found, will create new one")
-            self._create_tfidf_vectorizer()
+            tfidf_vectorizer, tfidf_matrix = self._create_tfidf_vectorizer(df)
+        
+        return self._publish(df, tfidf_vectorizer, tfidf_matrix, source=source)
     
-    def _create_tfidf_vectorizer(self):
+    def _create_tfidf_vectorizer(self, df: pd.DataFrame):
         """Create TF-IDF vectorizer if not available"""
         print("🔄 Creating TF-IDF vectorizer...")
-        descriptions = self.df['Accessory Description'].fillna('') + ' ' + \
-                      self.df['Accessory Name'].fillna('')
-        
-        self.tfidf_vectorizer = TfidfVectorizer(
+        tfidf_vectorizer = TfidfVectorizer(
             max_features=100,
             stop_words='english',
             ngram_range=(1, 2)
         )
-        self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(descriptions)
-        print(f"✅ Created TF-IDF matrix: {self.tfidf_matrix.shape}")
+        tfidf_matrix = tfidf_vectorizer.fit_transform(tfidf_documents(df))
+        print(f"✅ Created TF-IDF matrix: {tfidf_matrix.shape}")
+        return tfidf_vectorizer, tfidf_matrix
+    
+    def _attach_shared(self) -> CatalogSnapshot:
+        """Map the latest shared-memory generation as a read-only snapshot"""
+        generation, source, df, tfidf_vectorizer, tfidf_matrix = self._shared.load()
+        print(f"✅ Attached shared catalog generation {generation}: {len(df)} accessories")
+        return self._publish(df, tfidf_vectorizer, tfidf_matrix, source=f"shm:{source}", version=generation)
+    
+    def _publish(
+        self,
+        df: pd.DataFrame,
+        tfidf_vectorizer,
+        tfidf_matrix,
+        source: str,
+        version: int = None
+    ) -> CatalogSnapshot:
+        """Build a new snapshot and make it visible to new requests"""
+        if version is None:
+            version = 1 if self._snapshot is None else self._snapshot.version + 1
+        snapshot = CatalogSnapshot(df, tfidf_vectorizer, tfidf_matrix, version, source)
+        # Single reference assignment - in-flight requests keep their old snapshot
+        self._snapshot = snapshot
+        print(f"✅ Published catalog snapshot v{version} ({len(snapshot.df)} accessories, source: {source})")
+        return snapshot
+    
+    def reload(self) -> CatalogSnapshot:
+        """Reload the catalog (database or CSV) and vectorizer without restarting"""
+        with self._write_lock:
+            if self._shared is not None:
+                # The loader process owns the data; just pick up its latest generation
+                return self._attach_shared()
+            return self.load_data()
+    
+    def catalog_changed(self) -> bool:
+        """True when the database catalog version moved since the last load (one-row query)"""
+        if self.catalog_db is None or self._shared is not None:
+            return False
+        return read_catalog_version(self.catalog_db) != self.db_catalog_version
+    
+    def reload_if_changed(self) -> Optional[CatalogSnapshot]:
+        """Reload when the database catalog changed; the new snapshot, or None if unchanged"""
+        if not self.catalog_changed():
+            return None
+        print(f"🔄 Catalog version changed in {self.catalog_db.name} - reloading")
+        return self.reload()
+    
+    def freeze_for_fork(self) -> CatalogSnapshot:
+        """
+        Lay the catalog out for copy-on-write sharing before forking workers
+        
+        Text columns become Categoricals, so rows are integer codes in numpy
+        buffers and only the unique strings remain as Python objects. Reading
+        the catalog in a forked worker then touches few refcounts, and the
+        pages holding the data stay shared with the parent.
+        """
+        self._ensure_writable()
+        with self._write_lock:
+            current = self._snapshot
+            df = current.df.copy()
+            for column in df.columns:
+                if not pd.api.types.is_numeric_dtype(df[column].dtype):
+                    df[column] = df[column].astype('category')
+            return self._publish(
+                df, current.tfidf_vectorizer, current.tfidf_matrix,
+                source=current.source, version=current.version
+            )
+    
+    def _ensure_writable(self):
+        if self._shared is not None:
+            raise CatalogUpdateError(
+                "Catalog is read-only in shared-memory mode - update it through the loader process"
+            )
+    
+    def add_accessories(self, records: List[Dict]) -> CatalogSnapshot:
+        """Add new accessories (dicts keyed by catalog column names)"""
+        self._ensure_writable()
+        with self._write_lock:
+            current = self._snapshot
+            df, tfidf_matrix = current.with_added(records)
+            return self._publish(df, current.tfidf_vectorizer, tfidf_matrix, source='incremental')
+    
+    def update_accessory(self, accessory_id, changes: Dict) -> CatalogSnapshot:
+        """Update columns of one accessory, re-vectorizing it only if its text changed"""
+        self._ensure_writable()
+        with self._write_lock:
+            current = self._snapshot
+            df, tfidf_matrix = current.with_updated(accessory_id, changes)
+            return self._publish(df, current.tfidf_vectorizer, tfidf_matrix, source='incremental')
+    
+    def remove_accessories(self, accessory_ids: List) -> CatalogSnapshot:
+        """Remove accessories by ID"""
+        self._ensure_writable()
+        with self._write_lock:
+            current = self._snapshot
+            df, tfidf_matrix = current.with_removed(accessory_ids)
+            return self._publish(df, current.tfidf_vectorizer, tfidf_matrix, source='incremental')
+    
+    # ==================== ASYNC API ====================
+    # Coroutines for asyncio callers. Scoring runs on self.executor; when its
+    # threads and queue are full they raise EngineOverloadedError, and
+    # asyncio.TimeoutError when a call exceeds its timeout.
+    
+    async def run_async(self, func, *args, timeout: Optional[float] = None, **kwargs):
+        """Run any CPU-bound callable on the engine's executor"""
+        return await self.executor.run(func, *args, timeout=timeout, **kwargs)
+    
+    async def recommend_async(
+        self,
+        user_profile: Dict,
+        top_k: int = 6,
+        diversity_factor: float = 0.3,
+        include_scores: bool = True,
+        timeout: Optional[float] = None
+    ) -> Tuple[pd.DataFrame, Optional[Dict]]:
+        """Awaitable get_recommendations"""
+        return await self.run_async(
+            self.get_recommendations, user_profile,
+            top_k=top_k, diversity_factor=diversity_factor, include_scores=include_scores,
+            timeout=timeout
+        )
+    
+    async def recommend_sections_async(
+        self,
+        user_profile: Dict,
+        exact_match_count: int = 6,
+        compatible_count: int = 6,
+        diversity_factor: float = 0.3,
+        include_scores: bool = True,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """Awaitable get_recommendations_by_sections"""
+        return await self.run_async(
+            self.get_recommendations_by_sections, user_profile,
+            exact_match_count=exact_match_count, compatible_count=compatible_count,
+            diversity_factor=diversity_factor, include_scores=include_scores, timeout=timeout
+        )
+    
+    def executor_stats(self) -> Dict:
+        """In-flight / queued gauges and counters of the async executor"""
+        return self.executor.stats()
+    
+    # ==================== RECOMMENDATIONS ====================
     
     def get_recommendations_by_sections(
         self,
         user_profile: Dict,
         exact_match_count: int = 6,
         compatible_count: int = 6,
-        diversity_factor: float = 0.3
+        diversity_factor: float = 0.3,
+        include_scores: bool = True
     ) -> Dict:
         """
         Generate sectioned recommendations:
@@ -94,6 +343,8 @@ class PersonalizedRecommendationEngine:
             exact_match_count: Number of exact match recommendations (default: 6)
             compatible_count: Number of compatible/universal recommendations (default: 6)
             diversity_factor: Factor to ensure diversity (0-1, higher = more diverse)
+            include_scores: Build the per-factor score breakdown of each section
+                ('scores' is None otherwise)
         
         Returns:
             Dictionary with 'exact_match' and 'compatible' sections
@@ -104,18 +355,23 @@ class PersonalizedRecommendationEngine:
         car_brand = user_profile.get('car_brand', '').lower().strip()
         car_model = user_profile.get('car_model', '').lower().strip()
         
+        # Pin one catalog snapshot for the whole request
+        snapshot = self.snapshot
+        
         # Section 1: EXACT MATCH - Accessories specifically for user's car
         print(f"\n🔍 SECTION 1: Exact match accessories for {car_brand} {car_model}...")
-        exact_match_df = self._filter_exact_match(user_profile)
+        exact_match_df = self._filter_exact_match(user_profile, snapshot)
         exact_recommendations, exact_scores = self._generate_section_recommendations(
-            exact_match_df, user_profile, exact_match_count, diversity_factor, section="exact"
+            exact_match_df, user_profile, exact_match_count, diversity_factor, section="exact",
+            snapshot=snapshot, include_scores=include_scores
         )
         
         # Section 2: COMPATIBLE - Universal or cross-compatible accessories
         print(f"\n🔍 SECTION 2: Compatible/Universal accessories...")
-        compatible_df = self._filter_compatible_universal(user_profile, exact_match_df)
+        compatible_df = self._filter_compatible_universal(user_profile, exact_match_df, snapshot)
         compatible_recommendations, compatible_scores = self._generate_section_recommendations(
-            compatible_df, user_profile, compatible_count, diversity_factor, section="compatible"
+            compatible_df, user_profile, compatible_count, diversity_factor, section="compatible",
+            snapshot=snapshot, include_scores=include_scores
         )
         
         return {
@@ -133,9 +389,10 @@ class PersonalizedRecommendationEngine:
             }
         }
     
-    def _filter_exact_match(self, user_profile: Dict) -> pd.DataFrame:
+    def _filter_exact_match(self, user_profile: Dict, snapshot: CatalogSnapshot) -> pd.DataFrame:
         """Filter accessories that are EXACT match for user's car"""
-        df = self.df.copy()
+        # Only filtered below, never modified - no need to copy the snapshot
+        df = snapshot.df
         car_brand = user_profile.get('car_brand', '').lower().strip()
         car_model = user_profile.get('car_model', '').lower().strip()
         
@@ -152,9 +409,14 @@ class PersonalizedRecommendationEngine:
         print(f"   Found {len(exact_df)} exact match accessories")
         return exact_df
     
-    def _filter_compatible_universal(self, user_profile: Dict, exclude_df: pd.DataFrame) -> pd.DataFrame:
+    def _filter_compatible_universal(
+        self,
+        user_profile: Dict,
+        exclude_df: pd.DataFrame,
+        snapshot: CatalogSnapshot
+    ) -> pd.DataFrame:
         """Filter accessories that are compatible/universal (excluding exact matches)"""
-        df = self.df.copy()
+        df = snapshot.df
         car_brand = user_profile.get('car_brand', '').lower().strip()
         car_model = user_profile.get('car_model', '').lower().strip()
         
@@ -184,14 +446,17 @@ class PersonalizedRecommendationEngine:
         user_profile: Dict,
         top_k: int,
         diversity_factor: float,
-        section: str
-    ) -> Tuple[pd.DataFrame, Dict]:
+        section: str,
+        snapshot: CatalogSnapshot,
+        include_scores: bool = True
+    ) -> Tuple[pd.DataFrame, Optional[Dict]]:
         """Generate recommendations for a specific section"""
+        empty_scores = {} if include_scores else None
         if len(filtered_df) == 0:
-            return pd.DataFrame(), {}
+            return pd.DataFrame(), empty_scores
         
         # Apply additional filters (budget, quality, sentiment)
-        filtered_df = self._apply_additional_filters(filtered_df, user_profile)
+        filtered_df = self._apply_additional_filters(filtered_df, user_profile, snapshot)
         
         # Remove duplicates
         if 'Accessory_Name_Normalized' in filtered_df.columns:
@@ -200,26 +465,10 @@ class PersonalizedRecommendationEngine:
         print(f"   After filters & dedup: {len(filtered_df)} accessories")
         
         if len(filtered_df) == 0:
-            return pd.DataFrame(), {}
+            return pd.DataFrame(), empty_scores
         
         # Calculate scores
-        scores_df = pd.DataFrame(index=filtered_df.index)
-        
-        # Category matching is IMPORTANT - it's part of content similarity
-        scores_df['car_score'] = self._calculate_car_compatibility(filtered_df, user_profile)
-        scores_df['content_score'] = self._calculate_content_similarity(filtered_df, user_profile)
-        scores_df['quality_score'] = self._calculate_quality_score(filtered_df, user_profile)
-        scores_df['preference_score'] = self._calculate_preference_match(filtered_df, user_profile)
-        scores_df['emotion_score'] = self._calculate_emotion_alignment(filtered_df, user_profile)
-        
-        # Weighted final score
-        scores_df['final_score'] = (
-            scores_df['car_score'] * 0.25 +
-            scores_df['content_score'] * 0.20 +  # Includes category matching
-            scores_df['quality_score'] * 0.25 +
-            scores_df['preference_score'] * 0.20 +  # Also includes category preference
-            scores_df['emotion_score'] * 0.10
-        )
+        scores_df = self._score_candidates(filtered_df, user_profile, snapshot)
         
         # Select diverse recommendations
         recommendations_idx = self._select_diverse_recommendations(
@@ -237,46 +486,31 @@ class PersonalizedRecommendationEngine:
         # Sort by score
         recommendations = recommendations.sort_values('final_score', ascending=False)
         
-        # Score breakdown
-        scores_breakdown = {
-            'car_scores': scores_df.loc[recommendations_idx, 'car_score'].to_dict(),
-            'content_scores': scores_df.loc[recommendations_idx, 'content_score'].to_dict(),
-            'quality_scores': scores_df.loc[recommendations_idx, 'quality_score'].to_dict(),
-            'preference_scores': scores_df.loc[recommendations_idx, 'preference_score'].to_dict(),
-            'emotion_scores': scores_df.loc[recommendations_idx, 'emotion_score'].to_dict(),
-            'final_scores': scores_df.loc[recommendations_idx, 'final_score'].to_dict()
-        }
+        # Score breakdown (only when asked for)
+        scores_breakdown = self._score_breakdown(scores_df, recommendations_idx) if include_scores else None
         
         return recommendations, scores_breakdown
     
-    def _apply_additional_filters(self, df: pd.DataFrame, user_profile: Dict) -> pd.DataFrame:
+    def _apply_additional_filters(
+        self,
+        df: pd.DataFrame,
+        user_profile: Dict,
+        snapshot: CatalogSnapshot
+    ) -> pd.DataFrame:
         """Apply budget, quality, and sentiment filters"""
-        # Budget filter
-        if 'budget_min' in user_profile and 'budget_max' in user_profile:
-            df = df[
-                (df['Accessory Price'] >= user_profile['budget_min']) &
-                (df['Accessory Price'] <= user_profile['budget_max'])
-            ]
-        
-        # Quality filter
-        if 'quality_threshold' in user_profile:
-            df = df[df['Overall_Quality_Score'] >= user_profile['quality_threshold']]
-        
-        # Sentiment filter
-        if 'sentiment_preference' in user_profile:
-            if user_profile['sentiment_preference'] == 'positive':
-                df = df[df['Sentiment_Label'].str.lower() == 'positive']
-            elif user_profile['sentiment_preference'] == 'neutral':
-                df = df[df['Sentiment_Label'].str.lower().isin(['positive', 'neutral'])]
-        
+        planner = snapshot.filter_planner
+        predicates = planner.build_predicates(user_profile, include_car=False)
+        df, self._local.filter_plan = planner.execute(df, predicates)
+        self._print_filter_plan(self._local.filter_plan)
         return df
     
     def get_recommendations(
         self,
         user_profile: Dict,
         top_k: int = 6,
-        diversity_factor: float = 0.3
-    ) -> Tuple[pd.DataFrame, Dict]:
+        diversity_factor: float = 0.3,
+        include_scores: bool = True
+    ) -> Tuple[pd.DataFrame, Optional[Dict]]:
         """
         Generate personalized recommendations for a user (LEGACY METHOD - for backward compatibility)
         
@@ -284,6 +518,7 @@ class PersonalizedRecommendationEngine:
             user_profile: Dictionary containing user preferences
             top_k: Number of recommendations to return (default: 6)
             diversity_factor: Factor to ensure diversity (0-1, higher = more diverse)
+            include_scores: Build the per-factor score breakdown (None otherwise)
         
         Returns:
             Tuple of (recommendations_df, scores_breakdown)
@@ -291,8 +526,11 @@ class PersonalizedRecommendationEngine:
         print(f"\n🎯 Generating TOP {top_k} personalized recommendations...")
         print(f"📋 User Profile: {user_profile.get('car_brand')} {user_profile.get('car_model')}")
         
+        # Pin one catalog snapshot for the whole request
+        snapshot = self.snapshot
+        
         # Step 1: Filter by hard constraints
-        filtered_df = self._apply_hard_filters(user_profile)
+        filtered_df = self._apply_hard_filters(user_profile, snapshot)
         
         # Remove duplicate accessories using the normalized name column
         if 'Accessory_Name_Normalized' in filtered_df.columns:
@@ -302,27 +540,59 @@ class PersonalizedRecommendationEngine:
         
         if len(filtered_df) == 0:
             print("⚠️  No accessories match the hard filters")
-            return pd.DataFrame(), {}
+            return pd.DataFrame(), {} if include_scores else None
+        
+        # Steps 2-3: Per-factor scores and the weighted final score
+        scores_df = self._score_candidates(filtered_df, user_profile, snapshot)
         
-        # Step 2: Calculate scores for each factor
+        # Step 4: Apply diversity mechanism
+        recommendations_idx = self._select_diverse_recommendations(
+            filtered_df, scores_df, top_k, diversity_factor
+        )
+        
+        # Step 5: Prepare recommendations with explanations
+        recommendations = filtered_df.loc[recommendations_idx].copy()
+        recommendations['final_score'] = scores_df.loc[recommendations_idx, 'final_score']
+        recommendations['explanation'] = self._generate_explanations(
+            recommendations, scores_df.loc[recommendations_idx], user_profile
+        )
+        
+        # Sort by score
+        recommendations = recommendations.sort_values('final_score', ascending=False)
+        
+        # Prepare score breakdown (only when asked for)
+        scores_breakdown = self._score_breakdown(scores_df, recommendations_idx) if include_scores else None
+        
+        print(f"\n✅ Generated {len(recommendations)} personalized recommendations")
+        print(f"📊 Score range: {recommendations['final_score'].min():.3f} - {recommendations['final_score'].max():.3f}")
+        
+        return recommendations, scores_breakdown
+    
+    def _score_candidates(
+        self,
+        filtered_df: pd.DataFrame,
+        user_profile: Dict,
+        snapshot: CatalogSnapshot
+    ) -> pd.DataFrame:
+        """Per-factor scores and the weighted final score of every candidate row"""
         scores_df = pd.DataFrame(index=filtered_df.index)
         
-        # 2.1 Car Compatibility Score (25%)
+        # Car Compatibility Score (25%)
         scores_df['car_score'] = self._calculate_car_compatibility(filtered_df, user_profile)
         
-        # 2.2 Content Similarity Score (20%)
-        scores_df['content_score'] = self._calculate_content_similarity(filtered_df, user_profile)
+        # Content Similarity Score (20%) - includes category matching
+        scores_df['content_score'] = self._calculate_content_similarity(filtered_df, user_profile, snapshot)
         
-        # 2.3 Sentiment & Quality Score (25%)
+        # Sentiment & Quality Score (25%)
         scores_df['quality_score'] = self._calculate_quality_score(filtered_df, user_profile)
         
-        # 2.4 User Preference Match (20%)
+        # User Preference Match (20%) - also includes category preference
         scores_df['preference_score'] = self._calculate_preference_match(filtered_df, user_profile)
         
-        # 2.5 Emotion Alignment Score (10%)
+        # Emotion Alignment Score (10%)
         scores_df['emotion_score'] = self._calculate_emotion_alignment(filtered_df, user_profile)
         
-        # Step 3: Calculate weighted final score
+        # Weighted final score
         scores_df['final_score'] = (
             scores_df['car_score'] * 0.25 +
             scores_df['content_score'] * 0.20 +
@@ -330,148 +600,156 @@ class PersonalizedRecommendationEngine:
             scores_df['preference_score'] * 0.20 +
             scores_df['emotion_score'] * 0.10
         )
+        return scores_df
+    
+    @staticmethod
+    def _ranked_positions(final_scores: np.ndarray, first_batch: int, batch_size: int) -> Iterator[np.ndarray]:
+        """
+        Row positions by descending score, in batches
         
-        # Step 4: Apply diversity mechanism
-        recommendations_idx = self._select_diverse_recommendations(
-            filtered_df, scores_df, top_k, diversity_factor
-        )
-        
-        # Step 5: Prepare recommendations with explanations
-        recommendations = filtered_df.loc[recommendations_idx].copy()
-        recommendations['final_score'] = scores_df.loc[recommendations_idx, 'final_score']
-        recommendations['explanation'] = self._generate_explanations(
-            recommendations, scores_df.loc[recommendations_idx], user_profile
-        )
+        The first batch comes from a partial selection (argpartition, O(n)),
+        so it is ready before the rest is ordered; the remaining rows are
+        sorted once and handed out batch_size at a time.
+        """
+        order = np.argsort(-final_scores, kind='stable') if len(final_scores) <= first_batch else None
+        if order is None:
+            # Everything above the first_batch-th best score, then the earliest
+            # rows tied with it: the same rows and order a full stable sort gives
+            cutoff = np.partition(-final_scores, first_batch - 1)[first_batch - 1]
+            above = np.flatnonzero(-final_scores < cutoff)
+            tied = np.flatnonzero(-final_scores == cutoff)[:first_batch - len(above)]
+            head = np.sort(np.concatenate([above, tied]))
+            head = head[np.argsort(-final_scores[head], kind='stable')]
+            yield head
+            rest = np.ones(len(final_scores), dtype=bool)
+            rest[head] = False
+            rest = np.flatnonzero(rest)
+            order = rest[np.argsort(-final_scores[rest], kind='stable')]
+        for start in range(0, len(order), batch_size):
+            yield order[start:start + batch_size]
+    
+    def iter_recommendations(
+        self,
+        user_profile: Dict,
+        limit: int,
+        explain: bool = True,
+        first_batch: int = STREAM_FIRST_BATCH,
+        batch_size: int = STREAM_BATCH
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield up to `limit` ranked recommendations as small DataFrames
         
-        # Sort by score
-        recommendations = recommendations.sort_values('final_score', ascending=False)
+        Unlike get_recommendations nothing is built for the whole result:
+        each batch gets its final_score and (with explain=True) explanation
+        columns only when it is requested, so memory does not grow with
+        `limit` and a consumer that stops early pays only for what it read.
+        Candidates are filtered and scored exactly like get_recommendations.
+        """
+        # Pin one catalog snapshot for the whole stream
+        snapshot = self.snapshot
         
-        # Prepare score breakdown
-        scores_breakdown = {
-            'car_scores': scores_df.loc[recommendations_idx, 'car_score'].to_dict(),
-            'content_scores': scores_df.loc[recommendations_idx, 'content_score'].to_dict(),
-            'quality_scores': scores_df.loc[recommendations_idx, 'quality_score'].to_dict(),
-            'preference_scores': scores_df.loc[recommendations_idx, 'preference_score'].to_dict(),
-            'emotion_scores': scores_df.loc[recommendations_idx, 'emotion_score'].to_dict(),
-            'final_scores': scores_df.loc[recommendations_idx, 'final_score'].to_dict()
+        filtered_df = self._apply_hard_filters(user_profile, snapshot)
+        if 'Accessory_Name_Normalized' in filtered_df.columns:
+            filtered_df = filtered_df.drop_duplicates(subset=['Accessory_Name_Normalized'], keep='first')
+        if len(filtered_df) == 0:
+            return
+        
+        scores_df = self._score_candidates(filtered_df, user_profile, snapshot)
+        final_scores = scores_df['final_score'].to_numpy(dtype=np.float64)
+        car_scores = scores_df['car_score'].to_numpy(dtype=np.float64)
+        
+        remaining = limit
+        for positions in self._ranked_positions(final_scores, first_batch, batch_size):
+            positions = positions[:remaining]
+            batch = filtered_df.iloc[positions].copy()
+            batch['final_score'] = final_scores[positions]
+            if explain:
+                batch['explanation'] = [
+                    self._explain(row, car_score, user_profile)
+                    for row, car_score in zip(batch.to_dict('records'), car_scores[positions].tolist())
+                ]
+            yield batch
+            remaining -= len(positions)
+            if remaining <= 0:
+                return
+    
+    @staticmethod
+    def _score_breakdown(scores_df: pd.DataFrame, recommendations_idx) -> Dict:
+        """Per-factor scores of the chosen rows, keyed by catalog row index"""
+        chosen = scores_df.loc[recommendations_idx]
+        keys = chosen.index.tolist()
+        return {
+            f'{column}s': dict(zip(keys, chosen[column].tolist()))
+            for column in ('car_score', 'content_score', 'quality_score',
+                           'preference_score', 'emotion_score', 'final_score')
         }
-        
-        print(f"\n✅ Generated {len(recommendations)} personalized recommendations")
-        print(f"📊 Score range: {recommendations['final_score'].min():.3f} - {recommendations['final_score'].max():.3f}")
-        
-        return recommendations, scores_breakdown
     
-    def _apply_hard_filters(self, user_profile: Dict) -> pd.DataFrame:
+    def _apply_hard_filters(self, user_profile: Dict, snapshot: CatalogSnapshot) -> pd.DataFrame:
         """Apply hard constraints that accessories must meet"""
-        df = self.df.copy()
+        print(f"🔍 DEBUG: Starting with {len(snapshot.df)} accessories")
         
-        print(f"🔍 DEBUG: Starting with {len(df)} accessories")
-        
-        # Filter by car brand AND model (if car info provided)
-        if 'car_brand' in user_profile and user_profile['car_brand']:
-            car_brand = user_profile['car_brand'].lower().strip()
-            car_model = (user_profile.get('car_model') or '').lower().strip()
-            
-            print(f"🔍 DEBUG: Filtering for brand='{car_brand}', model='{car_model}'")
-            print(f"🔍 DEBUG: Has normalized columns? Car_Brand_Normalized: {'Car_Brand_Normalized' in df.columns}, Car_Model_Normalized: {'Car_Model_Normalized' in df.columns}")
-            
-            # Use normalized columns for matching
-            # If user specified a specific model, filter for that model OR universal accessories
-            if car_model:
-                # Check using normalized columns
-                model_match = df['Compatible_Cars_Normalized'].str.contains(car_model, case=False, na=False)
-                universal_match = df['Compatible_Cars_Normalized'].str.contains('universal|all cars', case=False, na=False, regex=True)
-                brand_match = df['Car_Brand_Normalized'].str.contains(car_brand, case=False, na=False)
-                
-                print(f"🔍 DEBUG: model_match={model_match.sum()}, universal_match={universal_match.sum()}, brand_match={brand_match.sum()}")
-                
-                # Accessory must either:
-                # 1. Be specifically compatible with the model, OR
-                # 2. Be universal, OR
-                # 3. Have the same car model as the user's car (exact match)
-                exact_model_match = df['Car_Model_Normalized'].str.contains(car_model, case=False, na=False)
-                
-                print(f"🔍 DEBUG: exact_model_match={exact_model_match.sum()}")
-                
-                df = df[model_match | universal_match | (brand_match & exact_model_match)]
-                
-                print(f"🔍 DEBUG: After car filtering: {len(df)} accessories")
-            else:
-                # If no model specified, just filter by brand
-                df = df[df['Car_Brand_Normalized'].str.contains(
-                    car_brand, case=False, na=False
-                ) | df['Compatible_Cars_Normalized'].str.contains(
-                    car_brand, case=False, na=False
-                )]
-        
-        # Filter by budget
-        if 'budget_min' in user_profile and 'budget_max' in user_profile:
-            df = df[
-                (df['Accessory Price'] >= user_profile['budget_min']) &
-                (df['Accessory Price'] <= user_profile['budget_max'])
-            ]
-            print(f"🔍 DEBUG: After budget filtering ({user_profile['budget_min']}-{user_profile['budget_max']}): {len(df)} accessories")
-        
-        # Filter by minimum quality threshold
-        if 'quality_threshold' in user_profile:
-            df = df[df['Overall_Quality_Score'] >= user_profile['quality_threshold']]
-            print(f"🔍 DEBUG: After quality threshold ({user_profile['quality_threshold']}): {len(df)} accessories")
-        
-        # Filter by sentiment preference
-        if 'sentiment_preference' in user_profile:
-            if user_profile['sentiment_preference'] == 'positive':
-                # Case-insensitive check
-                df = df[df['Sentiment_Label'].str.lower() == 'positive']
-                print(f"🔍 DEBUG: After sentiment filter (positive): {len(df)} accessories")
-            elif user_profile['sentiment_preference'] == 'neutral':
-                # Case-insensitive check
-                df = df[df['Sentiment_Label'].str.lower().isin(['positive', 'neutral'])]
-                print(f"🔍 DEBUG: After sentiment filter (neutral): {len(df)} accessories")
+        # Let the planner order car / budget / quality / sentiment by estimated cost
+        planner = snapshot.filter_planner
+        predicates = planner.build_predicates(user_profile)
+        df, self._local.filter_plan = planner.execute(snapshot.df, predicates)
+        self._print_filter_plan(self._local.filter_plan)
         
         print(f"🔍 DEBUG: Final accessories after all filters: {len(df)}")
         return df
     
+    def _print_filter_plan(self, plan: List[Dict]):
+        """Print the chosen filter order with estimated vs. actual selectivity"""
+        for step, entry in enumerate(plan, 1):
+            actual = entry['actual_selectivity']
+            print(
+                f"🔍 DEBUG: Plan step {step}: {entry['predicate']} ({entry['description']}) "
+                f"est={entry['estimated_selectivity']:.3f} "
+                f"actual={'n/a' if actual is None else f'{actual:.3f}'} "
+                f"rows {entry['rows_in']} -> {entry['rows_out']}"
+            )
+    
     def _calculate_car_compatibility(self, df: pd.DataFrame, user_profile: Dict) -> pd.Series:
         """Calculate car compatibility score (0-1)"""
-        scores = pd.Series(0.0, index=df.index)
-        
         if 'car_brand' not in user_profile or not user_profile['car_brand']:
             return pd.Series(0.5, index=df.index)  # Neutral if no car specified
         
         car_brand = user_profile['car_brand'].lower().strip()
         car_model = (user_profile.get('car_model') or '').lower().strip()
         
-        for idx in df.index:
-            score = 0.0
-            
-            # Check brand match using normalized column
-            brand_normalized = str(df.loc[idx, 'Car_Brand_Normalized']).lower()
-            if car_brand in brand_normalized:
-                score += 0.5
-            
-            # Check model match in compatible cars using normalized column
-            compatible_cars = str(df.loc[idx, 'Compatible_Cars_Normalized']).lower()
-            if car_model and car_model in compatible_cars:
-                score += 0.5
-            elif car_brand in compatible_cars:
-                score += 0.3
-            
-            # Universal compatibility bonus
-            if 'universal' in compatible_cars or 'all' in compatible_cars:
-                score += 0.2
-            
-            scores[idx] = min(score, 1.0)
+        # Whole-column substring checks (str() of each value, as a per-row loop would)
+        brand_normalized = np.char.lower(df['Car_Brand_Normalized'].to_numpy(dtype=object).astype(str))
+        compatible_cars = np.char.lower(df['Compatible_Cars_Normalized'].to_numpy(dtype=object).astype(str))
         
-        return scores
+        # Check brand match using normalized column
+        score = np.where(np.char.find(brand_normalized, car_brand) >= 0, 0.5, 0.0)
+        
+        # Check model match in compatible cars using normalized column
+        brand_listed = np.char.find(compatible_cars, car_brand) >= 0
+        if car_model:
+            model_listed = np.char.find(compatible_cars, car_model) >= 0
+            score += np.where(model_listed, 0.5, np.where(brand_listed, 0.3, 0.0))
+        else:
+            score += np.where(brand_listed, 0.3, 0.0)
+        
+        # Universal compatibility bonus
+        universal = (np.char.find(compatible_cars, 'universal') >= 0) | (np.char.find(compatible_cars, 'all') >= 0)
+        score += np.where(universal, 0.2, 0.0)
+        
+        return pd.Series(np.minimum(score, 1.0), index=df.index)
     
-    def _calculate_content_similarity(self, df: pd.DataFrame, user_profile: Dict) -> pd.Series:
+    def _calculate_content_similarity(
+        self,
+        df: pd.DataFrame,
+        user_profile: Dict,
+        snapshot: CatalogSnapshot
+    ) -> pd.Series:
         """Calculate content-based similarity score (0-1)"""
         scores = pd.Series(0.5, index=df.index)  # Default neutral score
         
         # If user provides search query, use TF-IDF similarity
         if 'search_query' in user_profile and user_profile['search_query']:
-            query_vector = self.tfidf_vectorizer.transform([user_profile['search_query']])
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix[df.index]).flatten()
+            query_vector = snapshot.tfidf_vectorizer.transform([user_profile['search_query']])
+            similarities = cosine_similarity(query_vector, snapshot.tfidf_matrix[df.index]).flatten()
             scores = scores * 0.3 + similarities * 0.7
         
         return scores
@@ -550,7 +828,7 @@ class PersonalizedRecommendationEngine:
         
         return selected
     
-    def _check_cross_compatibility(self, accessory_row: pd.Series, user_car_model: str, user_car_brand: str) -> str:
+    def _check_cross_compatibility(self, accessory_row: Mapping, user_car_model: str, user_car_brand: str) -> str:
         """Check if accessory is compatible with other models besides user's car"""
         # Use normalized columns for matching
         compatible_cars = str(accessory_row.get('Compatible_Cars_Normalized', '')).lower()
@@ -590,57 +868,53 @@ class PersonalizedRecommendationEngine:
         user_profile: Dict
     ) -> List[str]:
         """Generate human-readable explanations for recommendations"""
-        explanations = []
+        return [
+            self._explain(recommendations.loc[idx], scores_df.loc[idx, 'car_score'], user_profile)
+            for idx in recommendations.index
+        ]
+    
+    def _explain(self, accessory_row: Mapping, car_score: float, user_profile: Dict) -> str:
+        """Explanation of one recommendation (accessory_row: a catalog row as Series or dict)"""
+        reasons = []
         user_car_model = user_profile.get('car_model', '')
         user_car_brand = user_profile.get('car_brand', '')
         
-        for idx in recommendations.index:
-            reasons = []
-            
-            # FIRST: Check for cross-compatibility (most important for transparency)
-            cross_compat = self._check_cross_compatibility(
-                recommendations.loc[idx], 
-                user_car_model,
-                user_car_brand
-            )
-            if cross_compat:
-                # Put cross-compatibility message FIRST
-                reasons.append(cross_compat)
-            else:
-                # Regular compatibility message
-                car_score = scores_df.loc[idx, 'car_score']
-                if car_score > 0.7:
-                    reasons.append(f"✅ Perfect fit for your {user_car_brand} {user_car_model}")
-                elif car_score > 0.4:
-                    reasons.append(f"✓ Compatible with your {user_car_brand} {user_car_model}")
-            
-            # Quality
-            quality_score = recommendations.loc[idx, 'Overall_Quality_Score']
-            if quality_score > 0.7:
-                reasons.append(f"⭐ Excellent quality (score: {quality_score:.2f})")
-            elif quality_score > 0.5:
-                reasons.append(f"👍 Good quality (score: {quality_score:.2f})")
-            
-            # Sentiment
-            sentiment_label = recommendations.loc[idx, 'Sentiment_Label']
-            sentiment_score = recommendations.loc[idx, 'Sentiment_Score']
-            if sentiment_label == 'Positive':
-                reasons.append(f"😊 {int((sentiment_score + 1) * 50)}% positive reviews")
-            
-            # Price
-            price = recommendations.loc[idx, 'Accessory Price']
-            reasons.append(f"💰 ₹{price:,.0f}")
-            
-            # Emotion
-            emotion = recommendations.loc[idx, 'Dominant_Emotion']
-            if emotion in ['Happy', 'Satisfied']:
-                reasons.append(f"💚 Customers are {emotion.lower()}")
-            
-            # Combine reasons
-            explanation = " | ".join(reasons)
-            explanations.append(explanation)
-        
-        return explanations
+        # FIRST: Check for cross-compatibility (most important for transparency)
+        cross_compat = self._check_cross_compatibility(accessory_row, user_car_model, user_car_brand)
+        if cross_compat:
+            # Put cross-compatibility message FIRST
+            reasons.append(cross_compat)
+        else:
+            # Regular compatibility message
+            if car_score > 0.7:
+                reasons.append(f"✅ Perfect fit for your {user_car_brand} {user_car_model}")
+            elif car_score > 0.4:
+                reasons.append(f"✓ Compatible with your {user_car_brand} {user_car_model}")
+        
+        # Quality
+        quality_score = accessory_row['Overall_Quality_Score']
+        if quality_score > 0.7:
+            reasons.append(f"⭐ Excellent quality (score: {quality_score:.2f})")
+        elif quality_score > 0.5:
+            reasons.append(f"👍 Good quality (score: {quality_score:.2f})")
+        
+        # Sentiment
+        sentiment_label = accessory_row['Sentiment_Label']
+        sentiment_score = accessory_row['Sentiment_Score']
+        if sentiment_label == 'Positive':
+            reasons.append(f"😊 {int((sentiment_score + 1) * 50)}% positive reviews")
+        
+        # Price
+        price = accessory_row['Accessory Price']
+        reasons.append(f"💰 ₹{price:,.0f}")
+        
+        # Emotion
+        emotion = accessory_row['Dominant_Emotion']
+        if emotion in ['Happy', 'Satisfied']:
+            reasons.append(f"💚 Customers are {emotion.lower()}")
+        
+        # Combine reasons
+        return " | ".join(reasons)
 
 
 def test_recommendation_engine():
@@ -0,0 +1,167 @@
+"""
+📦 RECOMMENDATION SERIALIZER
+Turn recommendation DataFrames into JSON bytes column by column
+
+The recommendation handlers used to walk the result with iterrows(), build
+an AccessoryRecommendation per row out of a dozen str()/float() casts,
+and let FastAPI validate and encode the models again. Here each output
+field is converted once for the whole column, rows are zipped into
+plain dicts, and orjson encodes the payload:
+- The values are produced by the engine, so they are not validated again
+- Encoding happens in the calling thread (the recommendation pool), not
+  on the event loop
+- Output matches the AccessoryRecommendation fields and order
+
+Result cards only need a few of those fields. view=card (or an explicit
+fields= list) converts just those columns and shortens the description;
+the full record comes from /accessories/{id} when a card is opened.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import Response
+
+from database import CSV_COLUMN_MAPPING
+
+# Score breakdowns are keyed by catalog row index (ints); numpy values pass through
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Response field -> (column, type, value when the column is missing).
+# None: computed by the caller (cross-compatibility of the row for this user)
+RECOMMENDATION_FIELDS = {
+    'accessory_id': ('Accessory_ID', str, None),
+    'accessory_name': ('Accessory Name', str, None),
+    'car_brand': ('Car Brand', str, None),
+    'car_model': ('Car Model', str, None),
+    'price': ('Accessory Price', float, None),
+    'description': ('Accessory Description', str, None),
+    'sentiment_score': ('Sentiment_Score', float, None),
+    'sentiment_label': ('Sentiment_Label', str, None),
+    'quality_score': ('Overall_Quality_Score', float, None),
+    'dominant_emotion': ('Dominant_Emotion', str, None),
+    'final_score': ('final_score', float, None),
+    'explanation': ('explanation', str, None),
+    'compatible_cars': ('Compatible Cars', str, None),
+    'is_cross_compatible': None,
+    'compatibility_note': None,
+    'top_reviews': ('Top 5 Reviews', str, ''),
+    'key_strengths': ('Key_Strengths', str, 'N/A'),
+    'key_weaknesses': ('Key_Weaknesses', str, 'N/A'),
+}
+
+# What a result card shows (Results.tsx); reviews, strengths and
+# weaknesses are loaded with the accessory when its details are opened
+CARD_FIELDS = (
+    'accessory_id', 'accessory_name', 'car_brand', 'car_model', 'price', 'description',
+    'sentiment_score', 'sentiment_label', 'quality_score', 'dominant_emotion',
+    'final_score', 'explanation', 'is_cross_compatible', 'compatibility_note',
+)
+# Card descriptions are cut to about this many characters (at a word boundary)
+CARD_DESCRIPTION_CHARS = 160
+
+VIEWS = ('full', 'card')
+
+
+def select_fields(view: str = 'full', fields: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Response fields for a view, or for a comma-separated fields= list
+
+    accessory_id is always included; fields come back in the full
+    response's order. Raises ValueError for an unknown view or field.
+    """
+    if view not in VIEWS:
+        raise ValueError(f"view must be one of: {', '.join(VIEWS)}")
+    if not fields:
+        return CARD_FIELDS if view == 'card' else tuple(RECOMMENDATION_FIELDS)
+
+    wanted = {field.strip() for field in fields.split(',') if field.strip()}
+    unknown = wanted - set(RECOMMENDATION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    wanted.add('accessory_id')
+    return tuple(field for field in RECOMMENDATION_FIELDS if field in wanted)
+
+
+def text_values(df: pd.DataFrame, column: str) -> np.ndarray:
+    """A column as a numpy string array (works for Categorical columns too)"""
+    # str() of every value, as the per-row casts did (NaN -> 'nan', 42 -> '42')
+    return df[column].to_numpy(dtype=object).astype(str)
+
+
+def _column_values(df: pd.DataFrame, column: str, kind, default) -> List:
+    if column not in df.columns:
+        if default is None:
+            raise KeyError(column)
+        return [default] * len(df)
+    if kind is float:
+        return df[column].to_numpy(dtype=np.float64).tolist()
+    return text_values(df, column).tolist()
+
+
+def _shorten(texts: List[str], limit: int) -> List[str]:
+    return [
+        text if len(text) <= limit else text[:limit].rsplit(' ', 1)[0].rstrip(' ,.;:') + '…'
+        for text in texts
+    ]
+
+
+def recommendation_records(
+    df: pd.DataFrame,
+    is_cross_compatible: Union[bool, Sequence[bool]],
+    compatibility_note: Union[str, Sequence[str]],
+    fields: Sequence[str] = tuple(RECOMMENDATION_FIELDS),
+    description_chars: Optional[int] = None
+) -> List[Dict]:
+    """One dict per row with the requested AccessoryRecommendation fields, built column-wise"""
+    rows = len(df)
+    if rows == 0:
+        # Empty sections come back as a DataFrame without columns
+        return []
+
+    columns = {}
+    for field in fields:
+        spec = RECOMMENDATION_FIELDS[field]
+        if spec is not None:
+            columns[field] = _column_values(df, *spec)
+        elif field == 'is_cross_compatible':
+            columns[field] = (
+                [is_cross_compatible] * rows if isinstance(is_cross_compatible, bool) else list(is_cross_compatible)
+            )
+        else:
+            columns[field] = (
+                [compatibility_note] * rows if isinstance(compatibility_note, str) else list(compatibility_note)
+            )
+    if description_chars is not None and 'description' in columns:
+        columns['description'] = _shorten(columns['description'], description_chars)
+
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def accessory_record(row: pd.Series) -> Dict:
+    """
+    One catalog row as AccessoryDB.get_accessory_by_id returns it
+
+    Columns of the accessories table, under their table names. Missing
+    values are '' as the catalog loader stores them; quality_score, which
+    the loader never fills, is None. Only created_at/updated_at are left out.
+    """
+    record = {}
+    for column, db_column in CSV_COLUMN_MAPPING.items():
+        value = row.get(column)
+        record[db_column] = '' if value is None or pd.isna(value) else value
+    record['accessory_id'] = str(record['accessory_id'])
+    record['quality_score'] = None
+    return record
+
+
+def json_bytes(payload) -> bytes:
+    """orjson encoding used by every response here (NaN becomes null)"""
+    return orjson.dumps(payload, option=ORJSON_OPTIONS)
+
+
+def json_response(payload) -> Response:
+    """Encode with orjson and skip FastAPI's response validation and encoding"""
+    return Response(content=json_bytes(payload), media_type="application/json")
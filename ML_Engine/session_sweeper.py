@@ -0,0 +1,110 @@
+"""
+🧹 EXPIRED SESSION SWEEPER
+Background task that keeps the sessions table from growing without bound
+
+validate_session only deletes an expired row when that exact token is
+presented again, so abandoned sessions would stay forever. The sweeper
+runs inside the API process and, every SESSION_SWEEP_INTERVAL seconds:
+- Deletes expired sessions in batches of SESSION_SWEEP_BATCH rows,
+  found through idx_sessions_expires
+- Commits and sleeps between batches, so it never holds SQLite's write
+  lock for long and cart/auth writes interleave with it
+- Also drops persisted revocations of signed tokens that have expired
+- Reports rows reclaimed and time spent
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from auth import SessionManager
+from async_db import db_executor
+from signed_tokens import RevocationList
+
+SESSION_SWEEP_INTERVAL = float(os.environ.get('SESSION_SWEEP_INTERVAL', 3600))
+SESSION_SWEEP_BATCH = int(os.environ.get('SESSION_SWEEP_BATCH', 500))
+# Pause between batches (seconds)
+SESSION_SWEEP_PAUSE = float(os.environ.get('SESSION_SWEEP_PAUSE', 0.05))
+
+
+class SessionSweeper:
+    """Periodically deletes expired sessions in small batches"""
+
+    def __init__(
+        self,
+        interval: float = SESSION_SWEEP_INTERVAL,
+        batch_size: int = SESSION_SWEEP_BATCH,
+        pause: float = SESSION_SWEEP_PAUSE
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.total_reclaimed = 0
+        self.last_run: Optional[Dict] = None
+
+    async def _purge(self, purge_batch) -> int:
+        reclaimed = 0
+        while True:
+            deleted = await db_executor.run(purge_batch, self.batch_size)
+            reclaimed += deleted
+            if deleted < self.batch_size:
+                return reclaimed
+            # Let other writers take the lock before the next batch
+            await asyncio.sleep(self.pause)
+
+    async def sweep_once(self) -> Dict:
+        """Delete every expired session now; returns what was reclaimed"""
+        start = time.perf_counter()
+        sessions = await self._purge(SessionManager.purge_expired_sessions)
+        revocations = 0
+        if SessionManager.signer is not None:
+            revocations = await self._purge(RevocationList.purge_expired)
+
+        self.runs += 1
+        self.total_reclaimed += sessions + revocations
+        self.last_run = {
+            'finished_at': datetime.now().isoformat(),
+            'sessions_reclaimed': sessions,
+            'revocations_reclaimed': revocations,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        print(f"🧹 Session sweep: {sessions} expired sessions, {revocations} revocations "
+              f"reclaimed in {self.last_run['seconds']:.3f}s")
+        return self.last_run
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Session sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Schedule the sweeper on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'total_reclaimed': self.total_reclaimed,
+            'last_run': self.last_run,
+        }
@@ -0,0 +1,360 @@
+"""
+🧠 SHARED-MEMORY CATALOG
+Publish one catalog snapshot into POSIX shared memory for all API workers
+
+One loader process (this module run as a script) builds the engine once -
+from the accessories table of the SQLite database by default, or the CSV
+with --catalog-source csv - and publishes into shared memory:
+- Every numeric column as a raw buffer
+- Every text column dictionary-encoded (integer codes + UTF-8 value pool)
+- The TF-IDF matrix as its CSR data / indices / indptr buffers
+- The pickled TF-IDF vectorizer
+
+Workers started with CATALOG_SHM_PREFIX set attach to those buffers as
+read-only numpy arrays instead of loading the CSV themselves. A small control
+segment holds a generation counter; publishing a reload writes a new data
+segment and bumps the counter, and workers remap when they see it change.
+
+Usage (POSIX only):
+    python shared_catalog.py --prefix vehicle_catalog
+    CATALOG_SHM_PREFIX=vehicle_catalog uvicorn api:app --workers 4
+    kill -HUP <loader pid>      # reload the catalog and publish a new generation
+
+With the database source the loader also republishes on its own when the
+database catalog version changes (checked every --poll-seconds).
+"""
+
+import argparse
+import json
+import mmap
+import pickle
+import signal
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DEFAULT_PREFIX = 'vehicle_catalog'
+
+# Control segment: one little-endian uint64 generation counter
+CONTROL_FORMAT = '<Q'
+CONTROL_SIZE = struct.calcsize(CONTROL_FORMAT)
+
+# Data segment: uint64 manifest length, JSON manifest, then aligned buffers
+HEADER_FORMAT = '<Q'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+ALIGNMENT = 64
+
+
+def control_name(prefix: str) -> str:
+    return f"{prefix}_ctl"
+
+
+def segment_name(prefix: str, generation: int) -> str:
+    return f"{prefix}_{generation}"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _codes_dtype(n_values: int):
+    """Smallest signed code dtype, matching what pandas picks for Categoricals"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _map_readonly(name: str) -> mmap.mmap:
+    """Map an existing segment read-only, owned by the arrays built on it"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # An independent read-only mapping: arrays built on it are immutable and
+        # keep it alive, so it is unmapped only when the last of them is gone
+        return mmap.mmap(shm._fd, shm.size, access=mmap.ACCESS_READ)
+    finally:
+        shm.close()
+        # Attaching registers the segment with this process's resource tracker,
+        # which would unlink it when the worker exits - the loader owns it
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+# ==================== PUBLISHING (loader process) ====================
+
+class _SegmentWriter:
+    """Lay out named buffers and record them in the manifest"""
+
+    def __init__(self):
+        self.buffers: List[Tuple[int, bytes]] = []
+        self.size = 0
+
+    def add(self, data) -> Dict:
+        raw = data.tobytes() if isinstance(data, np.ndarray) else bytes(data)
+        offset = _align(self.size)
+        self.buffers.append((offset, raw))
+        self.size = offset + len(raw)
+        entry = {'offset': offset, 'nbytes': len(raw)}
+        if isinstance(data, np.ndarray):
+            entry['dtype'] = data.dtype.str
+        return entry
+
+
+def _encode_catalog(df: pd.DataFrame, tfidf_vectorizer, tfidf_matrix, writer: _SegmentWriter) -> Dict:
+    """Write the catalog buffers and return the manifest that describes them"""
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            columns.append({
+                'name': name,
+                'kind': 'numeric',
+                'data': writer.add(np.ascontiguousarray(series.to_numpy())),
+            })
+            continue
+
+        # Dictionary-encode text: codes reference a pool of unique UTF-8 values
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        encoded = [str(value).encode('utf-8') for value in uniques]
+        value_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        value_offsets[1:] = np.cumsum([len(value) for value in encoded])
+        columns.append({
+            'name': name,
+            'kind': 'dictionary',
+            'codes': writer.add(codes.astype(_codes_dtype(len(encoded)))),
+            'values': writer.add(b''.join(encoded)),
+            'value_offsets': writer.add(value_offsets),
+        })
+
+    matrix = sparse.csr_matrix(tfidf_matrix)
+    return {
+        'rows': len(df),
+        'columns': columns,
+        'tfidf': {
+            'shape': list(matrix.shape),
+            'data': writer.add(matrix.data),
+            'indices': writer.add(matrix.indices),
+            'indptr': writer.add(matrix.indptr),
+        },
+        'vectorizer': writer.add(pickle.dumps(tfidf_vectorizer, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+class SharedCatalogPublisher:
+    """Owns the shared segments; run in exactly one loader process"""
+
+    def __init__(self, prefix: str = DEFAULT_PREFIX, grace_seconds: float = 60.0):
+        self.prefix = prefix
+        self.grace_seconds = grace_seconds
+        self.generation = 0
+        self._segments: Dict[int, shared_memory.SharedMemory] = {}
+        self._retired: List[Tuple[float, int]] = []
+
+        try:
+            self._control = shared_memory.SharedMemory(
+                name=control_name(prefix), create=True, size=CONTROL_SIZE
+            )
+        except FileExistsError:
+            raise RuntimeError(
+                f"Shared catalog '{prefix}' already exists - is another loader running?"
+            )
+        struct.pack_into(CONTROL_FORMAT, self._control.buf, 0, 0)
+
+    def publish(self, snapshot, source: Optional[str] = None) -> int:
+        """Write a snapshot into a new segment, then bump the generation counter"""
+        generation = self.generation + 1
+        writer = _SegmentWriter()
+        manifest = _encode_catalog(snapshot.df, snapshot.tfidf_vectorizer, snapshot.tfidf_matrix, writer)
+        manifest['generation'] = generation
+        manifest['source'] = source or snapshot.source
+        manifest_bytes = json.dumps(manifest).encode('utf-8')
+
+        data_start = _align(HEADER_SIZE + len(manifest_bytes))
+        segment = shared_memory.SharedMemory(
+            name=segment_name(self.prefix, generation),
+            create=True,
+            size=max(data_start + writer.size, 1)
+        )
+        struct.pack_into(HEADER_FORMAT, segment.buf, 0, len(manifest_bytes))
+        segment.buf[HEADER_SIZE:HEADER_SIZE + len(manifest_bytes)] = manifest_bytes
+        for offset, raw in writer.buffers:
+            start = data_start + offset
+            segment.buf[start:start + len(raw)] = raw
+
+        # Only now make the new generation visible to workers
+        self._segments[generation] = segment
+        struct.pack_into(CONTROL_FORMAT, self._control.buf, 0, generation)
+        if self.generation:
+            self._retired.append((time.monotonic(), self.generation))
+        self.generation = generation
+        self._unlink_retired()
+
+        print(f"✅ Published shared catalog generation {generation} "
+              f"({len(snapshot.df)} accessories, {segment.size / 1024 / 1024:.1f} MB)")
+        return generation
+
+    def _unlink_retired(self, force: bool = False):
+        """Unlink old generations once workers have had time to remap"""
+        now = time.monotonic()
+        still_retired = []
+        for retired_at, generation in self._retired:
+            if force or now - retired_at >= self.grace_seconds:
+                # Workers still mapping it keep their pages until they unmap
+                segment = self._segments.pop(generation)
+                segment.close()
+                segment.unlink()
+            else:
+                still_retired.append((retired_at, generation))
+        self._retired = still_retired
+
+    def close(self):
+        """Remove every segment this publisher created"""
+        for generation in list(self._segments):
+            if generation != self.generation:
+                self._retired.append((0.0, generation))
+        self._unlink_retired(force=True)
+        if self.generation in self._segments:
+            segment = self._segments.pop(self.generation)
+            segment.close()
+            segment.unlink()
+        self._control.close()
+        self._control.unlink()
+
+
+# ==================== ATTACHING (worker processes) ====================
+
+class SharedCatalogReader:
+    """Attach to a published catalog as zero-copy, read-only arrays"""
+
+    def __init__(self, prefix: str = DEFAULT_PREFIX):
+        self.prefix = prefix
+        self._control = _map_readonly(control_name(prefix))
+
+    def generation(self) -> int:
+        """Latest published generation (a single 8-byte read)"""
+        return struct.unpack_from(CONTROL_FORMAT, self._control, 0)[0]
+
+    def load(self) -> Tuple[int, str, pd.DataFrame, object, sparse.csr_matrix]:
+        """
+        Map the latest generation
+
+        Returns:
+            Tuple of (generation, source, df, tfidf_vectorizer, tfidf_matrix)
+        """
+        generation = self.generation()
+        if generation == 0:
+            raise RuntimeError(f"Shared catalog '{self.prefix}' has not been published yet")
+
+        mapping = _map_readonly(segment_name(self.prefix, generation))
+        manifest_size = struct.unpack_from(HEADER_FORMAT, mapping, 0)[0]
+        manifest = json.loads(mapping[HEADER_SIZE:HEADER_SIZE + manifest_size])
+        data_start = _align(HEADER_SIZE + manifest_size)
+        rows = manifest['rows']
+
+        def array(entry: Dict) -> np.ndarray:
+            dtype = np.dtype(entry['dtype'])
+            return np.frombuffer(
+                mapping, dtype=dtype,
+                count=entry['nbytes'] // dtype.itemsize,
+                offset=data_start + entry['offset']
+            )
+
+        def raw(entry: Dict) -> bytes:
+            start = data_start + entry['offset']
+            return mapping[start:start + entry['nbytes']]
+
+        columns = {}
+        for column in manifest['columns']:
+            if column['kind'] == 'numeric':
+                columns[column['name']] = array(column['data'])
+                continue
+
+            # Only the pool of unique values is decoded; codes stay in shared memory
+            pool = raw(column['values'])
+            offsets = array(column['value_offsets'])
+            values = [pool[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+            columns[column['name']] = pd.Series(
+                pd.Categorical.from_codes(array(column['codes']), categories=pd.Index(values)),
+                copy=False
+            )
+
+        df = pd.DataFrame(columns, index=pd.RangeIndex(rows), copy=False)
+
+        tfidf = manifest['tfidf']
+        tfidf_matrix = sparse.csr_matrix(
+            (array(tfidf['data']), array(tfidf['indices']), array(tfidf['indptr'])),
+            shape=tuple(tfidf['shape']),
+            copy=False
+        )
+        tfidf_vectorizer = pickle.loads(raw(manifest['vectorizer']))
+
+        return generation, manifest['source'], df, tfidf_vectorizer, tfidf_matrix
+
+
+# ==================== LOADER PROCESS ====================
+
+def main():
+    """Build the engine once, publish it, and republish on SIGHUP or a catalog change"""
+    from db_pool import DB_PATH
+    from recommendation_engine import PersonalizedRecommendationEngine
+
+    parser = argparse.ArgumentParser(description="Publish the accessory catalog into shared memory")
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help="Shared memory name prefix")
+    parser.add_argument('--data-path', default=None, help="Directory with the processed dataset")
+    parser.add_argument('--grace-seconds', type=float, default=60.0,
+                        help="How long old generations stay linked after a reload")
+    parser.add_argument('--catalog-source', choices=('db', 'csv'), default='db',
+                        help="Read the catalog from the SQLite accessories table or the CSV")
+    parser.add_argument('--poll-seconds', type=float, default=10.0,
+                        help="How often to check the database catalog version (0 disables)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧠 SHARED-MEMORY CATALOG LOADER")
+    print("=" * 60)
+
+    engine = PersonalizedRecommendationEngine(
+        args.data_path,
+        catalog_db=DB_PATH if args.catalog_source == 'db' else None
+    )
+    publisher = SharedCatalogPublisher(args.prefix, grace_seconds=args.grace_seconds)
+    publisher.publish(engine.snapshot)
+
+    reload_requested = threading.Event()
+    stop_requested = threading.Event()
+    signal.signal(signal.SIGHUP, lambda *_: reload_requested.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_requested.set())
+
+    print(f"\n📡 Workers attach with: CATALOG_SHM_PREFIX={args.prefix}")
+    print("🔄 Send SIGHUP to reload, Ctrl+C to stop")
+
+    next_poll = time.monotonic() + args.poll_seconds
+    try:
+        while not stop_requested.is_set():
+            if reload_requested.wait(timeout=1.0):
+                reload_requested.clear()
+                publisher.publish(engine.reload())
+            elif args.poll_seconds > 0 and time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + args.poll_seconds
+                try:
+                    snapshot = engine.reload_if_changed()
+                except Exception as e:
+                    print(f"⚠️  Catalog reload failed: {e}")
+                    snapshot = None
+                if snapshot is not None:
+                    publisher.publish(snapshot)
+            publisher._unlink_retired()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+        print("✅ Shared catalog removed")
+
+
+if __name__ == '__main__':
+    main()
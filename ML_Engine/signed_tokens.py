@@ -0,0 +1,253 @@
+"""
+✍️ SIGNED SESSION TOKENS
+Stateless HMAC-signed tokens - validated in memory, no sessions-table lookup
+
+Enabled with SESSION_TOKEN_MODE=signed. A token carries everything needed
+to check it:
+
+    s1.<kid>.<user_id>.<expires_unix>.<token_id>.<signature>
+
+- signature = HMAC-SHA256 over everything before it, with the key <kid>
+- Key rotation: SESSION_SIGNING_KEYS="new:secret2,old:secret1" signs with
+  the first key and still accepts tokens signed with the others; drop a
+  key once its tokens have expired
+- Logout: the token_id goes on a revocation list, kept in memory and in
+  the revoked_tokens table so every worker (and restart) sees it. Entries
+  are dropped once the token they revoke has expired, so the list stays
+  as small as the number of logouts within one session lifetime
+- verify() never touches the database: RevocationRefresher reloads the
+  list every REVOCATION_REFRESH_SECONDS on the database executor
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+from db_pool import DB_PATH, get_connection
+
+TOKEN_PREFIX = 's1'
+
+SESSION_TOKEN_MODE = os.environ.get('SESSION_TOKEN_MODE', 'db')
+
+# Seconds between reloads of revocations written by other workers
+REVOCATION_REFRESH_SECONDS = float(os.environ.get('REVOCATION_REFRESH_SECONDS', 5))
+
+
+class TokenConfigError(Exception):
+    """Raised when signed tokens are enabled without usable signing keys"""
+    pass
+
+
+def parse_signing_keys(spec: str) -> Dict[str, bytes]:
+    """'kid1:secret1,kid2:secret2' -> ordered {kid: secret}; the first key signs"""
+    keys = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        kid, sep, secret = item.partition(':')
+        if not sep or not kid or not secret or '.' in kid:
+            raise TokenConfigError(f"Invalid signing key entry: {kid or item!r}")
+        keys[kid] = secret.encode('utf-8')
+    return keys
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+class RevocationList:
+    """Revoked token IDs, mirrored to the revoked_tokens table"""
+
+    def __init__(self):
+        self._revoked: Dict[str, int] = {}   # token_id -> expires_unix
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def init_schema():
+        conn = get_connection(DB_PATH)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # id is the refresh watermark. AUTOINCREMENT: plain rowids are reused
+            # once the sweeper deletes the newest rows, and revocations written
+            # after that would never be picked up by other workers
+            columns = {column[1] for column in conn.execute('PRAGMA table_info(revoked_tokens)')}
+            if columns and 'id' not in columns:
+                conn.execute('ALTER TABLE revoked_tokens RENAME TO revoked_tokens_old')
+                conn.execute('DROP INDEX IF EXISTS idx_revoked_expires')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS revoked_tokens (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    token_id TEXT NOT NULL UNIQUE,
+                    expires_at INTEGER NOT NULL
+                )
+            ''')
+            if columns and 'id' not in columns:
+                conn.execute('''
+                    INSERT INTO revoked_tokens (token_id, expires_at)
+                    SELECT token_id, expires_at FROM revoked_tokens_old ORDER BY rowid
+                ''')
+                conn.execute('DROP TABLE revoked_tokens_old')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_revoked_expires ON revoked_tokens(expires_at)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def is_revoked(self, token_id: str) -> bool:
+        """In-memory lookup; other workers' revocations arrive with refresh()"""
+        return token_id in self._revoked
+
+    def revoke(self, token_id: str, expires_at: int):
+        with self._lock:
+            self._revoked[token_id] = expires_at
+        conn = get_connection(DB_PATH)
+        try:
+            conn.execute(
+                'INSERT OR IGNORE INTO revoked_tokens (token_id, expires_at) VALUES (?, ?)',
+                (token_id, expires_at)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def refresh(self):
+        """Pick up revocations persisted since the last refresh and forget expired ones"""
+        now = int(time.time())
+        conn = get_connection(DB_PATH)
+        try:
+            rows = conn.execute(
+                'SELECT id, token_id, expires_at FROM revoked_tokens WHERE id > ? AND expires_at > ?',
+                (self._last_id, now)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        with self._lock:
+            for row_id, token_id, expires_at in rows:
+                self._revoked[token_id] = expires_at
+                self._last_id = max(self._last_id, row_id)
+            self._revoked = {tid: exp for tid, exp in self._revoked.items() if exp > now}
+
+    @staticmethod
+    def purge_expired(batch_size: int = 500) -> int:
+        """Delete up to batch_size persisted revocations of already-expired tokens"""
+        conn = get_connection(DB_PATH)
+        try:
+            cursor = conn.execute('''
+                DELETE FROM revoked_tokens
+                WHERE token_id IN (
+                    SELECT token_id FROM revoked_tokens
+                    WHERE expires_at <= ?
+                    LIMIT ?
+                )
+            ''', (int(time.time()), batch_size))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+class RevocationRefresher:
+    """Background task that reloads a RevocationList on the database executor"""
+
+    def __init__(self, interval: float = REVOCATION_REFRESH_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_forever(self, revocations: RevocationList, executor):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await executor.run(revocations.refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the current list; the next refresh retries
+                print(f"⚠️  Revocation refresh failed: {e}")
+
+    def start(self, revocations: RevocationList, executor):
+        """Schedule refreshes on the running event loop (executor: a BoundedEngineExecutor)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_forever(revocations, executor))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class SignedTokenManager:
+    """Issue and verify HMAC-signed session tokens"""
+
+    def __init__(self, keys: Dict[str, bytes], revocations: RevocationList = None):
+        if not keys:
+            raise TokenConfigError("SESSION_SIGNING_KEYS must contain at least one kid:secret pair")
+        self.keys = keys
+        self.active_kid = next(iter(keys))
+        self.revocations = revocations or RevocationList()
+
+    @staticmethod
+    def is_signed(token: str) -> bool:
+        return token.startswith(TOKEN_PREFIX + '.')
+
+    def _sign(self, kid: str, body: str) -> str:
+        return _b64(hmac.new(self.keys[kid], body.encode('ascii'), hashlib.sha256).digest())
+
+    def issue(self, user_id: int, lifetime_seconds: int) -> str:
+        expires_at = int(time.time()) + lifetime_seconds
+        body = f"{TOKEN_PREFIX}.{self.active_kid}.{int(user_id)}.{expires_at}.{_b64(secrets.token_bytes(9))}"
+        return f"{body}.{self._sign(self.active_kid, body)}"
+
+    def _parse(self, token: str) -> Optional[Dict]:
+        """Fields of a well-formed, correctly signed token (expiry not checked)"""
+        # hmac.compare_digest raises TypeError for non-ASCII str; such a token is just invalid
+        if not token.isascii():
+            return None
+        parts = token.split('.')
+        if len(parts) != 6 or parts[0] != TOKEN_PREFIX:
+            return None
+        _, kid, user_id, expires_at, token_id, signature = parts
+        if kid not in self.keys:
+            return None
+        if not hmac.compare_digest(signature, self._sign(kid, token.rsplit('.', 1)[0])):
+            return None
+        try:
+            return {'user_id': int(user_id), 'expires_at': int(expires_at), 'token_id': token_id}
+        except ValueError:
+            return None
+
+    def verify(self, token: str) -> Optional[int]:
+        """user_id of a valid, unexpired, unrevoked token; None otherwise"""
+        claims = self._parse(token)
+        if claims is None or claims['expires_at'] <= time.time():
+            return None
+        if self.revocations.is_revoked(claims['token_id']):
+            return None
+        return claims['user_id']
+
+    def revoke(self, token: str) -> bool:
+        claims = self._parse(token)
+        if claims is None or claims['expires_at'] <= time.time():
+            return False
+        self.revocations.revoke(claims['token_id'], claims['expires_at'])
+        return True
+
+
+def manager_from_env() -> Optional[SignedTokenManager]:
+    """The configured manager, or None when no signing keys are set"""
+    spec = os.environ.get('SESSION_SIGNING_KEYS', '')
+    if not spec:
+        if SESSION_TOKEN_MODE == 'signed':
+            raise TokenConfigError("SESSION_TOKEN_MODE=signed needs SESSION_SIGNING_KEYS")
+        return None
+    return SignedTokenManager(parse_signing_keys(spec))
@@ -0,0 +1,220 @@
+"""
+✍️ WRITE COORDINATOR
+One writer connection with group commit for cart and wishlist mutations
+
+SQLite lets one connection write at a time. When every add-to-cart opened
+its own transaction, concurrent writers queued on the file lock (or gave
+up with "database is locked") and each paid for its own commit.
+WriteCoordinator sends those mutations to a single writer thread instead:
+- Everything queued while the previous batch was committing, plus what
+  arrives within WRITE_BATCH_WINDOW_MS (up to WRITE_BATCH_MAX), runs in
+  one BEGIN IMMEDIATE ... COMMIT. A lone write on an idle writer does not
+  wait for the window
+- Each operation runs inside its own SAVEPOINT: if it raises, only its
+  changes are rolled back and only its caller sees the error
+- Callers get their own operation's result once the batch has committed
+- At most WRITE_QUEUE_SIZE operations wait; beyond that
+  EngineOverloadedError is raised (the API answers 503)
+
+Operations are plain functions taking a cursor first:
+
+    @grouped_write
+    def add_to_cart(cursor, user_id, accessory_id, quantity=1): ...
+
+    CartDB.add_to_cart(user_id, '42')                   # blocks until committed
+    await write_coordinator.submit(CartDB.add_to_cart.operation, user_id, '42')
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from db_pool import DB_PATH, open_connection
+from engine_executor import EngineOverloadedError
+
+WRITE_BATCH_WINDOW_MS = float(os.environ.get('WRITE_BATCH_WINDOW_MS', 2))
+WRITE_BATCH_MAX = int(os.environ.get('WRITE_BATCH_MAX', 256))
+WRITE_QUEUE_SIZE = int(os.environ.get('WRITE_QUEUE_SIZE', 1024))
+
+_STOP = object()
+
+
+class WriteCoordinator:
+    """Single writer thread that group-commits queued operations"""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path] = None,
+        window_ms: float = WRITE_BATCH_WINDOW_MS,
+        max_batch: int = WRITE_BATCH_MAX,
+        max_queue: int = WRITE_QUEUE_SIZE
+    ):
+        self.db_path = db_path or DB_PATH
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self.batches = 0
+        self.operations = 0
+        self.failed = 0
+        self.rejected = 0
+
+    # ==================== SUBMISSION ====================
+
+    def _start(self) -> queue.Queue:
+        with self._lock:
+            # Threads do not survive fork: a forked worker starts its own writer
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                                name="db-writer", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+            return self._queue
+
+    def submit_future(self, operation, *args, **kwargs) -> Future:
+        """Queue operation(cursor, *args, **kwargs); the future resolves after its batch commits"""
+        future = Future()
+        try:
+            self._start().put_nowait((operation, args, kwargs, future))
+        except queue.Full:
+            # Submitting threads race on this counter
+            with self._lock:
+                self.rejected += 1
+            raise EngineOverloadedError(f"Database writer overloaded: {self.max_queue} writes queued")
+        return future
+
+    def execute(self, operation, *args, **kwargs):
+        """Run an operation through the writer and wait for its result (blocking)"""
+        return self.submit_future(operation, *args, **kwargs).result()
+
+    async def submit(self, operation, *args, **kwargs):
+        """Run an operation through the writer and await its result (no thread held while waiting)"""
+        return await asyncio.wrap_future(self.submit_future(operation, *args, **kwargs))
+
+    # ==================== WRITER THREAD ====================
+
+    def _collect(self, pending: queue.Queue, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch and batch[-1] is not _STOP:
+            try:
+                # Only wait for stragglers under load: alone in the queue, commit at once
+                if len(batch) == 1:
+                    item = pending.get_nowait()
+                else:
+                    item = pending.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self, pending: queue.Queue):
+        try:
+            conn = open_connection(self.db_path)
+        except Exception as e:
+            # Fail what is queued rather than leave callers waiting; the next submit starts a new writer
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    return
+                if item is not _STOP:
+                    item[3].set_exception(e)
+        # Transactions are managed explicitly below
+        conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        try:
+            while True:
+                batch = self._collect(pending, pending.get())
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                if batch:
+                    self._commit(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List):
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for operation, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue  # caller gave up before it ran
+                conn.execute('SAVEPOINT operation')
+                try:
+                    result = operation(conn.cursor(), *args, **kwargs)
+                except Exception as e:
+                    conn.execute('ROLLBACK TO operation')
+                    conn.execute('RELEASE operation')
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute('RELEASE operation')
+                    outcomes.append((future, result, None))
+            conn.execute('COMMIT')
+        except Exception as e:
+            # The batch as a whole failed (lock timeout, disk error): nothing was written
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            outcomes = [(future, None, e) for _, _, _, future in batch if not future.done()]
+
+        with self._lock:
+            self.batches += 1
+            self.operations += len(outcomes)
+            self.failed += sum(error is not None for _, _, error in outcomes)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Commit what is already queued, then stop the writer thread"""
+        with self._lock:
+            thread, pending = self._thread, self._queue
+            self._thread = None
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            pending.put(_STOP, timeout=timeout)
+            thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            batches, operations, failed, rejected = self.batches, self.operations, self.failed, self.rejected
+            pending = self._queue
+        return {
+            'queued': pending.qsize() if pending is not None else 0,
+            'batches': batches,
+            'operations': operations,
+            'mean_batch': round(operations / batches, 2) if batches else 0,
+            'failed': failed,
+            'rejected': rejected,
+        }
+
+
+write_coordinator = WriteCoordinator()
+
+
+def grouped_write(operation):
+    """
+    Turn operation(cursor, *args) into a blocking call(*args) that runs
+    through write_coordinator. The original stays available as .operation
+    (async_db awaits it with write_coordinator.submit).
+    """
+    @wraps(operation)
+    def call(*args, **kwargs):
+        return write_coordinator.execute(operation, *args, **kwargs)
+    call.operation = operation
+    return call